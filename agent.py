@@ -0,0 +1,43 @@
+from langchain.agents import initialize_agent, AgentType
+from langchain_core.messages import SystemMessage
+from langchain_core.prompts import MessagesPlaceholder
+
+from tools.regulation_search import search_regulations_tool
+from tools.risk_calc import calculate_risk_tool
+from tools.sanctions import check_sanctions_tool
+from model_routing import build_agent_llm
+
+SYSTEM_PROMPT = """You are JurisLens, an AI compliance expert. 
+            
+            1. Use 'RegulationSearch' to find laws. Provide comprehensive, verbose explanations citing specific articles/sections. 
+            2. ALWAYS cite the source document name AND Page Number (if defined) or Section Number (from text) for every claim (e.g., '[Source: file.pdf (Page 5)]' or 'Section 1010.610').
+            3. Use 'RiskCalculator' for risk assessment and live ledger checks.
+            4. Use 'SanctionsChecker' to verify if individuals or entities are on blacklists or sanctioned watchlists.
+            """
+
+def setup_agent_v3(openai_api_key, llm=None):
+    """
+    Builds the JurisLens tool-calling agent.
+    Pass `llm` to swap in a different chat model (e.g. a local stand-in for benchmarks);
+    by default tool selection runs on a small model and the final answer on the large one
+    (model_routing.py).
+    Prior turns can be supplied per run as `chat_history` (see context_packing.pack_history).
+    """
+    # Pass key explicitly to avoid cache staleness
+    tools = [search_regulations_tool, calculate_risk_tool, check_sanctions_tool]
+    if llm is None:
+        llm = build_agent_llm(openai_api_key)
+    
+    # Use the High-Level "initialize_agent" -> It handles everything automatically
+    return initialize_agent(
+        tools=tools,
+        llm=llm,
+        agent=AgentType.OPENAI_FUNCTIONS,
+        verbose=True,
+        max_iterations=5,
+        early_stopping_method="generate",
+        agent_kwargs={
+            "system_message": SystemMessage(content=SYSTEM_PROMPT),
+            "extra_prompt_messages": [MessagesPlaceholder(variable_name="chat_history", optional=True)],
+        }
+    )
@@ -1,10 +1,19 @@
 import os
+import sys
+import time
+import uuid
 import streamlit as st
 
 # LOAD SECRETS INTO OS.ENVIRON ROBUSTLY
+@st.cache_resource
 def load_secrets():
+    # Once per server process: the values land in os.environ, which outlives reruns
     if hasattr(st, "secrets"):
-        for key, value in st.secrets.items():
+        try:
+            secrets = st.secrets.items()
+        except FileNotFoundError:
+            return  # No secrets.toml (e.g. running locally from a .env)
+        for key, value in secrets:
             if isinstance(value, str):
                 os.environ[key] = value
             elif isinstance(value, dict):
@@ -13,7 +22,6 @@ def load_secrets():
 
 load_secrets()
 
-# Validation Check
 # Validation Check
 api_key = os.getenv("OPENAI_API_KEY")
 
@@ -39,61 +47,24 @@ else:
     # Key is valid, proceed silently
     pass
 
-from langchain_openai import ChatOpenAI
-from langchain_core.tools import Tool
-# Flexible Agent Import for Streamlit Cloud Compatibility
-try:
-    from langchain.agents import AgentExecutor, create_tool_calling_agent
-except ImportError:
-    pass
-
-# FALLBACK TO RELIABLE LEGACY AGENT
-from langchain.agents import initialize_agent, AgentType
-from langchain import hub
-from langchain.memory import ConversationBufferMemory
-from langchain_core.messages import SystemMessage
-from langchain_community.callbacks import StreamlitCallbackHandler
-
-# Import tools
-from tools.regulation_search import search_regulations_tool
-from tools.risk_calc import calculate_risk_tool
-from tools.sanctions import check_sanctions_tool
-
-from langchain.callbacks.base import BaseCallbackHandler
-import time
-
-# Custom Handler for user-friendly "Scanning" visuals
-class FriendlyCallbackHandler(BaseCallbackHandler):
-    def __init__(self, status_placeholder, progress_bar):
-        self.status = status_placeholder
-        self.progress = progress_bar
-        self.step = 30 # Start at 30%
-        
-    def on_tool_start(self, serialized, input_str, **kwargs):
-        tool_name = serialized.get("name")
-        self.step += 10
-        if self.step > 90: self.step = 90
-        self.progress.progress(self.step)
-        
-        if tool_name == "search_regulations_tool":
-            self.status.info("🔍 **Scanning Knowledge Base...**")
-        elif tool_name == "calculate_risk_tool":
-            self.status.warning("🧮 **Calculating Compliance Risk...**")
-        elif tool_name == "check_sanctions_tool":
-            self.status.error("🕵️‍♀️ **Scanning Sanctions Databases...**")
-            
-    def on_tool_end(self, output, **kwargs):
-        self.step += 10
-        if self.step > 95: self.step = 95
-        self.progress.progress(self.step)
-        
-        output_str = str(output)
-        if "Daily Aggregate Limit Exceeded" in output_str:
-             self.status.error("❌ **LEDGER CHECK FAILED:** Daily Limit Exceeded!")
-        elif "simulated" in output_str.lower() or "source" in output_str.lower():
-             self.status.success("✅ **Relevant Documents Found.** Analysis in progress...")
-        else:
-             self.status.info("🤔 **Analyzing Findings...**")
+# Heavy dependencies (LangChain, the agent, the tools) are imported lazily where
+# they are used, and pre-imported in a background thread, so the first page
+# paints before they have loaded. See `python benchmark.py --mode startup`.
+@st.cache_resource
+def prewarm_agent_imports():
+    import threading
+    import importlib
+    thread = threading.Thread(target=importlib.import_module, args=("agent",), name="jurislens-prewarm", daemon=True)
+    thread.start()
+    return thread
+
+prewarm_agent_imports()
+
+@st.cache_resource(show_spinner="Loading the compliance agent...")
+def get_agent(openai_api_key):
+    # Built once per key and server process; chat history and callbacks are passed per run
+    from agent import setup_agent_v3
+    return setup_agent_v3(openai_api_key)
 
 # --- PAGE CONFIG ---
 st.set_page_config(
@@ -190,6 +161,86 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# --- BACKGROUND INGESTION (jobs.py) ---
+# "queue" = SQLite job table + worker processes, "inline" = index inside this script run
+INGEST_MODE = os.getenv("JURISLENS_INGEST_MODE", "queue")
+
+@st.cache_resource
+def get_ingest_queue():
+    # One queue per server process, shared by all sessions and reruns
+    from jobs import JobQueue
+    return JobQueue()
+
+@st.cache_resource
+def ensure_ingest_workers():
+    # Spawned on first need (a submit, or jobs left queued by a previous server), not at cold start
+    from jobs import start_workers
+    return start_workers()
+
+def session_owner():
+    # Kept in the URL so a browser refresh reattaches to the same jobs
+    if "session_id" not in st.session_state:
+        sid = st.query_params.get("sid") if hasattr(st, "query_params") else None
+        st.session_state.session_id = sid or uuid.uuid4().hex
+        if hasattr(st, "query_params"):
+            st.query_params["sid"] = st.session_state.session_id
+    return st.session_state.session_id
+
+def _poll(func):
+    # Re-run just the jobs panel every 2s where Streamlit supports fragments
+    fragment = getattr(st, "fragment", None)
+    return fragment(run_every=2)(func) if fragment else func
+
+@_poll
+def render_ingest_jobs():
+    queue = get_ingest_queue()
+    jobs = queue.list_jobs(owner=session_owner(), limit=10)
+    if not jobs:
+        return
+    if any(job["status"] in ("queued", "running") for job in jobs):
+        ensure_ingest_workers()
+
+    merged = st.session_state.setdefault("merged_jobs", set())
+    newly_merged = False
+    for job in jobs:
+        label = job["label"] if len(job["label"]) < 40 else "…" + job["label"][-38:]
+        if job["status"] in ("queued", "running"):
+            st.progress(job["progress"], text=f"⏳ {label}: {job['message'] or job['status']}")
+            if st.button("Cancel", key=f"cancel_{job['id']}"):
+                queue.cancel(job["id"])
+        elif job["status"] == "done" and job["id"] not in merged:
+            # Pull the finished chunks into this session's local backup exactly once
+            result = queue.get(job["id"])["result"] or []
+            st.session_state.setdefault("kb_text", []).extend(result)
+            st.session_state.setdefault("indexed_files", set()).add(job["label"])
+            merged.add(job["id"])
+            newly_merged = True
+        elif job["status"] == "failed":
+            st.caption(f"❌ {label}: {job['error']}")
+            if st.button("Retry", key=f"retry_{job['id']}"):
+                queue.retry(job["id"])
+        elif job["status"] == "cancelled":
+            st.caption(f"🛑 {label}: cancelled")
+
+    if newly_merged:
+        st.rerun()
+
+@st.cache_resource(show_spinner="Loading the knowledge base snapshot...", max_entries=1)
+def get_kb_snapshot(version):
+    # Once per snapshot version and server process: chunks, keyword index and embeddings
+    # from disk (kb_snapshot.py). A later ingest's export makes the next session load the new one.
+    from kb_snapshot import EMBEDDING_CACHE, load_snapshot
+    snapshot = load_snapshot(version=version)
+    EMBEDDING_CACHE.seed(snapshot)
+    return snapshot
+
+if "kb_text" not in st.session_state:
+    # New sessions start with the last exported knowledge base instead of an empty one
+    from kb_snapshot import current_version
+    kb_snapshot = get_kb_snapshot(current_version())
+    if kb_snapshot is not None:
+        kb_snapshot.seed_session(st.session_state)
+
 # --- SIDEBAR (MINIMALIST) ---
 with st.sidebar:
     # Small logo to save space
@@ -205,16 +256,43 @@ with st.sidebar:
         else:
             st.caption("ℹ️ Knowledge Base Empty")
 
+        from partitions import DEFAULT_TENANT, TENANTS, partition_metadata
+
+        # Business unit: scopes both what gets indexed and what search can see
+        if len(TENANTS) > 1:
+            st.selectbox("Business Unit", TENANTS, key="tenant")
+        else:
+            st.session_state.tenant = TENANTS[0] if TENANTS else DEFAULT_TENANT
+        tag_col, date_col = st.columns(2)
+        with tag_col:
+            doc_jurisdiction = st.text_input("Jurisdiction", placeholder="Global", help="Leave empty for rules that apply everywhere.")
+        with date_col:
+            doc_effective = st.date_input("Effective from", value=None, help="Rules aren't returned before this date.")
+        partition = partition_metadata(st.session_state.tenant, doc_jurisdiction, doc_effective)
+
         uploaded_files = st.file_uploader("Upload Regulations (PDF)", type=["pdf"], accept_multiple_files=True, label_visibility="collapsed")
         # Pre-filled placeholder with a real eCFR regulation link for easier demo
         url_input = st.text_input("Or Paste Web Link:", placeholder="https://www.ecfr.gov/current/title-31/part-1010/section-1010.610")
+        crawl_links = st.checkbox("🕸️ Crawl linked pages", help="Also index linked pages under the same path (e.g. every section of a Part).")
         
         if st.button("Process & Index", type="primary", use_container_width=True):
             if not uploaded_files and not url_input:
                 st.warning("Please upload files or provide a link.")
+            elif INGEST_MODE == "queue":
+                # Hand off to the background workers; the jobs panel below polls progress
+                from jobs import spool_upload
+                queue = get_ingest_queue()
+                ensure_ingest_workers()
+                owner = session_owner()
+                for uploaded_file in uploaded_files or []:
+                    path = spool_upload(uploaded_file.name, uploaded_file.getvalue())
+                    queue.submit(owner, "pdf", path, label=uploaded_file.name, partition=partition)
+                if url_input:
+                    queue.submit(owner, "crawl" if crawl_links else "url", url_input, partition=partition)
+                st.toast("📥 Queued for indexing. You can keep working.")
             else:
                 import tempfile
-                from ingest import ingest_pdf, ingest_url
+                from ingest import ingest_crawl, ingest_pdf, ingest_url
                 
                 # Initialize session state for tracking indexed files if not exists
                 if "indexed_files" not in st.session_state:
@@ -226,13 +304,13 @@ with st.sidebar:
                     # 1. Process PDFs
                     if uploaded_files:
                         for uploaded_file in uploaded_files:
-                            # Save to temp file
-                            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
+                            # Save to temp file, keeping the upload's name (sanctions screening reads it as the owner)
+                            with tempfile.NamedTemporaryFile(delete=False, suffix=f"_{os.path.basename(uploaded_file.name)}") as tmp_file:
                                 tmp_file.write(uploaded_file.getvalue())
                                 tmp_path = tmp_file.name
                             
                             try:
-                                ingest_pdf(tmp_path)
+                                ingest_pdf(tmp_path, partition=partition)
                                 total_docs += 1
                                 st.session_state.indexed_files.add(uploaded_file.name)
                             except Exception as e:
@@ -245,7 +323,10 @@ with st.sidebar:
                     if url_input:
                         try:
                             st.write(f"🌐 Crawling: {url_input}...")
-                            ingest_url(url_input)
+                            if crawl_links:
+                                ingest_crawl(url_input, partition=partition)
+                            else:
+                                ingest_url(url_input, partition=partition)
                             total_docs += 1
                             st.session_state.indexed_files.add(url_input)
                         except Exception as e:
@@ -256,39 +337,18 @@ with st.sidebar:
                     else:
                         status.update(label="❌ Ingestion Failed", state="error", expanded=True)
 
+        if INGEST_MODE == "queue":
+            render_ingest_jobs()
+
     if st.button("🧹 Clear Chat", use_container_width=True):
         st.session_state.messages = []
+        st.session_state.history_pages = 1
         try:
             st.rerun()
         except AttributeError:
              # Fallback for older streamlit
              pass
 
-# --- AGENT SETUP ---
-def setup_agent_v3(openai_api_key):
-    # Pass key explicitly to avoid cache staleness
-    tools = [search_regulations_tool, calculate_risk_tool, check_sanctions_tool]
-    llm = ChatOpenAI(temperature=0, model="gpt-4-turbo", openai_api_key=openai_api_key)
-    
-    # Use the High-Level "initialize_agent" -> It handles everything automatically
-    return initialize_agent(
-        tools=tools,
-        llm=llm,
-        agent=AgentType.OPENAI_FUNCTIONS,
-        verbose=True,
-        max_iterations=5,
-        early_stopping_method="generate",
-        agent_kwargs={
-            "system_message": SystemMessage(content="""You are JurisLens, an AI compliance expert. 
-            
-            1. Use 'RegulationSearch' to find laws. Provide comprehensive, verbose explanations citing specific articles/sections. 
-            2. ALWAYS cite the source document name AND Page Number (if defined) or Section Number (from text) for every claim (e.g., '[Source: file.pdf (Page 5)]' or 'Section 1010.610').
-            3. Use 'RiskCalculator' for risk assessment and live ledger checks.
-            4. Use 'SanctionsChecker' to verify if individuals or entities are on blacklists or sanctioned watchlists.
-            """)
-        }
-    )
-
 # Helper to clean up response and add visual cues
 def enrich_response(text):
     if not text: return text
@@ -308,6 +368,42 @@ def enrich_response(text):
         
     return text
 
+# Older turns are paged in on demand, so a rerun renders at most this many
+HISTORY_PAGE_TURNS = int(os.getenv("JURISLENS_HISTORY_PAGE_TURNS", "10"))
+
+def assistant_message(content):
+    # Risk and sanctions tagging run once here; history reruns just render "display"
+    from sanctions_screening import answer_hits, describe
+    message = {"role": "assistant", "content": content, "display": enrich_response(content), "id": uuid.uuid4().hex}
+    hits = answer_hits(content)
+    if hits:
+        message["sanctions_hits"] = hits
+        message["display"] += f"\n\n🚨 *Sanctions screening: this answer mentions {describe(hits)}*"
+    return message
+
+@st.cache_resource
+def get_feedback_store():
+    # One batched, non-blocking writer per server process (feedback.py)
+    from feedback import FeedbackStore
+    return FeedbackStore()
+
+def record_rating(msg_key, rating):
+    get_feedback_store().record_feedback(str(msg_key), session_owner(), rating)
+    st.session_state.setdefault("ratings", {})[msg_key] = rating
+    st.toast("🙏 Thanks for the feedback!")
+
+def render_feedback(msg_key):
+    # Feedback Buttons (Right Aligned)
+    # We use a huge spacer to push them right
+    rated = st.session_state.get("ratings", {}).get(msg_key)
+    c_space, c_up, c_down = st.columns([0.85, 0.08, 0.07])
+    with c_up:
+        st.button("👍", key=f"up_{msg_key}", help="Helpful", disabled=rated == 1,
+                  on_click=record_rating, args=(msg_key, 1))
+    with c_down:
+        st.button("👎", key=f"down_{msg_key}", help="Not Helpful", disabled=rated == -1,
+                  on_click=record_rating, args=(msg_key, -1))
+
 # --- MAIN LAYOUT (2 COLUMNS) ---
 # Create a 2-column layout: [Chat Area (75%), Info Panel (25%)]
 chat_col, info_col = st.columns([0.75, 0.25], gap="large")
@@ -337,12 +433,20 @@ with chat_col:
 
     # Handle Input - Pinned to bottom by default
     if prompt := st.chat_input("Ask a compliance question..."):
-        # Add user message to state
-        st.session_state.messages.append({"role": "user", "content": prompt})
+        from sanctions_screening import describe, get_matcher
+
+        # Add user message to state, tagged with any listed names it mentions (one automaton pass)
+        user_message = {"role": "user", "content": prompt}
+        prompt_hits = get_matcher().entities_in(prompt)
+        if prompt_hits:
+            user_message["sanctions_hits"] = prompt_hits
+        st.session_state.messages.append(user_message)
         
         # We need to process immediately
         with st.chat_message("user", avatar="👤"):
             st.write(prompt)
+            if prompt_hits:
+                st.warning(f"🚨 Sanctions screening: this message mentions {describe(prompt_hits)}")
 
         with st.chat_message("assistant", avatar="images/logo.png"):
             # Cool visualization of the thought process
@@ -357,15 +461,26 @@ with chat_col:
                 time.sleep(0.01)
                 progress_bar.progress(i)
              
-            # Use our custom handler defined at top of file
+            from ui_callbacks import FriendlyCallbackHandler
+            from tracing import TRACER, TracingCallbackHandler
+            from context_packing import pack_history
+
             my_callback = FriendlyCallbackHandler(status_viz, progress_bar)
              
-            agent_executor = setup_agent_v3(api_key)
+            agent_executor = get_agent(api_key)
             response = None
                 
             if agent_executor:
                 try:
-                    response = agent_executor.run(prompt, callbacks=[my_callback])
+                    # Prior turns (excluding this prompt), squeezed into the history token budget
+                    chat_history = pack_history(st.session_state.messages[:-1])
+                    # Collect this run's spans for the feedback record (latency, tokens, tools, chunks)
+                    with TRACER.collect() as run_spans:
+                        response = agent_executor.run(
+                            input=prompt,
+                            chat_history=chat_history,
+                            callbacks=[my_callback, TracingCallbackHandler()]
+                        )
                     # Clear visuals on done
                     status_viz.empty()
                     progress_bar.empty()
@@ -376,14 +491,13 @@ with chat_col:
             
             # Show final answer
             if response:
-                final_text = enrich_response(response)
-                st.markdown(final_text)
-                st.session_state.messages.append({"role": "assistant", "content": response})
+                answer = assistant_message(response)
+                st.markdown(answer["display"])
+                st.session_state.messages.append(answer)
+                get_feedback_store().record_answer(answer["id"], session_owner(), prompt, spans=run_spans)
                 
                 # Feedback for current answer
-                col_spacer, col_up, col_down = st.columns([0.85, 0.08, 0.07])
-                with col_up: st.button("👍", key="curr_up", help="Helpful")
-                with col_down: st.button("👎", key="curr_down", help="Not Helpful")
+                render_feedback(answer["id"])
 
     st.markdown("### 💬 Conversation History")
     
@@ -395,8 +509,12 @@ with chat_col:
     all_messages = st.session_state.messages
     history_messages = all_messages[:-2] if prompt and len(all_messages) >= 2 else all_messages
     
-    # Reverse iterate for history
-    for i in range(len(history_messages) - 1, -1, -1):
+    # Walk back from the newest turn and stop after the visible page(s),
+    # so the cost of a rerun doesn't grow with the length of the session
+    visible_turns = HISTORY_PAGE_TURNS * st.session_state.get("history_pages", 1)
+    shown = 0
+    i = len(history_messages) - 1
+    while i >= 0 and shown < visible_turns:
         msg = history_messages[i]
         
         if msg["role"] == "user":
@@ -408,25 +526,28 @@ with chat_col:
                  ai_msg = history_messages[i+1]
             
             with st.container():
-                st.chat_message("user", avatar="👤").write(user_msg["content"])
+                with st.chat_message("user", avatar="👤"):
+                    st.write(user_msg["content"])
+                    if user_msg.get("sanctions_hits"):
+                        st.caption(f"🚨 Mentions sanctioned: {', '.join(user_msg['sanctions_hits'])}")
                 if ai_msg:
                     with st.chat_message("assistant", avatar="images/logo.png"):
-                        # Enrich and Display
-                        final_text = enrich_response(ai_msg["content"])
-                        st.markdown(final_text)
-                        
-                        # Feedback Buttons (Right Aligned)
-                        # We use a huge spacer to push them right
-                        c_space, c_up, c_down = st.columns([0.85, 0.08, 0.07])
-                        with c_up:
-                            st.button("👍", key=f"up_{i}", help="Helpful")
-                        with c_down:
-                            st.button("👎", key=f"down_{i}", help="Not Helpful")
+                        # "display" was risk-tagged when the answer arrived
+                        st.markdown(ai_msg.get("display") or enrich_response(ai_msg["content"]))
+                        render_feedback(ai_msg.get("id", i))
                             
                 st.markdown("---")
+            shown += 1
+        i -= 1
 
-    # Show initial greeting if it exists and wasn't part of the loop (e.g. index 0)
-    if history_messages and history_messages[0]["role"] == "assistant":
+    # Anything left besides the greeting at index 0 is an older turn
+    has_older = i > 0 or (i == 0 and history_messages[0]["role"] == "user")
+    if has_older and st.button("⬇️ Show older messages", use_container_width=True):
+        st.session_state.history_pages = st.session_state.get("history_pages", 1) + 1
+        st.rerun()
+
+    # Show initial greeting once the whole history is on screen
+    if not has_older and history_messages and history_messages[0]["role"] == "assistant":
          st.chat_message("assistant", avatar="images/logo.png").write(history_messages[0]["content"])
 
 # --- RIGHT INFO PANEL ---
@@ -448,6 +569,26 @@ with info_col:
     *   **Privacy:** Data stays in your private vectors.
     """)
     
+    # Per-stage latency for this process (fed by tracing.TRACER spans)
+    with st.expander("⏱️ Stage Latency", expanded=False):
+        # No need to import tracing (and LangChain) just to find that nothing was traced yet
+        tracing = sys.modules.get("tracing")
+        stage_stats = tracing.TRACER.stage_stats() if tracing else {}
+        if stage_stats:
+            st.table([
+                {"Stage": stage, "Calls": s["count"], "p50 (ms)": s["p50_ms"], "p95 (ms)": s["p95_ms"], "Tokens": s["tokens"]}
+                for stage, s in stage_stats.items()
+            ])
+        else:
+            st.caption("No traced calls yet.")
+        # Only once a risk check has started the ledger consumer (ledger_stream.py)
+        ledger_stream = sys.modules.get("ledger_stream")
+        consumer = ledger_stream.get_ledger_consumer() if ledger_stream else None
+        if consumer is not None:
+            ledger = consumer.metrics()
+            st.caption(f"📒 Ledger stream: {ledger['events']:,} events, newest {ledger['last_event_age_s']}s old, "
+                       f"lag p95 {ledger['lag_p95_ms']} ms, {ledger['behind_bytes']} bytes behind")
+
     # Display Indexed Files List Here
     if "indexed_files" in st.session_state and st.session_state.indexed_files:
         st.markdown("---")
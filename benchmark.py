@@ -0,0 +1,32 @@
+"""
+JurisLens benchmark: ingests a fixed corpus (+ optional synthetic scale-up),
+replays the golden question set through the regulation search tool and the
+full agent, and compares the numbers against a stored baseline.
+
+Runs fully offline against the stand-ins in local_backends.py. Each --mode
+lives in its own module under benchmarks/ (see benchmarks/__init__.py).
+
+    python benchmark.py                      # run + compare with benchmarks/baseline.json
+    python benchmark.py --scale 500          # add 500 synthetic regulation documents
+    python benchmark.py --save-baseline --portable
+                                             # record the machine-independent numbers as the new baseline
+    python benchmark.py --mode startup --baseline benchmarks/startup_baseline.json --save-baseline
+                                             # Streamlit cold start + rerun latency, import profile
+    python benchmark.py --mode vectors --scale 1000
+                                             # memory saved vs recall lost per vector compression
+    python benchmark.py --mode snapshot --scale 1000 --embed-latency 0.2
+                                             # cold start from a KB snapshot vs re-ingesting
+    python benchmark.py --mode ledger        # exposure lookups from the ledger change stream
+    python benchmark.py --mode sanctions --scale 1000
+                                             # screening every chunk against a 10k-name sanctions list
+    python benchmark.py --mode crawl --baseline benchmarks/crawl_baseline.json
+                                             # crawler against a local HTTP fixture site
+    python benchmark.py --mode routing --llm-latency 0.3
+                                             # tiered small/large model routing vs the large model for every step
+"""
+import sys
+
+from benchmarks.runner import main
+
+if __name__ == "__main__":
+    sys.exit(main())
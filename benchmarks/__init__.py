@@ -0,0 +1,13 @@
+"""
+Benchmark modes for benchmark.py, one module each, plus the shared corpus
+(common.py) and the CLI that runs them and compares with a baseline (runner.py).
+
+A mode module exposes:
+
+    MODES             {"--mode name": run(args) -> {"config": {...}, section: {metric: value}}}
+    CORPUS_STEPS      {"--mode name": step(golden, args) -> {section: {...}}}, run against the
+                      golden corpus ingested into the local backends (shared by --mode all)
+    LOWER_IS_BETTER / HIGHER_IS_BETTER   metric names compared against the baseline
+    PORTABLE_METRICS  metrics that don't depend on the machine (kept by --save-baseline --portable)
+    report(results)   optional extra report lines
+"""
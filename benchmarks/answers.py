@@ -0,0 +1,153 @@
+"""
+The full agent over the golden questions, and tiered model routing (model_routing.py)
+against the large model for every step.
+"""
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from benchmarks.common import latency_summary
+from local_backends import ScriptedChatModel
+from tracing import Tracer, TracingCallbackHandler
+
+LOWER_IS_BETTER = {"p50_ms", "p95_ms", "p99_ms", "tokens_per_answer", "large_tokens_per_answer", "unexpected_sanctions_hits"}
+HIGHER_IS_BETTER = {"qps", "recall_at_k", "tool_accuracy", "large_tokens_saved_pct"}
+PORTABLE_METRICS = {"recall_at_k", "tool_accuracy", "tokens_per_answer", "large_tokens_per_answer",
+                    "large_tokens_saved_pct", "escalations", "unexpected_sanctions_hits"}
+
+# Stand-in tiers for --mode routing: the planner answers this many times faster than the large model
+PLANNER_SPEEDUP = 5
+PLANNER_BAD_ARGS_EVERY = 5  # Every 5th planner tool call fails validation
+
+
+class _ToolRecorder(BaseCallbackHandler):
+    def __init__(self):
+        self.tools = []
+
+    def on_tool_start(self, serialized, input_str, **kwargs):
+        self.tools.append(serialized.get("name"))
+
+
+def bench_agent(golden, repeat=1, llm_latency=0.0, llm=None, callbacks=()):
+    from agent import setup_agent_v3
+    from sanctions_screening import answer_hits, get_matcher
+
+    tracer = Tracer(export_path=None)
+    agent_executor = setup_agent_v3("sk-local-benchmark", llm=llm or ScriptedChatModel(latency=llm_latency))
+    agent_executor.verbose = False
+
+    latencies, correct_tools, answers, found, expected, unexpected_hits = [], 0, 0, 0, 0, 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for q in golden:
+            recorder = _ToolRecorder()
+            t0 = time.perf_counter()
+            answer = agent_executor.run(q["question"], callbacks=[recorder, TracingCallbackHandler(tracer), *callbacks])
+            latencies.append((time.perf_counter() - t0) * 1000.0)
+            answers += 1
+            if q.get("expected_tool") in recorder.tools:
+                correct_tools += 1
+            expected += len(q.get("expected_citations", []))
+            found += sum(1 for c in q.get("expected_citations", []) if c in answer)
+            # Sanctions banners the app would show on this turn that the question doesn't call for
+            hits = set(get_matcher().entities_in(q["question"])) | set(answer_hits(answer))
+            unexpected_hits += len(hits - set(q.get("expected_sanctions_hits", [])))
+    wall = time.perf_counter() - start
+
+    llm_tokens = tracer.stage_stats().get("llm", {}).get("tokens", 0)
+    summary = latency_summary(latencies, wall)
+    summary["tool_accuracy"] = round(correct_tools / answers, 3) if answers else 0.0
+    summary["recall_at_k"] = round(found / expected, 3) if expected else 0.0
+    summary["tokens_per_answer"] = round(llm_tokens / answers, 1) if answers else 0.0
+    summary["unexpected_sanctions_hits"] = unexpected_hits
+    summary["stages"] = tracer.stage_stats()
+    return summary
+
+
+class _ModelRecorder(BaseCallbackHandler):
+    """
+    Tallies LLM calls and tokens per model, and tiered routing decisions (model_routing.py).
+    """
+
+    def __init__(self):
+        self.calls, self.tokens, self.routes = {}, {}, {}
+
+    def on_llm_end(self, response, **kwargs):
+        llm_output = response.llm_output or {}
+        routing = llm_output.get("routing")
+        if routing:
+            # The tier calls it made report their own on_llm_end
+            self.routes[routing["route"]] = self.routes.get(routing["route"], 0) + 1
+            return
+        model = llm_output.get("model_name")
+        self.calls[model] = self.calls.get(model, 0) + 1
+        self.tokens[model] = self.tokens.get(model, 0) + (llm_output.get("token_usage") or {}).get("total_tokens", 0)
+
+
+def bench_routing(golden, repeat=1, llm_latency=0.0):
+    """
+    Every agent step on the large model vs tiered routing (small planner picks the
+    tools and answers, large model takes over a rejected step).
+    Large-model calls/tokens per answer stand in for cost.
+    """
+    from model_routing import TieredChatModel
+
+    llm_latency = llm_latency or 0.3
+
+    def large():
+        return ScriptedChatModel(latency=llm_latency, model_name="scripted-large")
+
+    setups = [
+        ("single", large()),
+        ("tiered", TieredChatModel(
+            planner=ScriptedChatModel(latency=llm_latency / PLANNER_SPEEDUP, model_name="scripted-small",
+                                      bad_args_every=PLANNER_BAD_ARGS_EVERY),
+            synthesizer=large())),
+    ]
+    configs = []
+    for name, llm in setups:
+        models = _ModelRecorder()
+        summary = bench_agent(golden, repeat=repeat, llm=llm, callbacks=[models])
+        answers = summary["count"]
+        configs.append({
+            "name": name,
+            "p50_ms": summary["p50_ms"],
+            "p95_ms": summary["p95_ms"],
+            "tool_accuracy": summary["tool_accuracy"],
+            "recall_at_k": summary["recall_at_k"],
+            "large_calls_per_answer": round(models.calls.get("scripted-large", 0) / answers, 2),
+            "large_tokens_per_answer": round(models.tokens.get("scripted-large", 0) / answers, 1),
+            "small_calls_per_answer": round(models.calls.get("scripted-small", 0) / answers, 2),
+            "small_tokens_per_answer": round(models.tokens.get("scripted-small", 0) / answers, 1),
+            "routes": models.routes,
+        })
+    single, tiered = configs
+    return {
+        "llm_latency": llm_latency,
+        "p50_ms": tiered["p50_ms"],
+        "p95_ms": tiered["p95_ms"],
+        "tool_accuracy": tiered["tool_accuracy"],
+        "recall_at_k": tiered["recall_at_k"],
+        "large_tokens_per_answer": tiered["large_tokens_per_answer"],
+        "escalations": tiered["routes"].get("escalated", 0),
+        "latency_saved_pct": round(100.0 * (1 - tiered["p50_ms"] / single["p50_ms"]), 1) if single["p50_ms"] else 0.0,
+        "large_tokens_saved_pct": round(100.0 * (1 - tiered["large_tokens_per_answer"] / single["large_tokens_per_answer"]), 1)
+        if single["large_tokens_per_answer"] else 0.0,
+        "configs": configs,
+    }
+
+
+def report(results):
+    for stage, stats in results.get("agent", {}).get("stages", {}).items():
+        print(f"{'':>10}  {stage}: p50={stats['p50_ms']}ms p95={stats['p95_ms']}ms tokens={stats['tokens']}")
+    for c in results.get("routing", {}).get("configs", []):
+        print(f"{'':>10}  {c['name']:<8} p50 {c['p50_ms']}ms  large {c['large_calls_per_answer']} calls/"
+              f"{c['large_tokens_per_answer']} tok  small {c['small_calls_per_answer']} calls/{c['small_tokens_per_answer']} tok  "
+              f"tools {c['tool_accuracy']}  routes {c['routes']}")
+
+
+MODES = {}
+CORPUS_STEPS = {
+    "agent": lambda golden, args: {"agent": bench_agent(golden, repeat=args.agent_repeat, llm_latency=args.llm_latency)},
+    "routing": lambda golden, args: {"routing": bench_routing(golden, repeat=args.agent_repeat, llm_latency=args.llm_latency)},
+}
@@ -0,0 +1,91 @@
+"""
+Fixed benchmark corpus, golden question set and helpers shared by the benchmark modes.
+"""
+import os
+import json
+import random
+
+from langchain_core.documents import Document
+
+from tracing import percentile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+GOLDEN_FILE = os.path.join(BENCH_DIR, "golden_questions.json")
+BASELINE_FILE = os.path.join(BENCH_DIR, "baseline.json")
+
+# Same text as generate_pdf.py / generate_global_pdf.py, one Document per PDF page
+FIXED_CORPUS = [
+    ("goliath_bank_internal_policy.pdf", 0,
+     "GOLIATH BANK - CONFIDENTIAL INTERNAL POLICY (2025)\n"
+     "This document contains sensitive internal procedures for AML compliance.\n"
+     "Unauthorized distribution is prohibited.\n"
+     "Section 1: General Guidelines\n"
+     "All employees must report suspicious activity within 24 hours via Form X-99."),
+    ("goliath_bank_internal_policy.pdf", 1,
+     "Section 5: Project CHIMERA Protocol\n"
+     "Due to recent geopolitical events, all transactions involving accounts originating from the unrecognized "
+     "nation of 'Zylaria' are subject to Project CHIMERA scrutiny.\n"
+     "Rule 5.1: Wire Transfer limits for Zylaria are capped at $5,000 USD.\n"
+     "Rule 5.2: Any transfer exceeding $5,000 requires written approval from the Regional Compliance Director "
+     "(Level 4 Authorization).\n"
+     "Rule 5.3: The 'Blue Channel' reporting system must be used for these audits."),
+    ("global_regulation_standard.pdf", 0,
+     "GLOBAL FINANCIAL CRIME STANDARDS (2025 Edition)\n"
+     "This document outlines the mandatory minimum standards for all financial institutions operating within "
+     "the G20 nations.\n"
+     "Section 19: High-Risk Jurisdictions\n"
+     "Financial institutions must apply enhanced due diligence to business relationships and transactions with "
+     "natural and legal persons from countries for which this is called for by the FATF.\n"
+     "Standard 19.3: Unrecognized Territories (e.g., Zylaria, Atlantis)\n"
+     "Transactions involving unrecognized territories pose significant money laundering risks. To mitigate this:\n"
+     "1. Wire transfers must not exceed $10,000 USD per day without Enhanced Due Diligence (EDD).\n"
+     "2. Any transfer above this threshold requires filing a Suspicious Activity Report (SAR)."),
+]
+
+FILLER = (
+    "customer identification beneficial ownership correspondent banking record retention currency transaction "
+    "report monitoring threshold escalation audit trail onboarding verification politically exposed person "
+    "trade finance remittance custody settlement clearing liquidity capital adequacy disclosure governance "
+    "board oversight whistleblower training attestation exemption supervisory authority penalty remediation"
+).split()
+
+
+def build_corpus(scale=0, seed=7):
+    """
+    Fixed golden corpus plus `scale` synthetic multi-page regulations (seeded, reproducible).
+    """
+    docs = [Document(page_content=text, metadata={"source": source, "page": page}) for source, page, text in FIXED_CORPUS]
+    rng = random.Random(seed)
+    for n in range(scale):
+        source = f"synthetic_regulation_{n:04d}.pdf"
+        for page in range(3):
+            lines = [f"Section {100 + n}.{page + 1}: Synthetic Requirements"]
+            for rule in range(rng.randint(4, 9)):
+                words = " ".join(rng.choice(FILLER) for _ in range(rng.randint(12, 30)))
+                lines.append(f"Rule {100 + n}.{page + 1}.{rule + 1}: {words.capitalize()}.")
+            docs.append(Document(page_content="\n".join(lines), metadata={"source": source, "page": page}))
+    return docs
+
+
+def load_golden(path=GOLDEN_FILE):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def latency_summary(samples_ms, wall_seconds):
+    return {
+        "count": len(samples_ms),
+        "p50_ms": round(percentile(samples_ms, 50), 2),
+        "p95_ms": round(percentile(samples_ms, 95), 2),
+        "p99_ms": round(percentile(samples_ms, 99), 2),
+        "qps": round(len(samples_ms) / wall_seconds, 2) if wall_seconds else 0.0,
+    }
+
+
+def passages(tool_output, k):
+    """
+    Splits the search tool's formatted output back into its passages.
+    """
+    parts = [p for p in tool_output.split("[Source:") if p.strip()]
+    return parts[:k]
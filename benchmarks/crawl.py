@@ -0,0 +1,140 @@
+"""
+Crawl ingestion (crawler.py, ingest.crawl_and_index) against a local HTTP fixture
+site: throughput, scope rules, and conditional re-crawls per target index.
+"""
+import os
+import time
+import shutil
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from local_backends import use_local_backends
+
+LOWER_IS_BETTER = set()
+HIGHER_IS_BETTER = {"pages_per_sec"}
+PORTABLE_METRICS = {"pages", "chunks", "scope_respected", "recrawl_not_modified", "other_index_refetched",
+                    "failed_batch_refetched"}
+
+
+class FixtureSite:
+    """
+    An eCFR-like regulation on 127.0.0.1: an index page linking `pages` section pages
+    (each linking the next), plus links the default scope must skip. Answers
+    If-None-Match with 304 and records every path requested.
+    """
+
+    def __init__(self, pages=12, latency=0.02):
+        self.latency = latency
+        self.requested = []
+        self.pages = {"/regs/index.html": self._page(
+            "Part 1010 - General Provisions",
+            "".join(f'<li><a href="part-1010-{600 + n}.html">Section 1010.{600 + n}</a></li>' for n in range(pages))
+            + '<li><a href="/other/out.html">Elsewhere</a></li><li><a href="logo.png">Logo</a></li>')}
+        for n in range(pages):
+            link = f'<a href="part-1010-{601 + n}.html#top">Next</a>' if n + 1 < pages else ""
+            self.pages[f"/regs/part-1010-{600 + n}.html"] = self._page(
+                f"31 CFR 1010.{600 + n}",
+                f"<p>§ 1010.{600 + n} Due diligence programs, part {n}.</p>"
+                f"<p>(a) A covered financial institution shall maintain records of wire transfer {n} for five years.</p>{link}")
+        self.pages["/other/out.html"] = self._page("Out of scope", "<p>Not a regulation.</p>")
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                site.requested.append(self.path)
+                time.sleep(site.latency)
+                body = site.pages.get(self.path)
+                if body is None:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                etag = f'"{hash(body) & 0xffffffff:x}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.seed = f"http://127.0.0.1:{self.server.server_address[1]}/regs/index.html"
+
+    @staticmethod
+    def _page(title, body):
+        return f"<html><head><title>{title}</title></head><body><nav>Menu</nav><h1>{title}</h1><ul>{body}</ul></body></html>"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def bench_crawl(pages=12, latency=0.02):
+    """
+    Crawls the fixture into a tenant index through the ingest pipeline, re-crawls it
+    (every page should answer 304), crawls it into a second index (everything
+    should be fetched and indexed again) and fails a batch (its pages shouldn't be
+    remembered). Throughput is measured without the per-host politeness delay.
+    """
+    import crawler
+    from ingest import crawl_and_index
+    from local_backends import InMemoryElasticsearchStore
+
+    directory = tempfile.mkdtemp(prefix="jurislens_crawl_")
+    saved_cache = crawler.VALIDATOR_CACHE
+    crawler.VALIDATOR_CACHE = os.path.join(directory, "crawl_cache.json")
+    try:
+        with FixtureSite(pages=pages, latency=latency) as site, use_local_backends():
+            expected = pages + 1  # Index page + section pages
+            first = crawl_and_index(site.seed, "jurislens_docs_tenant_a")
+            scope_respected = not any(p.startswith("/other/") or p.endswith(".png") for p in site.requested)
+            requested = len(site.requested)
+            again = crawl_and_index(site.seed, "jurislens_docs_tenant_a")
+            recrawled = [p for p in site.requested[requested:] if p != "/robots.txt"]
+            recrawl_not_modified = not again and len(recrawled) == expected
+            other = crawl_and_index(site.seed, "jurislens_docs_tenant_b")
+            other_index_refetched = (len(other) == len(first)
+                                     and len(InMemoryElasticsearchStore.indices.get("jurislens_docs_tenant_b", [])) == len(first))
+
+            def failing_batch(documents):
+                raise ConnectionError("index unavailable")
+
+            try:
+                crawler.crawl_to_batches(site.seed, failing_batch, batch_pages=expected, validator_cache=crawler.VALIDATOR_CACHE,
+                                         cache_key="jurislens_docs_tenant_c", per_host_delay=0)
+            except ConnectionError:
+                pass
+            fetched = []
+            start = time.perf_counter()
+            stats = crawler.crawl_to_batches(site.seed, fetched.extend, validator_cache=crawler.VALIDATOR_CACHE,
+                                             cache_key="jurislens_docs_tenant_c", per_host_delay=0)
+            seconds = time.perf_counter() - start
+            failed_batch_refetched = stats["fetched"] == expected and stats["not_modified"] == 0
+    finally:
+        crawler.VALIDATOR_CACHE = saved_cache
+        shutil.rmtree(directory, ignore_errors=True)
+
+    return {
+        "pages": len(fetched), "chunks": len(first),
+        "seconds": round(seconds, 3), "pages_per_sec": round(len(fetched) / seconds, 1) if seconds else 0.0,
+        "scope_respected": scope_respected,
+        "recrawl_not_modified": recrawl_not_modified,
+        "other_index_refetched": other_index_refetched,
+        "failed_batch_refetched": failed_batch_refetched,
+    }
+
+
+MODES = {"crawl": lambda args: {"config": {"mode": args.mode}, "crawl": bench_crawl()}}
+CORPUS_STEPS = {}
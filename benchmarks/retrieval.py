@@ -0,0 +1,134 @@
+"""
+Ingestion, regulation search and exact citation lookup over the golden corpus.
+"""
+import os
+import time
+
+from benchmarks.common import latency_summary, passages
+from context_packing import count_tokens
+
+LOWER_IS_BETTER = {"p50_ms", "p95_ms", "p99_ms", "context_tokens_mean", "seconds", "sanctions_flagged"}
+HIGHER_IS_BETTER = {"qps", "recall_at_k", "top1", "chunks_per_sec"}
+PORTABLE_METRICS = {"documents", "chunks", "sanctions_flagged", "recall_at_k", "context_tokens_mean", "identifiers", "top1", "search_top1",
+                    "ranked_by_query", "ambiguous_falls_through"}
+
+
+def bench_ingest(docs):
+    from ingest import _split_and_index
+
+    start = time.perf_counter()
+    # The default tenant's index, i.e. the one search_regulations_tool reads
+    _split_and_index(docs)
+    seconds = time.perf_counter() - start
+
+    import streamlit as st
+    kb = st.session_state.get("kb_text", [])
+    chunks = len(kb)
+    # Chunks tagged by the ingest sanctions screen; the corpus names nobody listed
+    flagged = sum(1 for item in kb if item.get("sanctions_hits"))
+    return {"documents": len(docs), "chunks": chunks, "sanctions_flagged": flagged, "seconds": round(seconds, 3),
+            "chunks_per_sec": round(chunks / seconds, 1) if seconds else 0.0}
+
+
+def bench_retrieval(golden, repeat=3, k=3):
+    from tools.regulation_search import search_regulations_tool
+
+    questions = [q for q in golden if q.get("expected_citations")]
+    latencies, found, expected, context_tokens = [], 0, 0, []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for q in questions:
+            t0 = time.perf_counter()
+            output = search_regulations_tool.invoke({"query": q["question"]})
+            latencies.append((time.perf_counter() - t0) * 1000.0)
+
+            top_k = "\n".join(passages(output, k))
+            expected += len(q["expected_citations"])
+            found += sum(1 for c in q["expected_citations"] if c in top_k)
+            context_tokens.append(count_tokens(output))
+    wall = time.perf_counter() - start
+
+    summary = latency_summary(latencies, wall)
+    summary["recall_at_k"] = round(found / expected, 3) if expected else 0.0
+    summary["k"] = k
+    summary["context_tokens_mean"] = round(sum(context_tokens) / len(context_tokens), 1) if context_tokens else 0.0
+    return summary
+
+
+def bench_citations(golden, repeat=3):
+    """
+    Questions naming a section/rule id ("What does Rule 5.1 say?"): exact citation
+    lookup vs the same questions through embedding + kNN / keyword search.
+    top1 = the named id is in the first passage returned.
+    """
+    from citation_index import query_identifiers
+    from tools.regulation_search import search_regulations_tool
+
+    cited = sorted({c for q in golden for c in q.get("expected_citations", []) if query_identifiers(c) == [c]})
+    questions = [(c, f"What does {c} require?") for c in cited]
+    results = {}
+    saved = os.environ.get("JURISLENS_CITATION_LOOKUP")
+    try:
+        for name, setting in (("lookup", "on"), ("search", "off")):
+            os.environ["JURISLENS_CITATION_LOOKUP"] = setting
+            latencies, top1 = [], 0
+            start = time.perf_counter()
+            for _ in range(repeat):
+                for citation, question in questions:
+                    t0 = time.perf_counter()
+                    output = search_regulations_tool.invoke({"query": question})
+                    latencies.append((time.perf_counter() - t0) * 1000.0)
+                    top1 += citation in "\n".join(passages(output, 1))
+            results[name] = {**latency_summary(latencies, time.perf_counter() - start),
+                             "top1": round(top1 / len(latencies), 3) if latencies else 0.0}
+    finally:
+        if saved is None:
+            os.environ.pop("JURISLENS_CITATION_LOOKUP", None)
+        else:
+            os.environ["JURISLENS_CITATION_LOOKUP"] = saved
+
+    lookup, search = results["lookup"], results["search"]
+    return {"identifiers": len(questions), "p50_ms": lookup["p50_ms"], "p95_ms": lookup["p95_ms"], "top1": lookup["top1"],
+            "search_p50_ms": search["p50_ms"], "search_top1": search["top1"], **_shared_numbering_checks()}
+
+
+def _shared_numbering_checks():
+    """
+    Two policies that both number a "Section 3" with six rules, every rule its own
+    chunk. A question naming the section and a policy should get that policy's
+    best-matching rule first, even past the first SEARCH_CANDIDATES in ingest order;
+    one naming only the section should skip the lookup and go to the normal search.
+    """
+    import streamlit as st
+    from langchain_core.documents import Document
+    from ingest import split_documents, to_kb_entries
+    from tools.regulation_search import search_regulations_tool
+
+    topics = ["record retention", "staff training", "audit trail", "escalation paths", "board oversight",
+              "beneficial ownership"]
+    docs = []
+    for source in ("aml_policy.pdf", "travel_expense_policy.pdf"):
+        rules = [f"Rule 3.{n + 1}: " + " ".join([f"Requirements on {topic}."] * 40) for n, topic in enumerate(topics)]
+        docs.append(Document(page_content="Section 3: Controls\n" + "\n".join(rules), metadata={"source": source, "page": 0}))
+
+    saved = dict(st.session_state)
+    try:
+        st.session_state.clear()
+        st.session_state["kb_text"] = to_kb_entries(split_documents(docs))
+        ranked = search_regulations_tool.invoke({"query": "What does Section 3 of the AML policy say about beneficial ownership?"})
+        first = "\n".join(passages(ranked, 1))
+        ambiguous = search_regulations_tool.invoke({"query": "What does Section 3 say?"})
+    finally:
+        st.session_state.clear()
+        st.session_state.update(saved)
+    return {"ranked_by_query": "Exact Citation Match" in first and "aml_policy.pdf" in first and "Rule 3.6" in first,
+            "ambiguous_falls_through": "Exact Citation Match" not in ambiguous}
+
+
+def retrieval_step(golden, args):
+    return {"retrieval": bench_retrieval(golden, repeat=args.repeat),
+            "citations": bench_citations(golden, repeat=args.repeat)}
+
+
+MODES = {}
+CORPUS_STEPS = {"retrieval": retrieval_step}
@@ -0,0 +1,189 @@
+"""
+CLI behind benchmark.py: runs a --mode from the modules in MODULES, prints the
+report and compares it against a stored baseline.
+"""
+import os
+import json
+import argparse
+import importlib
+import tracemalloc
+
+from benchmarks.common import BASELINE_FILE, build_corpus, load_golden
+from local_backends import use_local_backends
+from tracing import TRACER
+
+MODULES = ("retrieval", "answers", "startup", "vectors", "snapshot", "ledger", "sanctions", "crawl")
+# --mode all: the corpus steps run on every change
+ALL_STEPS = ("retrieval", "agent")
+# Accuracy metrics are compared with an absolute tolerance rather than a relative one
+ACCURACY_METRICS = {"recall_at_k", "tool_accuracy"}
+
+
+def load_modules():
+    return [importlib.import_module(f"benchmarks.{name}") for name in MODULES]
+
+
+def _collect(modules, attribute):
+    collected = {}
+    for module in modules:
+        collected.update(getattr(module, attribute))
+    return collected
+
+
+def _metrics(modules, attribute):
+    return set().union(*(getattr(module, attribute) for module in modules))
+
+
+def run_corpus(args, steps, modules):
+    """
+    Ingests the benchmark corpus into the local backends, then runs each corpus step against it.
+    """
+    from benchmarks.retrieval import bench_ingest
+
+    available = _collect(modules, "CORPUS_STEPS")
+    golden = load_golden()
+    results = {"config": {"chunker": os.getenv("JURISLENS_CHUNKER", "structure"), "scale": args.scale, "repeat": args.repeat,
+                          "agent_repeat": args.agent_repeat, "mode": args.mode, "embed_latency": args.embed_latency,
+                          "search_latency": args.search_latency, "llm_latency": args.llm_latency}}
+
+    # Don't let trace file writes leak into the timings
+    export_path, TRACER.export_path = TRACER.export_path, None
+    tracemalloc.start()
+    try:
+        with use_local_backends(embed_latency=args.embed_latency, search_latency=args.search_latency):
+            results["ingest"] = bench_ingest(build_corpus(args.scale))
+            for step in steps:
+                results.update(available[step](golden, args))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        TRACER.export_path = export_path
+
+    results["memory"] = {"peak_mb": round(peak / (1024 * 1024), 2)}
+    try:
+        import resource
+        results["memory"]["max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    except ImportError:
+        pass
+    return results
+
+
+def run_benchmark(args, modules=None):
+    modules = modules or load_modules()
+    modes = _collect(modules, "MODES")
+    if args.mode in modes:
+        return modes[args.mode](args)
+    return run_corpus(args, ALL_STEPS if args.mode == "all" else [args.mode], modules)
+
+
+def compare(results, baseline, lower_is_better, higher_is_better, tolerance=0.15, accuracy_tolerance=0.02):
+    """
+    Returns a list of (section.metric, baseline, current) that regressed beyond tolerance.
+    Boolean checks regress when they stop holding.
+    """
+    regressions = []
+    for section, metrics in baseline.items():
+        if section == "config" or not isinstance(metrics, dict) or section not in results:
+            continue
+        for metric, old in metrics.items():
+            new = results[section].get(metric)
+            if isinstance(old, bool):
+                worse = old and new is False
+            elif not isinstance(old, (int, float)) or not isinstance(new, (int, float)):
+                continue
+            elif metric in ACCURACY_METRICS:
+                worse = new < old - accuracy_tolerance
+            elif metric in lower_is_better:
+                worse = new > old * (1 + tolerance) and new - old > 1e-3
+            elif metric in higher_is_better:
+                worse = new < old * (1 - tolerance)
+            else:
+                continue
+            if worse:
+                regressions.append((f"{section}.{metric}", old, new))
+    return regressions
+
+
+def portable(results, portable_metrics):
+    """
+    Only the metrics that don't depend on the machine (accuracy, token and chunk
+    counts, hit rates), so the baseline can be committed and compared anywhere.
+    """
+    kept = {"config": results["config"]}
+    for section, metrics in results.items():
+        if section != "config" and isinstance(metrics, dict):
+            values = {k: v for k, v in metrics.items() if k in portable_metrics}
+            if values:
+                kept[section] = values
+    return kept
+
+
+def print_report(results, modules):
+    print("\n📊 JurisLens Benchmark")
+    print("-----------------------------------")
+    for section, metrics in results.items():
+        if section == "config" or not isinstance(metrics, dict):
+            continue
+        metrics = {k: v for k, v in metrics.items() if k not in ("stages", "imports", "configs")}
+        print(f"{section:>10}: " + ", ".join(f"{k}={v}" for k, v in metrics.items()))
+    for module in modules:
+        if hasattr(module, "report"):
+            module.report(results)
+
+
+def main(argv=None):
+    modules = load_modules()
+    modes = ["all", *_collect(modules, "CORPUS_STEPS"), *_collect(modules, "MODES")]
+
+    parser = argparse.ArgumentParser(description="Offline retrieval + agent benchmark for JurisLens.")
+    parser.add_argument("--mode", choices=modes, default="all")
+    parser.add_argument("--scale", type=int, default=0, help="Synthetic documents to add to the fixed corpus.")
+    parser.add_argument("--repeat", type=int, default=3, help="Retrieval passes over the golden set (cold starts in startup mode).")
+    parser.add_argument("--agent-repeat", type=int, default=1, help="Agent passes over the golden set.")
+    parser.add_argument("--embed-latency", type=float, default=0.0, help="Simulated embedding latency (s).")
+    parser.add_argument("--search-latency", type=float, default=0.0, help="Simulated ES kNN latency (s).")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Simulated LLM latency per call (s).")
+    parser.add_argument("--chunker", choices=["structure", "recursive"], help="Override JURISLENS_CHUNKER for this run.")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--portable", action="store_true",
+                        help="With --save-baseline: keep only machine-independent metrics (what benchmarks/baseline.json holds).")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative slowdown before flagging.")
+    parser.add_argument("--output", help="Also write the full results as JSON to this path.")
+    args = parser.parse_args(argv)
+    if args.chunker:
+        os.environ["JURISLENS_CHUNKER"] = args.chunker
+
+    results = run_benchmark(args, modules)
+    print_report(results, modules)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        saved = portable(results, _metrics(modules, "PORTABLE_METRICS")) if args.portable else results
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(saved, f, indent=2)
+            f.write("\n")
+        print(f"\n💾 Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nℹ️ No baseline at {args.baseline}. Run with --save-baseline to record one.")
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("config") != results["config"]:
+        print("\n⚠️ Baseline was recorded with a different configuration; comparison may be misleading.")
+
+    regressions = compare(results, baseline, _metrics(modules, "LOWER_IS_BETTER"), _metrics(modules, "HIGHER_IS_BETTER"),
+                          tolerance=args.tolerance)
+    if regressions:
+        print("\n❌ REGRESSIONS vs baseline:")
+        for name, old, new in regressions:
+            print(f"   {name}: {old} -> {new}")
+        return 1
+    print("\n✅ No regressions vs baseline.")
+    return 0
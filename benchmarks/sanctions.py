@@ -0,0 +1,69 @@
+"""
+Screening every chunk against a large sanctions list (sanctions_screening.py).
+"""
+import time
+import random
+
+from benchmarks.common import build_corpus
+
+LOWER_IS_BETTER = {"scan_seconds"}
+HIGHER_IS_BETTER = {"mb_per_sec"}
+PORTABLE_METRICS = {"names", "chunks", "chunks_flagged", "planted"}
+
+
+def bench_sanctions(scale=300, names=10000, planted=50, seed=11):
+    """
+    Screening every chunk against a `names`-entry sanctions list: one Aho-Corasick
+    pass per chunk vs checking each listed name against each chunk.
+    """
+    from sanctions_screening import SANCTIONS_LIST, SanctionsMatcher, normalise_name
+
+    rng = random.Random(seed)
+    syllables = ["al", "an", "ber", "dra", "go", "iv", "kov", "lin", "mar", "os", "ra", "sul", "tan", "vik", "zar"]
+
+    def word():
+        return "".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))).capitalize()
+
+    entities = dict(SANCTIONS_LIST)
+    while len(entities) < names:
+        entities[f"{word()} {word()}".upper()] = {"list": "Synthetic", "id": f"S-{len(entities)}", "reason": "", "aliases": []}
+    start = time.perf_counter()
+    matcher = SanctionsMatcher(entities)
+    build_seconds = time.perf_counter() - start
+
+    texts = [d.page_content for d in build_corpus(scale)]
+    listed = list(entities)
+    for _ in range(planted):
+        i = rng.randrange(len(texts))
+        texts[i] += f"\nBeneficiary: {rng.choice(listed).title()}."
+    megabytes = sum(len(t) for t in texts) / (1024 * 1024)
+
+    start = time.perf_counter()
+    found = sum(1 for t in texts if matcher.entities_in(t))
+    scan_seconds = time.perf_counter() - start
+
+    # Name by name, on a sample of chunks (the full cross product takes minutes)
+    sample = texts[:max(1, len(texts) // 20)]
+    padded = [f" {normalise_name(t)} " for t in sample]
+    patterns = [f" {normalise_name(name)} " for name in listed]
+    start = time.perf_counter()
+    for text in padded:
+        any(pattern in text for pattern in patterns)
+    naive_seconds = (time.perf_counter() - start) * len(texts) / len(sample)
+
+    return {
+        "names": len(entities), "chunks": len(texts), "megabytes": round(megabytes, 2),
+        "build_seconds": round(build_seconds, 3), "scan_seconds": round(scan_seconds, 3),
+        "mb_per_sec": round(megabytes / scan_seconds, 1) if scan_seconds else 0.0,
+        "chunks_flagged": found, "planted": planted,
+        "name_by_name_seconds": round(naive_seconds, 2),
+    }
+
+
+def run(args):
+    scale = args.scale or 300
+    return {"config": {"mode": args.mode, "scale": scale}, "sanctions": bench_sanctions(scale=scale)}
+
+
+MODES = {"sanctions": run}
+CORPUS_STEPS = {}
@@ -0,0 +1,103 @@
+"""
+Cold start from a knowledge base snapshot (kb_snapshot.py) vs re-ingesting.
+"""
+import os
+import time
+
+from benchmarks.common import build_corpus, load_golden
+from local_backends import use_local_backends
+from tracing import percentile
+
+LOWER_IS_BETTER = {"load_seconds", "reindex_embed_calls", "keyword_p50_ms"}
+HIGHER_IS_BETTER = set()
+PORTABLE_METRICS = {"chunks", "vectors", "terms", "ingest_embed_calls", "reindex_embed_calls", "keyword_results_match"}
+
+
+def _scan_hits(kb, terms):
+    # What the local keyword search did before the inverted index: test every chunk
+    hits = {}
+    for row, item in enumerate(kb):
+        content = item["content"].lower()
+        count = sum(1 for term in terms if term in content)
+        if count:
+            hits[row] = count
+    return hits
+
+
+def bench_snapshot(scale=300, repeat=3, embed_latency=0.0):
+    """
+    Cold start from a knowledge base snapshot vs ingesting from scratch: snapshot
+    size, load time, embedding calls to rebuild a fresh index from it, and local
+    keyword search through the snapshot's inverted index vs a scan of every chunk.
+    """
+    import shutil
+    import tempfile
+    import streamlit as st
+    import kb_snapshot
+    from ingest import _split_and_index
+    from local_backends import InMemoryElasticsearchStore, LocalSessionState
+
+    directory = tempfile.mkdtemp(prefix="jurislens_snapshot_")
+    saved_cache = kb_snapshot.EMBEDDING_CACHE
+    try:
+        with use_local_backends(embed_latency=embed_latency) as embeddings:
+            os.environ["JURISLENS_SNAPSHOT_DIR"] = directory
+            kb_snapshot.EMBEDDING_CACHE = kb_snapshot.EmbeddingCache()
+            start = time.perf_counter()
+            _split_and_index(build_corpus(scale))  # Exports the snapshot when done
+            ingest_seconds = time.perf_counter() - start
+            ingest_calls = embeddings.calls
+
+            # A new server process: empty caches, empty session, empty cluster
+            kb_snapshot.EMBEDDING_CACHE = kb_snapshot.EmbeddingCache()
+            st.session_state = LocalSessionState()
+            InMemoryElasticsearchStore.reset()
+            start = time.perf_counter()
+            snapshot = kb_snapshot.load_snapshot()
+            kb_snapshot.EMBEDDING_CACHE.seed(snapshot)
+            snapshot.seed_session(st.session_state)
+            load_seconds = time.perf_counter() - start
+
+            calls = embeddings.calls
+            start = time.perf_counter()
+            kb_snapshot.reindex(snapshot)
+            reindex_seconds = time.perf_counter() - start
+            reindex_calls = embeddings.calls - calls
+
+            kb = st.session_state.kb_text
+            queries = [[t for t in q["question"].lower().split() if len(t) > 3] for q in load_golden()]
+            indexed, scanned, same = [], [], True
+            for _ in range(repeat):
+                for terms in queries:
+                    t0 = time.perf_counter()
+                    hits = kb_snapshot.session_keyword_index(st.session_state).hits(terms)
+                    indexed.append((time.perf_counter() - t0) * 1000.0)
+                    t0 = time.perf_counter()
+                    expected = _scan_hits(kb, terms)
+                    scanned.append((time.perf_counter() - t0) * 1000.0)
+                    same = same and hits == expected
+    finally:
+        kb_snapshot.EMBEDDING_CACHE = saved_cache
+        shutil.rmtree(directory, ignore_errors=True)
+
+    manifest = snapshot.manifest
+    return {
+        "chunks": manifest["chunks"], "vectors": manifest["vectors"], "vector_codec": manifest["vector_codec"],
+        "terms": manifest["terms"],
+        "snapshot_mb": round(sum(manifest["files"].values()) / 1024 ** 2, 2),
+        "ingest_seconds": round(ingest_seconds, 3), "ingest_embed_calls": ingest_calls,
+        "load_seconds": round(load_seconds, 3),
+        "reindex_seconds": round(reindex_seconds, 3), "reindex_embed_calls": reindex_calls,
+        "keyword_p50_ms": round(percentile(indexed, 50), 3), "scan_p50_ms": round(percentile(scanned, 50), 3),
+        "keyword_results_match": same,
+    }
+
+
+def run(args):
+    scale = args.scale or 300
+    return {"config": {"mode": args.mode, "scale": scale, "embed_latency": args.embed_latency},
+            "snapshot": bench_snapshot(scale=scale, repeat=args.repeat, embed_latency=args.embed_latency)}
+
+
+MODES = {"snapshot": run}
+CORPUS_STEPS = {}
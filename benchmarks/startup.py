@@ -0,0 +1,100 @@
+"""
+Streamlit cold start and rerun latency of app.py, each cold start in a new process.
+"""
+import os
+import sys
+import json
+import subprocess
+import statistics
+
+from benchmarks.common import ROOT_DIR
+from tracing import percentile
+
+LOWER_IS_BETTER = {"first_run_ms", "rerun_p50_ms", "agent_ready_ms"}
+HIGHER_IS_BETTER = set()
+PORTABLE_METRICS = set()
+
+# Runs app.py headless in a fresh interpreter: one cold script run, then reruns
+# (what every widget click costs). Prints one JSON line.
+_STARTUP_PROBE = r"""
+import sys, json, time, threading
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t1 = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+at.run()
+t2 = time.perf_counter()
+for thread in threading.enumerate():
+    if thread.name == "jurislens-prewarm":
+        thread.join()
+t3 = time.perf_counter()
+reruns = []
+for _ in range(int(sys.argv[2])):
+    start = time.perf_counter()
+    at.run()
+    reruns.append((time.perf_counter() - start) * 1000)
+print(json.dumps({"streamlit_ms": (t1 - t0) * 1000, "first_run_ms": (t2 - t1) * 1000, "agent_ready_ms": (t3 - t1) * 1000,
+                  "reruns_ms": reruns, "errors": [e.message for e in at.exception]}))
+"""
+
+
+def _import_profile(stderr, top=8):
+    """
+    Top-level entries of `python -X importtime` output, slowest cumulative first.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith(" ") or name.startswith("  "):
+            continue  # Nested import; its cost is already in its parent's cumulative time
+        rows.append({"module": name.strip(), "ms": round(int(cumulative) / 1000, 1)})
+    return sorted(rows, key=lambda r: r["ms"], reverse=True)[:top]
+
+
+def bench_startup(repeat=3, reruns=10, app_path="app.py"):
+    """
+    Cold-start and rerun latency of the Streamlit app, each cold start in a new process.
+    """
+    env = dict(os.environ)
+    key = env.get("OPENAI_API_KEY", "")
+    if not (key.startswith("sk-") and len(key) > 20):
+        env["OPENAI_API_KEY"] = "sk-benchmark-" + "0" * 24  # Passes the app's key check; never sent anywhere
+    env["JURISLENS_INGEST_MODE"] = "inline"  # No job database or worker processes
+
+    runs, profile = [], []
+    for n in range(repeat):
+        flags = ["-X", "importtime"] if n == 0 else []
+        proc = subprocess.run([sys.executable, *flags, "-c", _STARTUP_PROBE, app_path, str(reruns)],
+                              cwd=ROOT_DIR, env=env, capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"Startup probe failed:\n{proc.stderr[-2000:]}")
+        run = json.loads(proc.stdout.strip().splitlines()[-1])
+        if run["errors"]:
+            raise RuntimeError(f"app.py raised during startup: {run['errors']}")
+        if n == 0:
+            profile = _import_profile(proc.stderr)  # importtime inflates timings, so this run isn't scored
+            if repeat > 1:
+                continue
+        runs.append(run)
+
+    rerun_ms = [ms for run in runs for ms in run["reruns_ms"]]
+    return {
+        "first_run_ms": round(statistics.median(r["first_run_ms"] for r in runs), 1),
+        "agent_ready_ms": round(statistics.median(r["agent_ready_ms"] for r in runs), 1),
+        "rerun_p50_ms": round(percentile(rerun_ms, 50), 1),
+        "rerun_p95_ms": round(percentile(rerun_ms, 95), 1),
+        "cold_starts": len(runs),
+        "imports": profile,
+    }
+
+
+def report(results):
+    for row in results.get("startup", {}).get("imports", []):
+        print(f"{'':>10}  import {row['module']}: {row['ms']}ms")
+
+
+MODES = {"startup": lambda args: {"config": {"mode": args.mode, "repeat": args.repeat},
+                                  "startup": bench_startup(repeat=args.repeat)}}
+CORPUS_STEPS = {}
@@ -0,0 +1,115 @@
+"""
+Memory saved vs recall lost for each vector compression option (vector_compression.py).
+"""
+import os
+import time
+import random
+
+from benchmarks.common import build_corpus, load_golden
+from tracing import percentile
+
+LOWER_IS_BETTER = {"bytes_per_vector"}
+HIGHER_IS_BETTER = {"recall_at_k"}
+PORTABLE_METRICS = {"vectors", "bytes_per_vector", "memory_saved_pct", "recall_at_k"}
+
+# Compression settings compared by --mode vectors: (name, compression, reduce_dims fraction, rescore oversample)
+VECTOR_CONFIGS = [
+    ("float32", "none", None, 0),
+    ("int8", "int8", None, 0),
+    ("int8+rescore", "int8", None, 2),
+    ("int4", "int4", None, 0),
+    ("int4+rescore", "int4", None, 3),
+    ("bbq", "bbq", None, 0),
+    ("bbq+rescore", "bbq", None, 4),
+    ("pq", "pq", None, 0),
+    ("pq+rescore", "pq", None, 4),
+    ("pca/2+int8", "int8", 0.5, 0),
+    ("pca/2+int8+rescore", "int8", 0.5, 3),
+]
+# Projection in the report: OpenAI ada-002 / text-embedding-3-small size, one million chunks
+PROJECTED_DIMS = 1536
+PROJECTED_VECTORS = 1_000_000
+
+
+def bench_vectors(scale=300, k=10, dims=256, queries=100, seed=11):
+    """
+    Recall@k of each compressed VectorIndex against exact float32 search over the
+    corpus chunks, with the RAM each layout needs. Rescoring configs keep their float
+    vectors memory-mapped on disk (as ES does), so they cost page cache, not heap.
+    """
+    import shutil
+    import tempfile
+    from ingest import split_documents
+    from local_backends import HashingEmbeddings
+    from vector_compression import COMPRESSION, RESCORE_OVERSAMPLE, VectorIndex
+
+    chunks = [d.page_content for d in split_documents(build_corpus(scale))]
+    embeddings = HashingEmbeddings(dims=dims)
+    vectors = embeddings.embed_documents(chunks)
+    rng = random.Random(seed)
+    # Golden questions plus first lines of random chunks, so queries hit the synthetic part too
+    texts = [q["question"] for q in load_golden()]
+    texts += [rng.choice(chunks).split("\n")[-1][:160] for _ in range(max(0, queries - len(texts)))]
+    query_vectors = embeddings.embed_documents(texts)
+
+    exact = VectorIndex("none", rescore=0)
+    exact.add(vectors)
+    truth = [{row for row, _ in exact.search(q, k)} for q in query_vectors]
+    float_bytes = len(vectors) * dims * 4
+
+    configs = []
+    scratch = tempfile.mkdtemp(prefix="jurislens_vectors_")
+    for name, compression, reduce, rescore in VECTOR_CONFIGS:
+        full_path = os.path.join(scratch, f"{name.replace('/', '_')}.npy") if rescore else None
+        index = VectorIndex(compression, reduce_dims=int(dims * reduce) if reduce else None, rescore=rescore, full_path=full_path)
+        index.add(vectors)
+        start = time.perf_counter()
+        index.build()
+        build_seconds = time.perf_counter() - start
+
+        latencies, found = [], 0
+        for q, expected in zip(query_vectors, truth):
+            t0 = time.perf_counter()
+            hits = index.search(q, k)
+            latencies.append((time.perf_counter() - t0) * 1000.0)
+            found += len({row for row, _ in hits} & expected)
+
+        memory = index.memory_bytes()
+        per_vector = (memory["codes"] + memory["full"]) / len(vectors)
+        configs.append({
+            "name": name,
+            "compression": compression,
+            "rescore": rescore,
+            "bytes_per_vector": round(per_vector, 1),
+            "memory_saved_pct": round(100.0 * (1 - (memory["codes"] + memory["full"]) / float_bytes), 1),
+            "projected_gb": round(per_vector * (PROJECTED_DIMS / dims) * PROJECTED_VECTORS / 1024 ** 3, 2),
+            "recall_at_k": round(found / (k * len(query_vectors)), 3),
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "build_seconds": round(build_seconds, 2),
+        })
+    shutil.rmtree(scratch, ignore_errors=True)
+
+    # Headline numbers (compared against the baseline) for the configured compression
+    configured = next((c for c in configs if c["compression"] == COMPRESSION and c["rescore"] == RESCORE_OVERSAMPLE),
+                      configs[0])
+    return {
+        "vectors": len(vectors), "dims": dims, "k": k, "queries": len(query_vectors),
+        "configured": configured["name"],
+        **{m: configured[m] for m in ("bytes_per_vector", "memory_saved_pct", "recall_at_k", "p50_ms")},
+        "configs": configs,
+    }
+
+
+def run(args):
+    scale = args.scale or 300  # A handful of fixed-corpus chunks says nothing about recall
+    return {"config": {"mode": args.mode, "scale": scale}, "vectors": bench_vectors(scale=scale)}
+
+
+def report(results):
+    for c in results.get("vectors", {}).get("configs", []):
+        print(f"{'':>10}  {c['name']:<20} {c['bytes_per_vector']:>8} B/vec  saved {c['memory_saved_pct']:>6}%  "
+              f"recall@k {c['recall_at_k']:.3f}  p50 {c['p50_ms']}ms  ({c['projected_gb']} GB @ 1M x {PROJECTED_DIMS}d)")
+
+
+MODES = {"vectors": run}
+CORPUS_STEPS = {}
@@ -0,0 +1,156 @@
+"""
+Exact citation lookup: section / rule / page identifier -> the chunks that carry it.
+
+Identifiers are extracted once per chunk at ingest (ingest.split_documents stores
+them as metadata["citations"]), so a query such as "What does Rule 5.1 say?"
+resolves with a dict lookup instead of an embedding call and a kNN search.
+"""
+import os
+import re
+
+from chunker import HEADING_RE, normalise_section_id
+
+# Identifiers anywhere in free text (queries), not only at line starts like chunker.HEADING_RE
+IDENTIFIER_RE = re.compile(
+    r"(?<![\w.])(?P<label>§+|(?i:section|sec\.|rule|standard|article|part|chapter|subpart))[ \t]*"
+    r"(?P<number>[0-9]+[A-Za-z]?(?:\.[0-9A-Za-z]+)*)(?![\w])"
+)
+PAGE_RE = re.compile(r"(?<![\w.])(?i:page|p\.)[ \t]*(?P<number>[0-9]+)\b")
+# kb_text sources carry the page as "file.pdf (Page 5)" (ingest.to_kb_entries)
+_SOURCE_PAGE_RE = re.compile(r"\(Page (?P<number>[0-9]+)\)$")
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def lookup_enabled():
+    return os.getenv("JURISLENS_CITATION_LOOKUP", "on").lower() not in ("0", "off", "false", "no")
+
+
+def page_id(number):
+    return f"Page {int(number)}"
+
+
+def chunk_citations(text, section_ids=(), section=None, page=None):
+    """
+    Identifiers a chunk answers for: its headings (from the chunker, or found in
+    the text for the recursive splitter), its enclosing section and its page (1-based).
+    """
+    citations = list(section_ids or [])
+    if not citations:
+        citations = [normalise_section_id(m.group("label"), m.group("number")) for m in HEADING_RE.finditer("\n" + text)]
+    if section:
+        citations.append(section)
+    if page is not None:
+        citations.append(page_id(page))
+    return list(dict.fromkeys(citations))
+
+
+def entry_citations(entry):
+    """
+    Citations of a kb_text entry: stored at ingest, derived for entries from older snapshots.
+    """
+    if "citations" in entry:
+        return entry["citations"]
+    page = _SOURCE_PAGE_RE.search(entry.get("source", ""))
+    return chunk_citations(entry["content"], entry.get("section_ids"), page=page.group("number") if page else None)
+
+
+def query_identifiers(query):
+    """
+    Section/rule identifiers and page references in a question, normalised like the chunk citations.
+    """
+    identifiers = [normalise_section_id(m.group("label"), m.group("number")) for m in IDENTIFIER_RE.finditer(query)]
+    identifiers += [page_id(m.group("number")) for m in PAGE_RE.finditer(query)]
+    return list(dict.fromkeys(identifiers))
+
+
+def document_of(entry):
+    # "file.pdf (Page 5)" -> "file.pdf"
+    return _SOURCE_PAGE_RE.sub("", entry.get("source", "")).strip()
+
+
+def _words(text):
+    return {word for word in _WORD_RE.findall(text.lower()) if len(word) > 2}
+
+
+def rank_cited(entries, query, identifiers):
+    """
+    Orders the kb_text entries cited by `identifiers` for `query`: by words shared
+    with the query, then chunks headed by the identifier before those that only sit
+    under it (an enclosing section), then in ingest order. When the query names one
+    of their documents ("the AML policy" -> aml_policy.pdf), only its chunks are kept.
+    Returns [] if they still span several documents, so the caller runs the normal
+    search instead of guessing which document was meant.
+    """
+    # "Section", "Rule", "5.1" etc. say nothing about the topic
+    terms = _words(PAGE_RE.sub(" ", IDENTIFIER_RE.sub(" ", query)))
+    named = {}
+    for entry in entries:
+        document = document_of(entry)
+        if document not in named:
+            named[document] = len(terms & _words(document))
+    best = max(named.values(), default=0)
+    if best:
+        entries = [entry for entry in entries if named[document_of(entry)] == best]
+    if len({document_of(entry) for entry in entries}) > 1:
+        return []
+
+    wanted = {_key(identifier) for identifier in identifiers}
+
+    def rank(item):
+        position, entry = item
+        # The recursive splitter stores no parent section, so its citations are all its own
+        own = {_key(i) for i in entry.get("section_ids") or entry_citations(entry)}
+        return (-len(terms & _words(entry["content"])), not own & wanted, position)
+
+    return [entry for _, entry in sorted(enumerate(entries), key=rank)]
+
+
+def _key(identifier):
+    # "§ 1010.610" and "Section 1010.610" cite the same thing
+    return "Section " + identifier[2:] if identifier.startswith("§ ") else identifier
+
+
+class CitationIndex:
+    """
+    identifier -> kb_text rows, in ingest order. Grows with kb_text like kb_snapshot.KeywordIndex.
+    """
+
+    def __init__(self):
+        self.rows = {}
+        self.size = 0
+
+    def add(self, entries):
+        for entry in entries:
+            for citation in entry_citations(entry):
+                self.rows.setdefault(_key(citation), []).append(self.size)
+            self.size += 1
+
+    def lookup(self, identifiers):
+        """
+        Rows cited by `identifiers`. Section/rule ids are unioned; a page
+        reference narrows them to that page when it can, or stands alone.
+        """
+        pages = [i for i in identifiers if i.startswith("Page ")]
+        sections = [i for i in identifiers if not i.startswith("Page ")]
+        page_rows = sorted({row for i in pages for row in self.rows.get(i, [])})
+        if not sections:
+            return page_rows
+        section_rows = sorted({row for i in sections for row in self.rows.get(_key(i), [])})
+        page_set = set(page_rows)
+        on_page = [row for row in section_rows if row in page_set]
+        return on_page or section_rows
+
+
+def session_citation_index(state):
+    """
+    Citation index over state.kb_text, kept in state.kb_citations (see kb_snapshot.session_keyword_index).
+    """
+    kb = state.get("kb_text") or []
+    index = state.get("kb_citations")
+    if index is None or state.get("kb_citations_source") is not kb or index.size > len(kb):
+        index = CitationIndex()
+    if index.size < len(kb):
+        index.add(kb[index.size:])
+    state["kb_citations"] = index
+    state["kb_citations_source"] = kb
+    return index
@@ -0,0 +1,182 @@
+import os
+import re
+from functools import lru_cache
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+# Token budgets (override via env). The agent prompt + tool schemas + answer
+# still need room, so these are deliberately well under the model window.
+SEARCH_CONTEXT_TOKENS = int(os.getenv("JURISLENS_SEARCH_TOKENS", "700"))
+HISTORY_TOKENS = int(os.getenv("JURISLENS_HISTORY_TOKENS", "800"))
+
+# RecursiveCharacterTextSplitter uses a 100-char overlap; anything shorter is coincidence
+MIN_OVERLAP_CHARS = 40
+MAX_OVERLAP_CHARS = 200
+# Don't bother squeezing in a truncated passage smaller than this
+MIN_PASSAGE_TOKENS = 40
+
+_CITATION_RE = re.compile(r"\b(?:Section|Rule|Standard|Article|Part)\s+\d+(?:\.\d+)*", re.IGNORECASE)
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")  # GPT-4 / GPT-4 Turbo tokenizer
+    except Exception:
+        return None
+
+
+def count_tokens(text):
+    """
+    Token count with the GPT-4 tokenizer (falls back to ~4 chars/token without tiktoken).
+    """
+    if not text:
+        return 0
+    enc = _encoding()
+    if enc is None:
+        return max(1, len(text) // 4)
+    return len(enc.encode(text))
+
+
+def truncate_to_tokens(text, max_tokens):
+    enc = _encoding()
+    if enc is None:
+        return text[: max_tokens * 4]
+    tokens = enc.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return enc.decode(tokens[:max_tokens])
+
+
+def _overlap(a, b):
+    """
+    Length of the longest suffix of `a` that is a prefix of `b` (chunk-splitter overlap).
+    """
+    upper = min(len(a), len(b), MAX_OVERLAP_CHARS)
+    for size in range(upper, MIN_OVERLAP_CHARS - 1, -1):
+        if a.endswith(b[:size]):
+            return size
+    return 0
+
+
+def dedupe_passages(passages):
+    """
+    Removes exact/contained duplicates and trims the splitter overlap between
+    neighbouring chunks of the same source. Input order (best first) is kept.
+    """
+    kept = []
+    for passage in passages:
+        content = passage["content"].strip()
+        duplicate = False
+        for other in kept:
+            if other["source"] != passage["source"]:
+                continue
+            if content in other["content"]:
+                duplicate = True
+                break
+            if other["content"] in content:
+                # New passage is a superset; keep the better-ranked slot but the fuller text
+                other["content"] = content
+                duplicate = True
+                break
+            head = _overlap(other["content"], content)
+            if head:
+                content = content[head:].lstrip()
+            tail = _overlap(content, other["content"])
+            if tail:
+                content = content[:-tail].rstrip()
+        if not duplicate and content:
+            kept.append({**passage, "content": content})
+    return kept
+
+
+def _value(passage):
+    # Relevance first; passages carrying a citable section/rule id win ties
+    return (passage.get("score", 0.0), 1 if _CITATION_RE.search(passage["content"]) else 0)
+
+
+def pack_passages(passages, budget_tokens=None, header=None):
+    """
+    Fits the highest-value passages into `budget_tokens`.
+
+    passages: [{"source", "content", "score"}]; header(passage) -> citation line.
+    Returns the formatted context string (citation header + text per passage).
+    """
+    budget = SEARCH_CONTEXT_TOKENS if budget_tokens is None else budget_tokens
+    header = header or (lambda p: f"[Source: {p['source']}]")
+
+    ranked = dedupe_passages(sorted(passages, key=_value, reverse=True))
+    blocks, used = [], 0
+    for passage in ranked:
+        head = header(passage)
+        cost = count_tokens(head) + count_tokens(passage["content"]) + 2
+        if used + cost <= budget:
+            blocks.append(f"{head}\n{passage['content']}")
+            used += cost
+            continue
+        # Squeeze a truncated version of the next-best passage into what's left
+        remaining = budget - used - count_tokens(head) - 2
+        if remaining >= MIN_PASSAGE_TOKENS:
+            blocks.append(f"{head}\n{truncate_to_tokens(passage['content'], remaining)} …")
+        break
+    return "\n\n".join(blocks)
+
+
+def summarise_turn(question, answer, max_chars=240):
+    """
+    Cheap extractive summary of one Q/A turn: the question, the answer's first
+    sentence and any citations it made. No LLM call.
+    """
+    first = _SENTENCE_RE.split((answer or "").strip(), maxsplit=1)[0]
+    citations = sorted(set(m.group(0) for m in _CITATION_RE.finditer(answer or "")))
+    summary = f"Q: {question.strip()[:max_chars]} | A: {first[:max_chars]}"
+    if citations:
+        summary += f" | Cited: {', '.join(citations[:5])}"
+    return summary
+
+
+def pack_history(messages, budget_tokens=None):
+    """
+    Turns the chat transcript ([{"role", "content"}], oldest first) into LangChain
+    messages within `budget_tokens`: the newest turns verbatim, older turns
+    collapsed into one summary message, oldest summaries dropped first.
+    """
+    budget = HISTORY_TOKENS if budget_tokens is None else budget_tokens
+
+    # Pair up user -> assistant turns (skips the greeting and unanswered prompts)
+    turns = []
+    for i, msg in enumerate(messages):
+        if msg["role"] == "user" and i + 1 < len(messages) and messages[i + 1]["role"] == "assistant":
+            turns.append((msg["content"], messages[i + 1]["content"]))
+
+    recent, used = [], 0
+    older = list(turns)
+    while older:
+        question, answer = older[-1]
+        cost = count_tokens(question) + count_tokens(answer) + 8
+        if used + cost > budget // 2 and recent:
+            break
+        if used + cost > budget:
+            break
+        recent.insert(0, (question, answer))
+        used += cost
+        older.pop()
+
+    summary_lines = []
+    for question, answer in reversed(older):
+        line = summarise_turn(question, answer)
+        cost = count_tokens(line) + 1
+        if used + cost > budget:
+            break
+        summary_lines.insert(0, line)
+        used += cost
+
+    history = []
+    if summary_lines:
+        history.append(AIMessage(content="Summary of earlier conversation:\n" + "\n".join(summary_lines)))
+    for question, answer in recent:
+        history.append(HumanMessage(content=question))
+        history.append(AIMessage(content=answer))
+    return history
@@ -0,0 +1,293 @@
+"""
+Concurrent, polite web crawler for multi-page regulations (e.g. every section
+page under eCFR Title 31 Part 1010).
+
+Pages are fetched with a bounded asyncio pool, at most PER_HOST_CONCURRENCY at
+a time per host with a minimum delay between requests, honouring robots.txt.
+ETag / Last-Modified validators are remembered per target index, so a re-crawl
+into the same index only downloads (and re-embeds) pages that changed. Parsed
+pages are yielded as they arrive, so the split/embed/index pipeline can start
+before the crawl finishes.
+"""
+import os
+import json
+import time
+import asyncio
+import fnmatch
+import urllib.robotparser
+from urllib.parse import urljoin, urldefrag, urlparse
+
+from langchain_core.documents import Document
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+MAX_PAGES = int(os.getenv("JURISLENS_CRAWL_MAX_PAGES", "100"))
+MAX_DEPTH = int(os.getenv("JURISLENS_CRAWL_MAX_DEPTH", "3"))
+CONCURRENCY = int(os.getenv("JURISLENS_CRAWL_CONCURRENCY", "8"))
+PER_HOST_CONCURRENCY = 2
+PER_HOST_DELAY = 0.25  # seconds between request starts to the same host
+REQUEST_TIMEOUT = 30
+# Remembered ETag / Last-Modified per (index, URL) for conditional re-crawls
+VALIDATOR_CACHE = os.getenv("JURISLENS_CRAWL_CACHE", "crawl_cache.json")
+
+_SKIP_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".svg", ".css", ".js", ".ico", ".zip", ".xml", ".json", ".mp3", ".mp4")
+
+
+class CrawlScope:
+    """
+    Which links to follow. By default: same host, under the seed URL's directory.
+
+    allow / deny are glob patterns matched against the full URL (deny wins).
+    """
+
+    def __init__(self, seed_url, allow=None, deny=None, max_depth=MAX_DEPTH, same_host=True):
+        parsed = urlparse(seed_url)
+        self.host = parsed.netloc
+        self.same_host = same_host
+        self.max_depth = max_depth
+        prefix = parsed.path if parsed.path.endswith("/") else parsed.path.rsplit("/", 1)[0] + "/"
+        self.allow = list(allow) if allow else [f"{parsed.scheme}://{parsed.netloc}{prefix}*"]
+        self.deny = list(deny or [])
+
+    def accepts(self, url, depth):
+        if depth > self.max_depth:
+            return False
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https"):
+            return False
+        if self.same_host and parsed.netloc != self.host:
+            return False
+        if parsed.path.lower().endswith(_SKIP_EXTENSIONS):
+            return False
+        if any(fnmatch.fnmatch(url, pattern) for pattern in self.deny):
+            return False
+        return any(fnmatch.fnmatch(url, pattern) for pattern in self.allow)
+
+
+class _HostGate:
+    """
+    Per-host politeness: bounded concurrency plus a minimum gap between request starts.
+    """
+
+    def __init__(self, concurrency, delay):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.delay = delay
+        self.lock = asyncio.Lock()
+        self.next_slot = 0.0
+
+    async def __aenter__(self):
+        await self.semaphore.acquire()
+        async with self.lock:
+            wait = self.next_slot - time.monotonic()
+            self.next_slot = max(self.next_slot, time.monotonic()) + self.delay
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def __aexit__(self, *exc):
+        self.semaphore.release()
+
+
+def load_validators(path=VALIDATOR_CACHE):
+    """
+    {cache_key: {url: {"etag", "last_modified", "links"}}} from the cache file (see crawl_to_batches).
+    """
+    if path and os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # Files from before validators were kept per index are keyed by URL; they can't be trusted for any index
+        return {key: value for key, value in cached.items() if not key.startswith(("http://", "https://"))}
+    return {}
+
+
+def save_validators(validators, path=VALIDATOR_CACHE):
+    if not path:
+        return
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(validators, f)
+    os.replace(tmp, path)
+
+
+def parse_page(url, html):
+    """
+    Returns (Document, [absolute links]) for an HTML page.
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    links = []
+    for a in soup.find_all("a", href=True):
+        link, _ = urldefrag(urljoin(url, a["href"]))
+        links.append(link)
+    for tag in soup(["script", "style", "nav", "header", "footer", "noscript"]):
+        tag.decompose()
+    title = soup.title.get_text(strip=True) if soup.title else ""
+    # One line per block element keeps "§ 1010.610 ..." headings at line starts for the chunker
+    text = "\n".join(line.strip() for line in soup.get_text("\n").splitlines() if line.strip())
+    return Document(page_content=text, metadata={"source": url, "title": title}), links
+
+
+async def crawl(seed_url, scope=None, max_pages=MAX_PAGES, concurrency=CONCURRENCY,
+                per_host_concurrency=PER_HOST_CONCURRENCY, per_host_delay=PER_HOST_DELAY,
+                validators=None, respect_robots=True, stats=None, fetched_validators=None):
+    """
+    Async generator of Documents for every in-scope page reachable from seed_url.
+
+    validators: dict url -> {"etag", "last_modified", "links"} sent as conditional headers.
+    Pages that answer 304 Not Modified are counted in stats["not_modified"] and not
+    yielded, but their remembered links are still followed. Validators of pages
+    downloaded this time go to `fetched_validators`, for the caller to remember
+    once the page is indexed.
+    """
+    import aiohttp
+
+    scope = scope or CrawlScope(seed_url)
+    validators = validators if validators is not None else {}
+    fetched_validators = fetched_validators if fetched_validators is not None else {}
+    stats = stats if stats is not None else {}
+    stats.update({"fetched": 0, "not_modified": 0, "errors": 0, "skipped_robots": 0})
+
+    seed_url, _ = urldefrag(seed_url)
+    seen = {seed_url}
+    pending = asyncio.Queue()
+    pending.put_nowait((seed_url, 0))
+    results = asyncio.Queue()
+    gates, robots = {}, {}
+    scheduled = 1
+
+    async def allowed_by_robots(session, url):
+        if not respect_robots:
+            return True
+        parsed = urlparse(url)
+        base = f"{parsed.scheme}://{parsed.netloc}"
+        if base not in robots:
+            parser = urllib.robotparser.RobotFileParser()
+            try:
+                async with session.get(base + "/robots.txt") as resp:
+                    parser.parse((await resp.text()).splitlines() if resp.status == 200 else [])
+            except Exception:
+                parser.parse([])
+            robots[base] = parser
+        return robots[base].can_fetch(USER_AGENT, url)
+
+    def schedule(links, depth):
+        nonlocal scheduled
+        for link in links:
+            if link not in seen and scheduled < max_pages and scope.accepts(link, depth + 1):
+                seen.add(link)
+                scheduled += 1
+                pending.put_nowait((link, depth + 1))
+
+    async def fetch(session, url, depth):
+        host = urlparse(url).netloc
+        gate = gates.setdefault(host, _HostGate(per_host_concurrency, per_host_delay))
+        if not await allowed_by_robots(session, url):
+            stats["skipped_robots"] += 1
+            return None
+
+        headers = {}
+        cached = validators.get(url, {})
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+        async with gate:
+            async with session.get(url, headers=headers) as resp:
+                if resp.status == 304:
+                    stats["not_modified"] += 1
+                    schedule(cached.get("links", []), depth)
+                    return None
+                resp.raise_for_status()
+                if "html" not in resp.headers.get("Content-Type", "text/html"):
+                    return None
+                html = await resp.text()
+                etag, last_modified = resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+
+        stats["fetched"] += 1
+        document, links = parse_page(url, html)
+        document.metadata["depth"] = depth
+        fetched_validators[url] = {"etag": etag, "last_modified": last_modified, "links": links}
+        schedule(links, depth)
+        return document
+
+    async def worker(session):
+        while True:
+            url, depth = await pending.get()
+            try:
+                document = await fetch(session, url, depth)
+                if document is not None and document.page_content:
+                    await results.put(document)
+            except Exception as e:
+                stats["errors"] += 1
+                print(f"⚠️ Crawl failed for {url}: {e}")
+            finally:
+                pending.task_done()
+
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+    async with aiohttp.ClientSession(headers={"User-Agent": USER_AGENT}, timeout=timeout) as session:
+        workers = [asyncio.create_task(worker(session)) for _ in range(concurrency)]
+        done = asyncio.create_task(pending.join())
+        try:
+            while True:
+                getter = asyncio.create_task(results.get())
+                finished, _ = await asyncio.wait({getter, done}, return_when=asyncio.FIRST_COMPLETED)
+                if getter in finished:
+                    yield getter.result()
+                    continue
+                getter.cancel()
+                while not results.empty():
+                    yield results.get_nowait()
+                break
+        finally:
+            done.cancel()
+            for w in workers:
+                w.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+
+async def _crawl_in_batches(seed_url, on_batch, batch_pages, remember=None, **kwargs):
+    fetched = {}
+    batch = []
+
+    async def flush():
+        # Index in a thread: the fetch workers keep running on the event loop meanwhile
+        await asyncio.to_thread(on_batch, batch)
+        if remember:
+            remember({d.metadata["source"]: fetched.pop(d.metadata["source"]) for d in batch if d.metadata["source"] in fetched})
+
+    async for document in crawl(seed_url, fetched_validators=fetched, **kwargs):
+        batch.append(document)
+        if len(batch) >= batch_pages:
+            await flush()
+            batch = []
+    if batch:
+        await flush()
+
+
+def crawl_to_batches(seed_url, on_batch, batch_pages=8, validator_cache=VALIDATOR_CACHE, cache_key=None, **kwargs):
+    """
+    Synchronous entry point: runs the crawl and calls on_batch(documents) every
+    `batch_pages` pages, so indexing overlaps with fetching. Returns crawl stats.
+
+    Validators are kept under `cache_key` (the target index plus the tenant and
+    partition the pages are indexed for): a crawl for another key downloads
+    everything again. A page's validator is only saved
+    after on_batch has returned for it, so a failed batch is re-fetched next time.
+    Pass validator_cache=None to always download everything (e.g. when the
+    target index doesn't persist, so unchanged pages still need indexing).
+    """
+    cached = load_validators(validator_cache) if validator_cache else {}
+    validators = cached.setdefault(cache_key or "", {})
+
+    def remember(indexed):
+        validators.update(indexed)
+        save_validators(cached, validator_cache)
+
+    stats = {}
+    asyncio.run(_crawl_in_batches(seed_url, on_batch, batch_pages, remember=remember if validator_cache else None,
+                                  validators=validators, stats=stats, **kwargs))
+    return stats
@@ -1,21 +1,18 @@
 
-import os
-import pygame
 import time
-
-AUDIO_DIR = "voiceovers"
+from playback import AUDIO_DIR, ClipPlayer, list_clips
 
 def run_director():
-    # Initialize Pygame Mixer
-    pygame.mixer.init()
-    
-    # Get sorted audio files
-    files = sorted([f for f in os.listdir(AUDIO_DIR) if f.endswith(".mp3")])
+    # Clips in cue order (voiceovers/manifest.json, else sorted MP3s)
+    clips = list_clips(AUDIO_DIR)
     
-    if not files:
+    if not clips:
         print(f"❌ No audio files found in '{AUDIO_DIR}'. Did you run generate_voiceover.py?")
         return
 
+    # Decode every clip into memory now, so a cue plays the instant it's triggered
+    player = ClipPlayer(clips)
+
     print("\n🎬 **DIRECTOR MODE ACTIVATED** 🎬")
     print("-----------------------------------")
     print("INSTRUCTIONS:")
@@ -26,30 +23,27 @@ def run_director():
     print("-----------------------------------")
     
     current_index = 0
-    total_clips = len(files)
+    total_clips = len(clips)
     
     while current_index < total_clips:
-        filename = files[current_index]
-        clip_name = os.path.splitext(filename)[0]
+        clip_name = clips[current_index][0]
         
         # Wait for user trigger
         input(f"\n👉 Press [ENTER] to play Clip {current_index + 1}/{total_clips}: '{clip_name}'...")
         
-        # Load and Play
-        filepath = os.path.join(AUDIO_DIR, filename)
-        pygame.mixer.music.load(filepath)
-        pygame.mixer.music.play()
+        # Play from memory (the next cue is prefetched meanwhile)
+        triggered = time.perf_counter()
+        duration = player.play(current_index)
         
-        print(f"🔊 Playing: {clip_name}...")
+        print(f"🔊 Playing: {clip_name} ({duration:.1f}s, started in {(time.perf_counter() - triggered) * 1000:.1f} ms)...")
         
-        # Wait for playing to finish (optional blocking, or non-blocking)
-        # We'll monitor is_busy() to show a "Playing..." indicator
-        while pygame.mixer.music.get_busy():
-            time.sleep(0.1)
+        # Block on the channel's end event rather than polling
+        player.wait()
             
         print("✅ Finished.")
         current_index += 1
         
+    player.close()
     print("\n🎉 PERFORMANCE COMPLETE. Stop your recording now!")
 
 if __name__ == "__main__":
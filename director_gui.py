@@ -1,10 +1,9 @@
 import tkinter as tk
 from tkinter import ttk
-import pygame
-import os
-import threading
+from playback import AUDIO_DIR, ClipPlayer, list_clips
 
-AUDIO_DIR = "voiceovers"
+# How often the Tk loop checks for the end of the playing clip
+POLL_MS = 50
 
 # Mapping filenames to DETAILED instructions
 SCRIPT_HINTS = {
@@ -31,9 +30,9 @@ class DirectorApp:
         self.root.attributes('-topmost', True)  # Always on top
         self.root.configure(bg="#2c3e50")
         
-        # Initialize Audio
-        pygame.mixer.init()
-        self.files = sorted([f for f in os.listdir(AUDIO_DIR) if f.endswith(".mp3")])
+        # Initialize Audio: every clip decoded into memory up front (playback.py)
+        self.clips = list_clips(AUDIO_DIR)
+        self.player = ClipPlayer(self.clips)
         self.current_index = 0
         
         # Styles
@@ -54,47 +53,46 @@ class DirectorApp:
         self.btn_action = ttk.Button(root, text="▶ PLAY CLIP 1", command=self.play_next)
         self.btn_action.pack(pady=10, fill='x', padx=20)
         
-        self.lbl_status = tk.Label(root, text=f"Clip 0 / {len(self.files)}", fg="#7f8c8d", bg="#2c3e50")
+        self.lbl_status = tk.Label(root, text=f"Clip 0 / {len(self.clips)}", fg="#7f8c8d", bg="#2c3e50")
         self.lbl_status.pack(side="bottom", pady=5)
 
     def play_next(self):
-        if self.current_index >= len(self.files):
+        if self.current_index >= len(self.clips):
             self.lbl_title.config(text="🎉 DONE!", fg="#2ecc71")
             self.btn_action.config(state="disabled", text="Recording Finished")
             return
 
-        filename = self.files[self.current_index]
-        clip_key = os.path.splitext(filename)[0]
+        clip_key = self.clips[self.current_index][0]
         
-        # Load and Play
-        filepath = os.path.join(AUDIO_DIR, filename)
-        pygame.mixer.music.load(filepath)
-        pygame.mixer.music.play()
+        # Play from memory; the next cue is prefetched meanwhile
+        duration = self.player.play(self.current_index)
         
         # Update UI
-        self.lbl_title.config(text=f"Playing: {clip_key}", fg="#3498db")
+        self.lbl_title.config(text=f"Playing: {clip_key} ({duration:.0f}s)", fg="#3498db")
         instruction = SCRIPT_HINTS.get(clip_key, "No instruction")
         self.lbl_hint.config(text=instruction)
         
         self.current_index += 1
         
-        next_text = "NEXT CLIP ▶" if self.current_index < len(self.files) else "FINISH"
+        next_text = "NEXT CLIP ▶" if self.current_index < len(self.clips) else "FINISH"
         self.btn_action.config(text=next_text, state="disabled") # Disable until finished
         
         # Update Progress
-        self.progress['value'] = (self.current_index / len(self.files)) * 100
-        self.lbl_status.config(text=f"Clip {self.current_index} / {len(self.files)}")
+        self.progress['value'] = (self.current_index / len(self.clips)) * 100
+        self.lbl_status.config(text=f"Clip {self.current_index} / {len(self.clips)}")
         
-        # Monitor playback in thread to re-enable button
-        threading.Thread(target=self.monitor_playback, daemon=True).start()
+        # Poll for the clip's end event on the Tk main loop, then re-enable the button.
+        # (pygame events can only be pumped on the thread that initialised SDL.)
+        self.root.after(POLL_MS, self.monitor_playback)
 
     def monitor_playback(self):
-        while pygame.mixer.music.get_busy():
-            pygame.time.Clock().tick(10)
-        
+        if not self.player.finished():
+            self.root.after(POLL_MS, self.monitor_playback)
+            return
+
         # When done
-        self.root.after(0, lambda: self.btn_action.config(state="normal"))
-        self.root.after(0, lambda: self.lbl_title.config(text="Paused (Ready)", fg="white"))
+        self.btn_action.config(state="normal")
+        self.lbl_title.config(text="Paused (Ready)", fg="white")
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -0,0 +1,193 @@
+"""
+Answer + feedback capture: every agent answer (query, retrieved chunk ids, tool
+calls, latency, tokens) and every 👍/👎 is appended to a local SQLite store.
+
+Writes go through an in-memory queue drained by one background thread in
+batches, so recording never blocks a Streamlit rerun on disk I/O. Analyse the
+data with `python feedback_analysis.py`.
+"""
+import os
+import json
+import time
+import queue
+import atexit
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+FEEDBACK_DB = os.getenv("JURISLENS_FEEDBACK_DB", "jurislens_feedback.sqlite3")
+
+BATCH_SIZE = 200
+FLUSH_INTERVAL = 1.0  # seconds a recorded event may wait before it is written
+MAX_PENDING = 10000   # beyond this, new events are dropped rather than blocking the app
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    message_id TEXT PRIMARY KEY,
+    session TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    query TEXT NOT NULL,
+    latency_ms REAL,
+    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+    completion_tokens INTEGER NOT NULL DEFAULT 0,
+    total_tokens INTEGER NOT NULL DEFAULT 0,
+    tools TEXT NOT NULL DEFAULT '[]',
+    chunk_ids TEXT NOT NULL DEFAULT '[]',
+    stages TEXT NOT NULL DEFAULT '{}'
+);
+CREATE TABLE IF NOT EXISTS feedback (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    message_id TEXT NOT NULL,
+    session TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    rating INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS feedback_message ON feedback (message_id, id);
+"""
+
+
+def summarise_spans(spans):
+    """
+    Condenses the spans of one agent run (tracing.Tracer.collect()) into the
+    answer-level fields stored here: latency, token usage, tool calls, chunk ids.
+    """
+    summary = {"latency_ms": None, "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0,
+               "tools": [], "chunk_ids": [], "stages": {}}
+    for span in spans:
+        attrs = span.attributes
+        stages = summary["stages"]
+        stages[span.stage] = round(stages.get(span.stage, 0.0) + (span.duration_ms or 0.0), 1)
+        if span.stage == "agent":
+            summary["latency_ms"] = round(span.duration_ms or 0.0, 1)
+        elif span.stage == "llm":
+            for field in ("prompt_tokens", "completion_tokens", "total_tokens"):
+                summary[field] += int(attrs.get(f"llm.usage.{field}", 0) or 0)
+        elif span.stage.startswith("tool.") and "tool.input" in attrs:
+            summary["tools"].append({"name": span.name, "input": attrs["tool.input"], "status": span.status})
+        for cid in (attrs.get("retrieval.chunk_ids") or "").split(","):
+            if cid and cid not in summary["chunk_ids"]:
+                summary["chunk_ids"].append(cid)
+    return summary
+
+
+class FeedbackStore:
+    """
+    Append-only store with a non-blocking, batched writer thread.
+    """
+
+    def __init__(self, db_path=FEEDBACK_DB, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+        self._pending = queue.Queue(maxsize=MAX_PENDING)
+        self._closed = False
+        self._writer = threading.Thread(target=self._run, name="jurislens-feedback-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    # --- Producer side (the app); never touches the database ---
+    def record_answer(self, message_id, session, query, spans=None, summary=None):
+        summary = summary or summarise_spans(spans or [])
+        self._put(("answer", (
+            message_id, session, time.time(), query, summary["latency_ms"],
+            summary["prompt_tokens"], summary["completion_tokens"], summary["total_tokens"],
+            json.dumps(summary["tools"]), json.dumps(summary["chunk_ids"]), json.dumps(summary["stages"]),
+        )))
+
+    def record_feedback(self, message_id, session, rating):
+        """
+        rating: +1 (👍) or -1 (👎). Re-votes are appended; the latest one counts.
+        """
+        self._put(("feedback", (message_id, session, time.time(), 1 if rating > 0 else -1)))
+
+    def _put(self, event):
+        try:
+            self._pending.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout=5.0):
+        """
+        Blocks until everything recorded so far has been written (for tests and shutdown).
+        """
+        done = threading.Event()
+        self._put(("flush", done))
+        return done.wait(timeout)
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self.flush()
+
+    # --- Writer thread ---
+    def _run(self):
+        while True:
+            batch = [self._pending.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and batch[-1][0] != "flush":
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+    def _write(self, batch):
+        answers = [payload for kind, payload in batch if kind == "answer"]
+        ratings = [payload for kind, payload in batch if kind == "feedback"]
+        try:
+            with self._connect() as conn:
+                conn.execute("BEGIN")
+                if answers:
+                    conn.executemany("INSERT OR IGNORE INTO answers VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", answers)
+                if ratings:
+                    conn.executemany(
+                        "INSERT INTO feedback (message_id, session, created_at, rating) VALUES (?, ?, ?, ?)", ratings
+                    )
+                conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            print(f"⚠️ Feedback write failed ({len(answers)} answers, {len(ratings)} ratings): {e}")
+        for kind, payload in batch:
+            if kind == "flush":
+                payload.set()
+
+    # --- Reader side (feedback_analysis.py) ---
+    def rated_answers(self, since=None):
+        """
+        One row per answer with its latest rating (None if never rated).
+        """
+        query = """
+            SELECT a.*, (SELECT f.rating FROM feedback f WHERE f.message_id = a.message_id ORDER BY f.id DESC LIMIT 1) AS rating
+            FROM answers a
+        """
+        params = ()
+        if since is not None:
+            query += " WHERE a.created_at >= ?"
+            params = (since,)
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY a.created_at", params).fetchall()
+        answers = []
+        for row in rows:
+            answer = dict(row)
+            for field in ("tools", "chunk_ids", "stages"):
+                answer[field] = json.loads(answer[field])
+            answers.append(answer)
+        return answers
@@ -0,0 +1,159 @@
+"""
+Finds slow and poorly rated query clusters in the feedback store (feedback.py)
+to guide retrieval and cache tuning.
+
+    python feedback_analysis.py                  # report for everything recorded
+    python feedback_analysis.py --days 7 --json  # last week, machine-readable
+"""
+import re
+import sys
+import json
+import time
+import argparse
+from collections import Counter
+
+from feedback import FEEDBACK_DB, FeedbackStore
+from tracing import percentile
+
+# Two queries whose keyword sets overlap at least this much (Jaccard) share a cluster
+SIMILARITY = 0.5
+MIN_CLUSTER_SIZE = 3
+MIN_RATINGS = 2
+POOR_DOWN_RATE = 0.3
+
+_TOKEN_RE = re.compile(r"\$?\d[\d,.]*|[a-z][a-z0-9.'-]+")
+_STOPWORDS = set(
+    "a an and are as at be by can could do does for from has have how i if in is it its me my of on or our "
+    "should so than that the their them there this to under was we what when where which who will with "
+    "would you your client clients please tell".split()
+)
+
+
+def query_terms(query):
+    """
+    Keyword set of a query; amounts and numbers collapse to <num> so
+    "send $4,000 to Zylaria" and "send $9,500 to Zylaria" cluster together.
+    """
+    terms = set()
+    for token in _TOKEN_RE.findall(query.lower()):
+        if token[0] == "$" or token[0].isdigit():
+            terms.add("<num>")
+        elif token not in _STOPWORDS and len(token) > 2:
+            terms.add(token.rstrip(".?"))
+    return terms
+
+
+def _jaccard(a, b):
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def cluster_answers(answers, similarity=SIMILARITY):
+    """
+    Greedy single-pass clustering on query keyword sets: each answer joins the
+    first cluster whose seed query is similar enough, else starts a new one.
+    """
+    clusters = []
+    for answer in answers:
+        terms = query_terms(answer["query"])
+        for cluster in clusters:
+            if _jaccard(terms, cluster["seed"]) >= similarity:
+                cluster["members"].append(answer)
+                cluster["terms"].update(terms)
+                break
+        else:
+            clusters.append({"seed": terms, "terms": Counter(terms), "members": [answer]})
+    return clusters
+
+
+def describe_cluster(cluster, slow_ms):
+    members = cluster["members"]
+    latencies = [a["latency_ms"] for a in members if a["latency_ms"] is not None]
+    ratings = [a["rating"] for a in members if a["rating"] is not None]
+    down = sum(1 for r in ratings if r < 0)
+    down_rate = down / len(ratings) if ratings else 0.0
+    tools = Counter(t["name"] for a in members for t in a["tools"])
+    # Chunks that keep showing up in 👎 answers are the first retrieval suspects
+    bad_chunks = Counter(cid for a in members if (a["rating"] or 0) < 0 for cid in a["chunk_ids"])
+
+    p95 = percentile(latencies, 95)
+    flags = []
+    if latencies and p95 >= slow_ms:
+        flags.append("slow")
+    if len(ratings) >= MIN_RATINGS and down_rate >= POOR_DOWN_RATE:
+        flags.append("poorly_rated")
+    if len(members) >= MIN_CLUSTER_SIZE and down == 0 and ratings:
+        flags.append("cache_candidate")  # Asked repeatedly and never rated down
+
+    return {
+        "label": " ".join(term for term, _ in cluster["terms"].most_common(4)),
+        "size": len(members),
+        "example": members[0]["query"],
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(p95, 1),
+        "mean_tokens": round(sum(a["total_tokens"] for a in members) / len(members), 1),
+        "ratings": len(ratings),
+        "down_rate": round(down_rate, 2),
+        "tools": dict(tools.most_common()),
+        "suspect_chunks": [cid for cid, _ in bad_chunks.most_common(5)],
+        "flags": flags,
+    }
+
+
+def analyse(answers, similarity=SIMILARITY, slow_ms=None, min_size=1):
+    """
+    Returns {"answers", "rated", "slow_ms", "clusters"}; clusters sorted worst first
+    (poorly rated, then slow, then by size).
+    """
+    latencies = [a["latency_ms"] for a in answers if a["latency_ms"] is not None]
+    # Default "slow" threshold: the overall p90, so there's always something to look at
+    slow_ms = slow_ms if slow_ms is not None else percentile(latencies, 90)
+    clusters = [describe_cluster(c, slow_ms) for c in cluster_answers(answers, similarity)]
+    clusters = [c for c in clusters if c["size"] >= min_size]
+    clusters.sort(key=lambda c: ("poorly_rated" in c["flags"], "slow" in c["flags"], c["size"]), reverse=True)
+    return {
+        "answers": len(answers),
+        "rated": sum(1 for a in answers if a["rating"] is not None),
+        "slow_ms": round(slow_ms, 1),
+        "clusters": clusters,
+    }
+
+
+def print_report(report):
+    print("\n🗳️ JurisLens Feedback Analysis")
+    print("-----------------------------------")
+    print(f"{report['answers']} answers, {report['rated']} rated, slow threshold {report['slow_ms']}ms\n")
+    for c in report["clusters"]:
+        flags = " ".join(f"[{f}]" for f in c["flags"])
+        print(f"• {c['label'] or '(no keywords)'}  x{c['size']}  {flags}")
+        print(f"    e.g. \"{c['example'][:80]}\"")
+        print(f"    p50={c['p50_ms']}ms p95={c['p95_ms']}ms tokens={c['mean_tokens']} "
+              f"👎 {c['down_rate']:.0%} of {c['ratings']} tools={c['tools']}")
+        if c["suspect_chunks"]:
+            print(f"    chunks in 👎 answers: {', '.join(c['suspect_chunks'])}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cluster recorded queries and flag slow / poorly rated ones.")
+    parser.add_argument("--db", default=FEEDBACK_DB)
+    parser.add_argument("--days", type=float, help="Only answers from the last N days.")
+    parser.add_argument("--similarity", type=float, default=SIMILARITY)
+    parser.add_argument("--slow-ms", type=float, help="Latency that counts as slow (default: overall p90).")
+    parser.add_argument("--min-size", type=int, default=1, help="Hide clusters smaller than this.")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    since = time.time() - args.days * 86400 if args.days else None
+    answers = FeedbackStore(args.db).rated_answers(since=since)
+    if not answers:
+        print(f"ℹ️ No answers recorded in {args.db} yet.")
+        return 0
+    report = analyse(answers, similarity=args.similarity, slow_ms=args.slow_ms, min_size=args.min_size)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
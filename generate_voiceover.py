@@ -1,6 +1,7 @@
 
 import asyncio
-import edge_tts
+import hashlib
+import json
 import os
 
 # Select Voice: 
@@ -8,6 +9,10 @@ import os
 # "en-US-JennyNeural" (Female, Clear)
 VOICE = "en-US-ChristopherNeural"
 OUTPUT_DIR = "voiceovers"
+# Clip name -> file, content hash and duration; director.py / director_gui.py preload from it
+MANIFEST = "manifest.json"
+# Clips synthesized at once (edge-tts opens one websocket per clip)
+CONCURRENCY = 4
 
 SCRIPT = {
     "01_Intro": "Web search engines are great at reading, but terrible at enforcing. Meet JurisLens: The first Autonomous Compliance Agent that bridges the gap between static policy documents and live enterprise data.",
@@ -35,19 +40,144 @@ SCRIPT = {
     "12_Adoption": "For Fintechs, adoption is seamless. Simply index your PDFs into Elastic Cloud, connect your ledger API to our Agent Tools, and you have an automated compliance officer running 24/7. Don't just chat with your data. Enforce it. This is JurisLens."
 }
 
-async def generate_audio():
-    if not os.path.exists(OUTPUT_DIR):
-        os.makedirs(OUTPUT_DIR)
-        
-    print(f"[GENERATING] {len(SCRIPT)} audio files using {VOICE}...")
-    
-    for filename, text in SCRIPT.items():
-        output_file = os.path.join(OUTPUT_DIR, f"{filename}.mp3")
+# MPEG audio frame header tables: bitrate (kbps) by [version is MPEG-1][layer index], sample rates by version
+_BITRATES = {
+    True: {3: [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+           2: [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+           1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320]},
+    False: {3: [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+            2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+            1: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160]},
+}
+_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+
+
+def clip_hash(text, voice=VOICE):
+    # A clip only needs regenerating when its text or the voice changes
+    return hashlib.sha1(f"{voice}\x00{text}".encode("utf-8")).hexdigest()
+
+
+def mp3_duration(path):
+    """
+    Duration in seconds, from the MPEG frame headers (no decoder needed).
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    pos = 0
+    if data[:3] == b"ID3":
+        # Skip the ID3v2 tag: 10-byte header + syncsafe size
+        pos = 10 + ((data[6] & 0x7F) << 21 | (data[7] & 0x7F) << 14 | (data[8] & 0x7F) << 7 | (data[9] & 0x7F))
+    seconds = 0.0
+    while pos + 4 <= len(data):
+        b1, b2 = data[pos + 1], data[pos + 2]
+        version, layer = (b1 >> 3) & 0x03, (b1 >> 1) & 0x03
+        bitrate_index, rate_index = b2 >> 4, (b2 >> 2) & 0x03
+        if data[pos] != 0xFF or (b1 & 0xE0) != 0xE0 or version == 1 or layer == 0 or bitrate_index in (0, 15) or rate_index == 3:
+            pos += 1  # Not a frame header (tag, padding or garbage): resync
+            continue
+        mpeg1 = version == 3
+        bitrate = _BITRATES[mpeg1][layer][bitrate_index] * 1000
+        sample_rate = _SAMPLE_RATES[version][rate_index]
+        padding = (b2 >> 1) & 0x01
+        if layer == 3:  # Layer I
+            samples, length = 384, (12 * bitrate // sample_rate + padding) * 4
+        else:
+            samples = 1152 if mpeg1 or layer == 2 else 576
+            length = samples // 8 * bitrate // sample_rate + padding
+        seconds += samples / sample_rate
+        pos += max(length, 1)
+    return round(seconds, 3)
+
+
+def load_manifest(output_dir=OUTPUT_DIR):
+    """
+    {"voice", "clips": {name: {"file", "sha1", "duration", "bytes"}}}, empty if none was written yet.
+    """
+    try:
+        with open(os.path.join(output_dir, MANIFEST), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"voice": None, "clips": {}}
+
+
+def _is_current(entry, text, output_dir):
+    if not entry or entry.get("sha1") != clip_hash(text):
+        return False
+    path = os.path.join(output_dir, entry["file"])
+    return os.path.exists(path) and os.path.getsize(path) == entry.get("bytes")
+
+
+async def _synthesize(name, text, output_dir, semaphore):
+    import edge_tts
+
+    output_file = os.path.join(output_dir, f"{name}.mp3")
+    tmp_file = output_file + ".part"
+    async with semaphore:
         communicate = edge_tts.Communicate(text, VOICE)
-        await communicate.save(output_file)
-        print(f"[SAVED]: {output_file}")
-        
-    print("\n[DONE] All audio files generated in 'voiceovers/' folder!")
+        try:
+            await communicate.save(tmp_file)
+        except BaseException:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+            raise
+    # Never leave a half-written clip behind under the real name
+    os.replace(tmp_file, output_file)
+    print(f"[SAVED]: {output_file}")
+    return name
+
+
+async def generate_audio(output_dir=OUTPUT_DIR, concurrency=CONCURRENCY, force=False):
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    manifest = load_manifest(output_dir)
+    clips = manifest.get("clips", {})
+    stale = {name: text for name, text in SCRIPT.items() if force or not _is_current(clips.get(name), text, output_dir)}
+    print(f"[GENERATING] {len(stale)} of {len(SCRIPT)} audio files using {VOICE} "
+          f"({len(SCRIPT) - len(stale)} unchanged)...")
+
+    semaphore = asyncio.Semaphore(concurrency)
+    results = await asyncio.gather(
+        *(_synthesize(name, text, output_dir, semaphore) for name, text in stale.items()), return_exceptions=True
+    )
+    failed = {}
+    for name, result in zip(stale, results):
+        if isinstance(result, Exception):
+            failed[name] = result
+            print(f"[FAILED]: {name}: {result}")
+
+    # Rewrite the manifest for every clip that is on disk, in script order. A clip that
+    # failed to regenerate keeps its previous entry (and mp3): an outdated cue beats a
+    # missing one, and its old hash makes the next run retry it.
+    manifest = {"voice": VOICE, "clips": {}}
+    for name, text in SCRIPT.items():
+        path = os.path.join(output_dir, f"{name}.mp3")
+        if name in failed:
+            if name in clips and os.path.exists(os.path.join(output_dir, clips[name]["file"])):
+                manifest["clips"][name] = clips[name]
+            continue
+        if not os.path.exists(path):
+            continue
+        manifest["clips"][name] = {
+            "file": f"{name}.mp3",
+            "sha1": clip_hash(text),
+            "duration": mp3_duration(path),
+            "bytes": os.path.getsize(path),
+        }
+    tmp_manifest = os.path.join(output_dir, MANIFEST + ".tmp")
+    with open(tmp_manifest, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_manifest, os.path.join(output_dir, MANIFEST))
+
+    total = sum(clip["duration"] for clip in manifest["clips"].values())
+    if failed:
+        kept = [name for name in failed if name in manifest["clips"]]
+        print(f"\n[INCOMPLETE] {len(failed)} clip(s) failed; re-run to retry just those."
+              + (f" Previous takes kept for: {', '.join(kept)}." if kept else ""))
+    else:
+        print(f"\n[DONE] All audio files generated in '{output_dir}/' folder! ({total:.1f}s of narration)")
+    return manifest
 
 if __name__ == "__main__":
-    asyncio.run(generate_audio())
+    import sys
+    asyncio.run(generate_audio(force="--force" in sys.argv))
@@ -4,26 +4,96 @@ from langchain_community.document_loaders import PyPDFLoader, WebBaseLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_elasticsearch import ElasticsearchStore
 from langchain_openai import OpenAIEmbeddings
+from tracing import TRACER, TracingEmbeddings
+from chunker import chunk_id, split_regulation_documents
+from partitions import DEFAULT_TENANT, PARTITION_FIELDS, index_for
+from vector_compression import embedding_kwargs, es_strategy
+from kb_snapshot import CachedEmbeddings, export_snapshot
+from citation_index import chunk_citations
+from sanctions_screening import document_hits
 
 # Connect to ES Cloud (Or Local)
 ELASTIC_CLOUD_ID = os.getenv("ELASTIC_CLOUD_ID")
 ELASTIC_API_KEY = os.getenv("ELASTIC_API_KEY")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-def ingest_pdf(pdf_path, index_name="jurislens_docs"):
+# "structure" = section/rule-aware chunker (chunker.py), "recursive" = legacy 1000/100 splitter
+CHUNKER = os.getenv("JURISLENS_CHUNKER", "structure")
+
+# Chunks per embedding/indexing request when progress is reported (background jobs)
+INDEX_BATCH_SIZE = 64
+
+class IngestCancelled(Exception):
+    """Raised from a progress callback to abort a running ingestion between steps."""
+
+def ingest_pdf(pdf_path, index_name=None, partition=None):
     """
     Ingests a PDF into Elasticsearch Vector Store (and Local Backup).
+    partition: tenant/jurisdiction/effective_date metadata (partitions.partition_metadata).
     """
-    print(f"📄 Loading PDF: {pdf_path}")
-    loader = PyPDFLoader(pdf_path)
-    documents = loader.load()
-
-    _split_and_index(documents, index_name)
+    _split_and_index(load_pdf(pdf_path), index_name, partition)
 
-def ingest_url(url, index_name="jurislens_docs"):
+def ingest_url(url, index_name=None, partition=None):
     """
     Ingests a Web Page into Elasticsearch Vector Store (and Local Backup).
     """
+    _split_and_index(load_url(url), index_name, partition)
+
+def ingest_crawl(seed_url, index_name=None, partition=None):
+    """
+    Crawls seed_url and its in-scope linked pages into Elasticsearch (and Local Backup).
+    """
+    entries = crawl_and_index(seed_url, index_name, partition=partition)
+    save_snapshot(entries)
+    if "kb_text" not in st.session_state:
+        st.session_state.kb_text = []
+    st.session_state.kb_text.extend(entries)
+    print(f"💾 Stored {len(entries)} chunks in local backup memory.")
+
+def crawl_and_index(seed_url, index_name=None, progress=None, partition=None, fallback_to_local=True):
+    """
+    Streams crawled pages (crawler.py) through split -> index in small batches.
+    Returns the local-backup entries for every chunk indexed.
+    fallback_to_local: see index_documents.
+    """
+    from crawler import MAX_PAGES, VALIDATOR_CACHE, crawl_to_batches
+
+    index_name = index_name or _index_name(partition)
+    progress = progress or (lambda fraction, message: None)
+    entries = []
+    pages = 0
+
+    def on_batch(documents):
+        nonlocal pages
+        pages += len(documents)
+        docs = split_documents(documents, partition)
+        if docs:
+            index_documents(docs, index_name, fallback_to_local=fallback_to_local)
+            entries.extend(to_kb_entries(docs))
+        progress(min(0.95, pages / MAX_PAGES), f"Crawled {pages} pages, {len(entries)} chunks")
+
+    print(f"🕸️ Crawling from: {seed_url}")
+    progress(0.02, "Crawling")
+    # Conditional requests only pay off when the index outlives this run
+    cache = VALIDATOR_CACHE if os.getenv("ELASTIC_CLOUD_ID") else None
+    with TRACER.span("crawl", "ingest.crawl", url=seed_url):
+        stats = crawl_to_batches(seed_url, on_batch, validator_cache=cache, cache_key=_validator_key(index_name, partition))
+    print(f"🕸️ Crawl done: {stats}")
+    if not entries and not stats.get("not_modified"):
+        raise ValueError(f"No pages could be crawled from {seed_url}")
+    if not entries:
+        # Nothing changed since this index/partition was last crawled; its chunks are in ES and the KB snapshot
+        print(f"ℹ️ {stats['not_modified']} pages unchanged since the last crawl into '{index_name}' for this partition")
+        progress(0.95, f"{stats['not_modified']} pages unchanged since the last crawl")
+    return entries
+
+def load_pdf(pdf_path):
+    print(f"📄 Loading PDF: {pdf_path}")
+    with TRACER.span("load_pdf", "ingest.load", path=os.path.basename(pdf_path)):
+        loader = PyPDFLoader(pdf_path)
+        return loader.load()
+
+def load_url(url):
     print(f"🌐 Loading URL: {url}")
     try:
         # Use valid User-Agent to avoid 403 blocks
@@ -33,7 +103,8 @@ def ingest_url(url, index_name="jurislens_docs"):
                 "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
             }
         )
-        documents = loader.load()
+        with TRACER.span("load_url", "ingest.load", url=url):
+            documents = loader.load()
     except ImportError:
         # Auto-fix missing dependency
         import sys, subprocess
@@ -49,24 +120,91 @@ def ingest_url(url, index_name="jurislens_docs"):
         documents = loader.load()
     except Exception as e:
         raise ValueError(f"Failed to load URL: {e}")
-    
-    _split_and_index(documents, index_name)
+    return documents
 
-import streamlit as st
+def run_ingest_job(kind, target, index_name=None, progress=None, partition=None):
+    """
+    Load -> split -> embed/index for one background job (see jobs.py).
+    Runs outside any Streamlit session, so instead of writing st.session_state
+    it returns the local-backup entries for the app to merge in.
+    progress(fraction, message) is called between steps and index batches.
+    """
+    progress = progress or (lambda fraction, message: None)
+    index_name = index_name or _index_name(partition)
 
-def _split_and_index(documents, index_name):
-    # Split into Chunks
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
-    docs = text_splitter.split_documents(documents)
+    if kind == "crawl":
+        entries = crawl_and_index(target, index_name, progress=progress, partition=partition, fallback_to_local=False)
+        save_snapshot(entries)
+        return entries
+
+    progress(0.05, "Loading")
+    documents = load_pdf(target) if kind == "pdf" else load_url(target)
 
+    progress(0.25, f"Splitting {len(documents)} pages")
+    docs = split_documents(documents, partition)
     if not docs:
-         print("⚠️ No content found to index.")
-         return
+        raise ValueError("No content found to index.")
 
-    # --- BACKUP: Store in Session State for Demo ---
-    if "kb_text" not in st.session_state:
-        st.session_state.kb_text = []
-    
+    progress(0.35, f"Indexing {len(docs)} chunks")
+    index_documents(docs, index_name, progress=lambda done: progress(0.35 + 0.6 * done / len(docs), f"Indexed {done}/{len(docs)} chunks"),
+                    fallback_to_local=False)
+    entries = to_kb_entries(docs)
+    save_snapshot(entries)
+    return entries
+
+def _index_name(partition):
+    return index_for((partition or {}).get("tenant"))
+
+def _validator_key(index_name, partition):
+    # Tenants (and jurisdiction/effective-date partitions) share an index unless dedicated,
+    # so a page indexed for one of them is still unindexed for the others
+    partition = {"tenant": DEFAULT_TENANT, **(partition or {})}
+    return "|".join([index_name, *(f"{field}={partition.get(field) or ''}" for field in PARTITION_FIELDS)])
+
+def split_documents(documents, partition=None):
+    chunker = os.getenv("JURISLENS_CHUNKER", CHUNKER)
+    with TRACER.span("split", "ingest.split", pages=len(documents), chunker=chunker):
+        if chunker == "recursive":
+            text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
+            docs = text_splitter.split_documents(documents)
+        else:
+            docs = split_regulation_documents(documents)
+    for d in docs:
+        # Lets feedback/analysis refer to the exact chunks an answer was built from
+        d.metadata["chunk_id"] = chunk_id(d.metadata.get("source", "Unknown"), d.page_content)
+        # Section/rule/page identifiers for exact citation lookups (citation_index.py)
+        page = d.metadata.get("page")
+        d.metadata["citations"] = chunk_citations(
+            d.page_content, d.metadata.get("section_ids"), d.metadata.get("section"),
+            int(page) + 1 if page is not None else None,
+        )
+        if partition:
+            d.metadata.update(partition)
+    tag_sanctions_hits(docs)
+    return docs
+
+def tag_sanctions_hits(docs):
+    """
+    Screens every chunk against the sanctions lists (one automaton pass each) and
+    sets metadata["sanctions_hits"] to the listed entities it mentions, other than
+    the owner its source file is named after.
+    """
+    with TRACER.span("sanctions_scan", "ingest.sanctions", chunks=len(docs)) as span:
+        flagged = set()
+        for d in docs:
+            d.metadata["sanctions_hits"] = document_hits(d.page_content, d.metadata.get("source"))
+            flagged.update(d.metadata["sanctions_hits"])
+        span.set(entities=len(flagged))
+    if flagged:
+        hits = sum(1 for d in docs if d.metadata["sanctions_hits"])
+        print(f"🚨 Sanctions screening: {hits} chunks mention {', '.join(sorted(flagged))}")
+
+def to_kb_entries(docs):
+    """
+    Local backup entries ({"source", "content", "section_ids", "citations", "sanctions_hits", "chunk_id"} + partition fields)
+    for st.session_state.kb_text.
+    """
+    entries = []
     for d in docs:
         source = d.metadata.get("source", "Unknown")
         # Enhance source with Page Number if available (PDFs)
@@ -74,28 +212,90 @@ def _split_and_index(documents, index_name):
         if page is not None:
             source = f"{source} (Page {int(page) + 1})"
             
-        st.session_state.kb_text.append({
+        entries.append({
             "source": source,
-            "content": d.page_content
+            "content": d.page_content,
+            "section_ids": d.metadata.get("section_ids", []),
+            "citations": d.metadata.get("citations", []),
+            "sanctions_hits": d.metadata.get("sanctions_hits", []),
+            "chunk_id": d.metadata.get("chunk_id"),
+            **{field: d.metadata[field] for field in PARTITION_FIELDS if field in d.metadata},
         })
-    print(f"💾 Stored {len(docs)} chunks in local backup memory.")
-    # -----------------------------------------------
+    return entries
+
+def save_snapshot(entries):
+    """
+    Merges freshly indexed chunks (with their embeddings) into the on-disk KB snapshot (kb_snapshot.py).
+    """
+    try:
+        export_snapshot(entries)
+    except Exception as e:
+        # The chunks are indexed already; a missing snapshot only costs the next cold start
+        print(f"⚠️ Knowledge base snapshot failed: {e}")
 
+def index_documents(docs, index_name, progress=None, fallback_to_local=True):
+    """
+    Embeds and stores chunks in Elasticsearch (if configured).
+    With `progress`, indexes in INDEX_BATCH_SIZE batches and calls progress(chunks_done) after each.
+    fallback_to_local=False re-raises embedding/indexing errors instead of carrying on
+    with the local backup, so a background job fails and is retried (jobs.JobQueue.fail).
+    """
     print(f"🧩 Split into {len(docs)} chunks. Indexing to '{index_name}'...")
     
     # Store in Elasticsearch (if configured)
     if os.getenv("ELASTIC_CLOUD_ID"):
         try:
-            vector_store = ElasticsearchStore.from_documents(
-                docs,
-                embedding=OpenAIEmbeddings(),
-                es_cloud_id=os.getenv("ELASTIC_CLOUD_ID"),
-                es_api_key=os.getenv("ELASTIC_API_KEY"),
-                index_name=index_name,
-                strategy=ElasticsearchStore.ApproxRetrievalStrategy() # Uses HNSW
-            )
+            batch_size = INDEX_BATCH_SIZE if progress else len(docs)
+            # Chunks embedded before (this process, or the loaded snapshot) aren't paid for again
+            embeddings = CachedEmbeddings(OpenAIEmbeddings(**embedding_kwargs()))
+            with TRACER.span("es_index", "ingest.index", chunks=len(docs), index=index_name) as span:
+                vector_store = None
+                for start in range(0, len(docs), batch_size):
+                    batch = docs[start:start + batch_size]
+                    if vector_store is None:
+                        vector_store = ElasticsearchStore.from_documents(
+                            batch,
+                            embedding=TracingEmbeddings(embeddings),
+                            es_cloud_id=os.getenv("ELASTIC_CLOUD_ID"),
+                            es_api_key=os.getenv("ELASTIC_API_KEY"),
+                            index_name=index_name,
+                            strategy=es_strategy() # HNSW, optionally over quantized vectors
+                        )
+                    else:
+                        vector_store.add_documents(batch)
+                    if progress:
+                        progress(start + len(batch))
+                span.set(embedding_cache_hits=embeddings.hits)
             print("✅ Indexing Complete!")
         except Exception as e:
+            # Let cooperative cancellation (and, for jobs, every failure) through;
+            # otherwise fall back to the local backup
+            if isinstance(e, IngestCancelled) or not fallback_to_local:
+                raise
             print(f"⚠️ Elastic Indexing failed (using local backup): {e}")
     else:
         print("⚠️ Elastic not configured. Using local backup only.")
+        if progress:
+            progress(len(docs))
+
+import streamlit as st
+
+def _split_and_index(documents, index_name=None, partition=None):
+    index_name = index_name or _index_name(partition)
+    # Split into Chunks
+    docs = split_documents(documents, partition)
+
+    if not docs:
+         print("⚠️ No content found to index.")
+         return
+
+    # --- BACKUP: Store in Session State for Demo ---
+    if "kb_text" not in st.session_state:
+        st.session_state.kb_text = []
+    entries = to_kb_entries(docs)
+    st.session_state.kb_text.extend(entries)
+    print(f"💾 Stored {len(docs)} chunks in local backup memory.")
+    # -----------------------------------------------
+
+    index_documents(docs, index_name)
+    save_snapshot(entries)
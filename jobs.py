@@ -0,0 +1,391 @@
+"""
+Background ingestion queue: a SQLite job table plus worker processes.
+
+The Streamlit app only submits jobs and polls their status, so indexing keeps
+running when the browser refreshes. Workers can also run standalone:
+
+    python jobs.py --workers 2
+"""
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import argparse
+import threading
+import multiprocessing
+from contextlib import contextmanager
+
+from partitions import index_for
+
+JOBS_DB = os.getenv("JURISLENS_JOBS_DB", "jurislens_jobs.sqlite3")
+# Uploaded PDFs are spooled here until a worker has finished with them
+UPLOAD_DIR = os.getenv("JURISLENS_UPLOAD_DIR", "uploads")
+WORKERS = int(os.getenv("JURISLENS_INGEST_WORKERS", "2"))
+
+MAX_ATTEMPTS = 3
+POLL_INTERVAL = 1.0
+# A running job whose worker hasn't heartbeated for this long is assumed dead and requeued
+STALE_AFTER = 120.0
+# Workers heartbeat on a timer too, so one long step (a big PDF load) doesn't look like a dead worker
+KEEPALIVE_INTERVAL = STALE_AFTER / 4
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    owner TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    target TEXT NOT NULL,
+    label TEXT NOT NULL,
+    index_name TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT NOT NULL DEFAULT '',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    partition TEXT,
+    result TEXT,
+    error TEXT,
+    worker TEXT,
+    created_at REAL NOT NULL,
+    available_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    heartbeat_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, available_at);
+CREATE INDEX IF NOT EXISTS jobs_owner ON jobs (owner, status);
+"""
+
+# Fair scheduling: prefer the owner with the fewest running jobs, then the owner
+# served least recently, then FIFO. One user's 50 uploads can't starve another's one.
+_CLAIM_SQL = """
+SELECT j.id FROM jobs j
+WHERE j.status = 'queued' AND j.cancel_requested = 0 AND j.available_at <= ?
+ORDER BY
+    (SELECT COUNT(*) FROM jobs r WHERE r.owner = j.owner AND r.status = 'running'),
+    COALESCE((SELECT MAX(s.started_at) FROM jobs s WHERE s.owner = j.owner), 0),
+    j.id
+LIMIT 1
+"""
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobQueue:
+    def __init__(self, db_path=JOBS_DB):
+        self.db_path = db_path
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            # Databases created before tenant partitioning lack the column
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "partition" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN partition TEXT")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        # WAL lets the app poll while workers write
+        conn.execute("PRAGMA journal_mode=WAL")
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    # --- Producer side (the app) ---
+    def submit(self, owner, kind, target, label=None, index_name=None, partition=None, max_attempts=MAX_ATTEMPTS):
+        """
+        partition: tenant/jurisdiction/effective_date metadata (partitions.partition_metadata);
+        index_name defaults to the tenant's index.
+        """
+        now = time.time()
+        index_name = index_name or index_for((partition or {}).get("tenant"))
+        with self._connect() as conn:
+            cur = conn.execute(
+                "INSERT INTO jobs (owner, kind, target, label, index_name, partition, max_attempts, created_at, available_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (owner, kind, target, label or target, index_name, json.dumps(partition) if partition else None,
+                 max_attempts, now, now),
+            )
+            return cur.lastrowid
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row_to_job(row) if row else None
+
+    def list_jobs(self, owner=None, limit=50):
+        """
+        Newest first, without the (possibly large) result payload.
+        """
+        query = "SELECT id, owner, kind, label, status, progress, message, attempts, error, created_at, finished_at FROM jobs"
+        params = ()
+        if owner is not None:
+            query += " WHERE owner = ?"
+            params = (owner,)
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY id DESC LIMIT ?", params + (limit,)).fetchall()
+        return [dict(r) for r in rows]
+
+    def cancel(self, job_id):
+        """
+        Queued jobs are cancelled immediately; running jobs stop at their next progress update.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status IN ('queued', 'running')", (job_id,))
+            conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ?, message = 'Cancelled' WHERE id = ? AND status = 'queued'",
+                (now, job_id),
+            )
+
+    def retry(self, job_id):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', attempts = 0, cancel_requested = 0, error = NULL, progress = 0, "
+                "message = 'Retrying', available_at = ? WHERE id = ? AND status IN ('failed', 'cancelled')",
+                (now, job_id),
+            )
+
+    # --- Consumer side (workers) ---
+    def claim(self, worker_id):
+        now = time.time()
+        with self._connect() as conn:
+            # IMMEDIATE takes the write lock up front, so two workers can't claim the same job
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(_CLAIM_SQL, (now,)).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'running', worker = ?, attempts = attempts + 1, started_at = ?, "
+                        "heartbeat_at = ?, message = 'Starting' WHERE id = ?",
+                        (worker_id, now, now, row["id"]),
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return self.get(row["id"]) if row else None
+
+    def heartbeat(self, job_id, progress, message):
+        """
+        Records progress; raises JobCancelled if a cancel was requested meanwhile.
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET progress = ?, message = ?, heartbeat_at = ? WHERE id = ?",
+                (round(progress, 3), message, time.time(), job_id),
+            )
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row and row["cancel_requested"]:
+            raise JobCancelled(f"Job {job_id} cancelled")
+
+    def touch(self, job_id, worker_id):
+        """
+        Heartbeat without progress, while the job is still running on this worker.
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = 'running' AND worker = ?",
+                (time.time(), job_id, worker_id),
+            )
+
+    def complete(self, job_id, result):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'done', progress = 1, message = 'Done', result = ?, finished_at = ? WHERE id = ?",
+                (json.dumps(result), time.time(), job_id),
+            )
+
+    def mark_cancelled(self, job_id):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'cancelled', message = 'Cancelled', finished_at = ? WHERE id = ?",
+                (time.time(), job_id),
+            )
+
+    def fail(self, job_id, error):
+        """
+        Requeues with exponential backoff until max_attempts, then marks the job failed.
+        Returns True if the job will be retried.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT attempts, max_attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row and row["attempts"] < row["max_attempts"]:
+                delay = 2 ** row["attempts"]
+                conn.execute(
+                    "UPDATE jobs SET status = 'queued', error = ?, message = ?, available_at = ? WHERE id = ?",
+                    (error, f"Retrying in {delay}s: {error}", now + delay, job_id),
+                )
+                return True
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, message = 'Failed', finished_at = ? WHERE id = ?",
+                (error, now, job_id),
+            )
+            return False
+
+    def requeue_stale(self, stale_after=STALE_AFTER):
+        """
+        Puts jobs whose worker died mid-run back on the queue, or marks them failed
+        once they've used up max_attempts (a job that kills its worker would loop
+        forever otherwise). Returns the jobs it gave up on.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                stale = conn.execute(
+                    "SELECT * FROM jobs WHERE status = 'running' AND heartbeat_at < ?", (now - stale_after,)
+                ).fetchall()
+                failed = [row for row in stale if row["attempts"] >= row["max_attempts"]]
+                for row in stale:
+                    if row["attempts"] >= row["max_attempts"]:
+                        conn.execute(
+                            "UPDATE jobs SET status = 'failed', error = ?, message = 'Failed', finished_at = ? WHERE id = ?",
+                            (f"Worker lost {row['attempts']} times", now, row["id"]),
+                        )
+                    else:
+                        conn.execute(
+                            "UPDATE jobs SET status = 'queued', message = 'Requeued (worker lost)', available_at = ? WHERE id = ?",
+                            (now, row["id"]),
+                        )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return [_row_to_job(row) for row in failed]
+
+
+def _row_to_job(row):
+    job = dict(row)
+    job["result"] = json.loads(job["result"]) if job.get("result") else None
+    job["partition"] = json.loads(job["partition"]) if job.get("partition") else None
+    return job
+
+
+def spool_upload(name, data, upload_dir=UPLOAD_DIR):
+    """
+    Saves uploaded bytes where a worker process can read them; returns the path.
+    """
+    os.makedirs(upload_dir, exist_ok=True)
+    path = os.path.join(upload_dir, f"{uuid.uuid4().hex}_{os.path.basename(name)}")
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def execute_job(queue, job):
+    from ingest import IngestCancelled, run_ingest_job
+
+    def progress(fraction, message):
+        try:
+            queue.heartbeat(job["id"], fraction, message)
+        except JobCancelled as e:
+            raise IngestCancelled(str(e))
+
+    try:
+        with _keepalive(queue, job):
+            entries = run_ingest_job(job["kind"], job["target"], job["index_name"], progress=progress, partition=job["partition"])
+    except IngestCancelled:
+        queue.mark_cancelled(job["id"])
+        print(f"🛑 Job {job['id']} cancelled: {job['label']}")
+        _cleanup(job)
+        return
+    except Exception as e:
+        retrying = queue.fail(job["id"], str(e))
+        print(f"⚠️ Job {job['id']} failed ({'retrying' if retrying else 'giving up'}): {e}")
+        if not retrying:
+            _cleanup(job)
+        return
+
+    queue.complete(job["id"], entries)
+    print(f"✅ Job {job['id']} done: {job['label']} ({len(entries)} chunks)")
+    _cleanup(job)
+
+
+@contextmanager
+def _keepalive(queue, job, interval=KEEPALIVE_INTERVAL):
+    """
+    Heartbeats `job` every `interval` seconds until the block exits.
+    """
+    stopped = threading.Event()
+
+    def beat():
+        while not stopped.wait(interval):
+            try:
+                queue.touch(job["id"], job["worker"])
+            except sqlite3.Error:
+                pass  # The next beat or progress update will try again
+
+    thread = threading.Thread(target=beat, name=f"job-{job['id']}-keepalive", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        thread.join()
+
+
+def _cleanup(job):
+    # Spooled uploads are owned by the queue; URLs have nothing to remove
+    if job["kind"] == "pdf" and os.path.abspath(job["target"]).startswith(os.path.abspath(UPLOAD_DIR)):
+        try:
+            os.remove(job["target"])
+        except OSError:
+            pass
+
+
+def run_worker(db_path=JOBS_DB, worker_id=None, poll_interval=POLL_INTERVAL, stop_when_idle=False):
+    """
+    Claims and executes jobs until killed (or until the queue is empty with stop_when_idle).
+    """
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    queue = JobQueue(db_path)
+    print(f"👷 Ingestion worker {worker_id} polling {db_path}")
+    while True:
+        for lost in queue.requeue_stale():
+            print(f"⚠️ Job {lost['id']} failed: its worker was lost {lost['attempts']} times")
+            _cleanup(lost)
+        job = queue.claim(worker_id)
+        if job is None:
+            if stop_when_idle:
+                return
+            time.sleep(poll_interval)
+            continue
+        execute_job(queue, job)
+
+
+def start_workers(count=WORKERS, db_path=JOBS_DB):
+    """
+    Spawns `count` daemon worker processes (spawn, not fork: the parent may be a threaded Streamlit server).
+    """
+    ctx = multiprocessing.get_context("spawn")
+    processes = []
+    for n in range(count):
+        p = ctx.Process(target=run_worker, kwargs={"db_path": db_path}, name=f"jurislens-ingest-{n}", daemon=True)
+        p.start()
+        processes.append(p)
+    return processes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run JurisLens background ingestion workers.")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--db", default=JOBS_DB)
+    args = parser.parse_args()
+
+    workers = start_workers(args.workers, args.db)
+    try:
+        for p in workers:
+            p.join()
+    except KeyboardInterrupt:
+        print("\n👋 Stopping workers.")
@@ -0,0 +1,583 @@
+"""
+Versioned on-disk snapshots of the local knowledge base, so a new pod or a
+restarted app starts with the KB already loaded and without embedding anything.
+
+A snapshot is a directory under JURISLENS_SNAPSHOT_DIR (default "kb_snapshots",
+"" disables snapshots), named after its creation time and content hash:
+
+    manifest.json        format version, counts, embedding model, file sizes
+    chunks.bin           chunk texts, UTF-8, back to back
+    chunk_starts.npy     byte offset of each chunk in chunks.bin (+ end)
+    metadata.jsonl       one kb_text entry per line, without its content
+    vectors.npy          embeddings, one row per distinct chunk text: float32, or int8
+                         codes when vector compression is on (vector_compression.snapshot_codec).
+                         Only float32 vectors are reused as embeddings.
+    vector_lo.npy        int8 codes only: offset and step of each row (copied as they
+    vector_scale.npy     are into later versions, so merged rows never drift)
+    vector_keys.npy      content key of each vectors.npy row
+    terms.txt            keyword index vocabulary, one token per line
+    term_starts.npy      character offset of each token in terms.txt
+    postings.npy         chunk rows of each token, back to back
+    posting_starts.npy   offset of each token's rows in postings.npy (+ end)
+
+The .npy files are memory-mapped on load. The CURRENT file names the live
+version and is swapped atomically, so readers never see a half-written snapshot.
+
+Ingestion exports after every successful index (merging into the current
+snapshot), the app loads each new current version once per process, and ingestion
+reuses its embeddings (EMBEDDING_CACHE) instead of paying for them again.
+
+    python kb_snapshot.py              # describe the current snapshot
+    python kb_snapshot.py --reindex    # re-index it into Elasticsearch, zero embedding calls
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import argparse
+import threading
+from itertools import chain
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from vector_compression import QuantizedVectors, snapshot_codec
+
+FORMAT_VERSION = 1
+SNAPSHOT_DIR = "kb_snapshots"
+KEEP_VERSIONS = 3  # older snapshot directories are deleted after an export
+LOCK_TIMEOUT = 60.0
+STALE_LOCK_AFTER = 300.0  # a lock file older than this is left over from a crashed export
+
+_CURRENT = "CURRENT"
+_LOCK = ".lock"
+
+
+def snapshot_dir():
+    """
+    Configured snapshot directory, or None when snapshots are disabled.
+    Read on every call so tests and benchmarks can redirect it.
+    """
+    return os.getenv("JURISLENS_SNAPSHOT_DIR", SNAPSHOT_DIR) or None
+
+
+def text_key(text):
+    """
+    Content key of a chunk text (embeddings depend on the text only, not on its source).
+    """
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+def embedding_model(embeddings):
+    """
+    Identifies what produced a vector: model name plus requested dimensions.
+    """
+    model = getattr(embeddings, "model", None) or type(embeddings).__name__
+    dims = getattr(embeddings, "dimensions", None) or getattr(embeddings, "dims", None)
+    return f"{model}:{dims}" if dims else model
+
+
+# --- Keyword index ---
+
+def _build_segment(contents, first_row):
+    """
+    Inverted index over the lowercased whitespace tokens of `contents`.
+    A query term occurs in a chunk exactly when it occurs inside one of its
+    tokens, which is what the local keyword search checks.
+    """
+    postings = {}
+    for row, content in enumerate(contents, first_row):
+        for token in set(content.lower().split()):
+            postings.setdefault(token, []).append(row)
+    tokens = sorted(postings)
+    lengths = [len(token) + 1 for token in tokens]
+    return {
+        "terms": "\n".join(tokens),
+        "term_starts": np.cumsum([0] + lengths[:-1], dtype=np.int64) if tokens else np.zeros(0, np.int64),
+        "postings": np.fromiter(chain.from_iterable(postings[t] for t in tokens), dtype=np.int32),
+        "posting_starts": np.cumsum([0] + [len(postings[t]) for t in tokens], dtype=np.int64),
+    }
+
+
+class KeywordIndex:
+    """
+    Term -> chunk rows for the local keyword search, made of immutable segments:
+    the snapshot's (memory-mapped) plus one per batch of chunks added since.
+    A query term is found by scanning each segment's vocabulary string, which is
+    far smaller than the chunk texts themselves.
+    """
+
+    def __init__(self, segments=(), size=0):
+        self.segments = list(segments)
+        self.size = size  # chunk rows covered
+
+    def add(self, contents):
+        contents = list(contents)
+        if contents:
+            self.segments.append(_build_segment(contents, self.size))
+            self.size += len(contents)
+
+    def rows(self, term):
+        found = []
+        for segment in self.segments:
+            terms, term_starts = segment["terms"], segment["term_starts"]
+            position = terms.find(term)
+            while position != -1:
+                i = int(np.searchsorted(term_starts, position, side="right")) - 1
+                found.append(segment["postings"][segment["posting_starts"][i]:segment["posting_starts"][i + 1]])
+                # Continue after this token: one match per token is enough
+                position = terms.find(term, int(term_starts[i + 1]) if i + 1 < len(term_starts) else len(terms))
+        return np.unique(np.concatenate(found)) if found else np.zeros(0, np.int32)
+
+    def hits(self, terms):
+        """
+        {row: number of `terms` (with repeats) occurring in that chunk}.
+        """
+        counts = {}
+        for term in terms:
+            for row in self.rows(term).tolist():
+                counts[row] = counts.get(row, 0) + 1
+        return counts
+
+
+def session_keyword_index(state):
+    """
+    Keyword index over state.kb_text, kept in state.kb_index and extended as
+    chunks are appended (kb_text only ever grows; a replaced list is re-indexed).
+    """
+    kb = state.get("kb_text") or []
+    index = state.get("kb_index")
+    if index is None or state.get("kb_index_source") is not kb or index.size > len(kb):
+        index = KeywordIndex()
+    if index.size < len(kb):
+        index.add(item["content"] for item in kb[index.size:])
+    state["kb_index"] = index
+    state["kb_index_source"] = kb
+    return index
+
+
+# --- Embedding cache ---
+
+class EmbeddingCache:
+    """
+    Chunk embeddings by (model, content key): the current snapshot's vectors
+    (memory-mapped) plus those computed since, until the next export writes them out.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.model = None
+        self._rows = {}
+        self._vectors = None
+        self._added = {}
+        self.last_model = None  # model of the most recently computed vectors
+
+    def ensure_loaded(self):
+        # Worker processes never see the app's cache; they seed theirs on first use
+        if not self._loaded:
+            self.seed(load_snapshot())
+
+    def seed(self, snapshot):
+        with self._lock:
+            self._loaded = True
+            if snapshot is None or snapshot.vectors is None:
+                return
+            model = snapshot.manifest["embedding_model"]
+            keys = {key: row for row, key in enumerate(snapshot.vector_keys.astype(str).tolist())}
+            for key in [k for k in self._added if k[0] == model and k[1] in keys]:
+                del self._added[key]
+            if isinstance(snapshot.vectors, QuantizedVectors):
+                # Decoded int8 codes are lossy; sent to ES they'd be quantized a second time.
+                # Those chunks are embedded again instead.
+                self.model, self._vectors, self._rows = None, None, {}
+                return
+            self.model = model
+            self._vectors = snapshot.vectors
+            self._rows = keys
+
+    def get(self, model, key):
+        with self._lock:
+            vector = self._added.get((model, key))
+            if vector is None and model == self.model and key in self._rows:
+                vector = self._vectors[self._rows[key]]
+            return vector
+
+    def put(self, model, key, vector):
+        with self._lock:
+            self._added[(model, key)] = np.asarray(vector, dtype=np.float32)
+            self.last_model = model
+
+    def added(self, model):
+        with self._lock:
+            return {key: vector for (m, key), vector in self._added.items() if m == model}
+
+
+EMBEDDING_CACHE = EmbeddingCache()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps an Embeddings object so chunk texts embedded before (in this process or
+    in the loaded snapshot) are served from EMBEDDING_CACHE. Queries pass through.
+    """
+
+    def __init__(self, embeddings, cache=None):
+        self._embeddings = embeddings
+        self._cache = cache or EMBEDDING_CACHE
+        self._cache.ensure_loaded()
+        self.model_key = embedding_model(embeddings)
+        self.hits = 0
+
+    def embed_documents(self, texts):
+        keys = [text_key(t) for t in texts]
+        vectors = [self._cache.get(self.model_key, key) for key in keys]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        self.hits += len(texts) - len(missing)
+        if missing:
+            fresh = self._embeddings.embed_documents([texts[i] for i in missing])
+            for i, vector in zip(missing, fresh):
+                self._cache.put(self.model_key, keys[i], vector)
+                vectors[i] = vector
+        return [np.asarray(v, dtype=np.float32).tolist() for v in vectors]
+
+    def embed_query(self, text):
+        return self._embeddings.embed_query(text)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._embeddings, name)
+
+
+# --- Snapshots ---
+
+class Snapshot:
+    """
+    A loaded snapshot: kb_text entries, memory-mapped vectors and keyword index.
+    """
+
+    def __init__(self, path, manifest, entries, vectors, vector_keys, keyword_segment):
+        self.path = path
+        self.manifest = manifest
+        self.entries = entries
+        self.vectors = vectors
+        self.vector_keys = vector_keys
+        self._keyword_segment = keyword_segment
+
+    @property
+    def version(self):
+        return self.manifest["version"]
+
+    def keyword_index(self):
+        """
+        A fresh KeywordIndex over `entries`, sharing the snapshot's segment.
+        """
+        return KeywordIndex([self._keyword_segment], len(self.entries))
+
+    def seed_session(self, state):
+        """
+        Gives a new session the snapshot's chunks and their keyword index.
+        """
+        state["kb_text"] = list(self.entries)
+        state["kb_index"] = self.keyword_index()
+        state["kb_index_source"] = state["kb_text"]
+
+
+def _load_npy(path):
+    try:
+        return np.load(path, mmap_mode="r")
+    except ValueError:
+        return np.load(path)  # Empty arrays can't be memory-mapped
+
+
+def current_version(directory=None):
+    directory = directory or snapshot_dir()
+    try:
+        with open(os.path.join(directory, _CURRENT), "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except (OSError, TypeError):
+        return None
+
+
+def load_snapshot(directory=None, version=None):
+    """
+    Loads a snapshot (default: the current one). Returns None if there is none or
+    it can't be read; a bad snapshot must never stop the app from starting.
+    """
+    directory = directory or snapshot_dir()
+    version = version or current_version(directory)
+    if not directory or not version:
+        return None
+    path = os.path.join(directory, version)
+    try:
+        with open(os.path.join(path, "manifest.json"), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format") != FORMAT_VERSION:
+            print(f"⚠️ Snapshot {version} has format {manifest.get('format')}, expected {FORMAT_VERSION}; ignoring it.")
+            return None
+        for name, size in manifest["files"].items():
+            if os.path.getsize(os.path.join(path, name)) != size:
+                raise ValueError(f"{name} is truncated")
+
+        chunk_starts = _load_npy(os.path.join(path, "chunk_starts.npy")).tolist()
+        with open(os.path.join(path, "chunks.bin"), "rb") as f:
+            blob = f.read()
+        entries = []
+        with open(os.path.join(path, "metadata.jsonl"), "r", encoding="utf-8") as f:
+            for row, line in enumerate(f):
+                entry = json.loads(line)
+                entry["content"] = blob[chunk_starts[row]:chunk_starts[row + 1]].decode("utf-8")
+                entries.append(entry)
+
+        vectors = vector_keys = None
+        if manifest["vectors"]:
+            vectors = _load_npy(os.path.join(path, "vectors.npy"))
+            if manifest.get("vector_codec", "float32") == "int8":
+                vectors = QuantizedVectors(vectors, np.load(os.path.join(path, "vector_lo.npy")),
+                                           np.load(os.path.join(path, "vector_scale.npy")),
+                                           per_row=manifest.get("vector_scale") == "row")
+            vector_keys = _load_npy(os.path.join(path, "vector_keys.npy"))
+
+        with open(os.path.join(path, "terms.txt"), "r", encoding="utf-8", newline="") as f:
+            terms = f.read()
+        segment = {"terms": terms}
+        for name in ("term_starts", "postings", "posting_starts"):
+            segment[name] = _load_npy(os.path.join(path, f"{name}.npy"))
+        return Snapshot(path, manifest, entries, vectors, vector_keys, segment)
+    except (OSError, ValueError, KeyError, IndexError) as e:
+        print(f"⚠️ Could not load knowledge base snapshot {version}: {e}")
+        return None
+
+
+class _ExportLock:
+    """
+    Cross-process lock (an O_EXCL lock file), so concurrent ingest workers merge
+    their chunks one after another instead of overwriting each other's snapshot.
+    """
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, _LOCK)
+
+    def __enter__(self):
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while True:
+            try:
+                os.close(os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return self
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(self.path) > STALE_LOCK_AFTER:
+                        os.remove(self.path)
+                        continue
+                except OSError:
+                    continue
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Snapshot lock {self.path} is held")
+                time.sleep(0.05)
+
+    def __exit__(self, *exc):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def _entry_key(entry):
+    # The same chunk ingested for two partitions is two entries
+    return (entry.get("chunk_id") or text_key(entry["content"]),) + tuple(
+        str(entry.get(field)) for field in ("tenant", "jurisdiction", "effective_date"))
+
+
+def _save_npy(path, array, files):
+    np.save(path, array)
+    files[os.path.basename(path)] = os.path.getsize(path)
+
+
+def _int8_rows(wanted, added, previous, stored):
+    """
+    int8 rows for `wanted` keys: new vectors are encoded, rows the previous snapshot
+    already holds as per-row codes are copied as they are, so repeated exports don't
+    drift. Float32 (or older per-dimension) rows are encoded once.
+    """
+    reuse = isinstance(previous, QuantizedVectors) and previous.per_row
+    fresh = np.array([key in added or not reuse for key in wanted])
+    dims = len(next(iter(added.values()))) if added else previous.shape[1]
+    codes = np.empty((len(wanted), dims), dtype=np.uint8)
+    lo = np.empty(len(wanted), dtype=np.float32)
+    scale = np.empty(len(wanted), dtype=np.float32)
+    if fresh.any():
+        encoded = QuantizedVectors.encode(np.vstack(
+            [added[key] if key in added else previous[stored[key]] for key, new in zip(wanted, fresh) if new]
+        ).astype(np.float32))
+        codes[fresh], lo[fresh], scale[fresh] = encoded.codes, encoded.lo, encoded.scale
+    if not fresh.all():
+        rows = [stored[key] for key, new in zip(wanted, fresh) if not new]
+        codes[~fresh], lo[~fresh], scale[~fresh] = previous.codes[rows], previous.lo[rows], previous.scale[rows]
+    return QuantizedVectors(codes, lo, scale)
+
+
+def export_snapshot(entries, embedding_model=None, directory=None, cache=None):
+    """
+    Merges `entries` (kb_text entries) into the current snapshot and writes the
+    result as a new version. Vectors come from the embedding cache, for
+    `embedding_model` (default: the model last used, else the snapshot's);
+    entries indexed without embeddings (Elasticsearch off) are stored without.
+    Returns the new version name, or None when snapshots are disabled or nothing changed.
+    """
+    directory = directory or snapshot_dir()
+    if not directory:
+        return None
+    cache = cache or EMBEDDING_CACHE
+    os.makedirs(directory, exist_ok=True)
+
+    with _ExportLock(directory):
+        previous = load_snapshot(directory)
+        merged = {}
+        for entry in chain(previous.entries if previous else [], entries):
+            merged[_entry_key(entry)] = entry
+        merged = list(merged.values())
+
+        model = embedding_model or cache.last_model or (previous.manifest["embedding_model"] if previous else None)
+        stored = {}
+        if previous is not None and previous.vectors is not None and previous.manifest["embedding_model"] == model:
+            stored = {key: row for row, key in enumerate(previous.vector_keys.astype(str).tolist())}
+        added = cache.added(model) if model else {}
+        wanted = sorted({text_key(e["content"]) for e in merged} & (stored.keys() | added.keys()))
+        codec = snapshot_codec()
+
+        digest = hashlib.sha1()
+        for key in sorted(_entry_key(e) for e in merged):
+            digest.update("\x00".join(key).encode("utf-8"))
+        digest.update(f"{model}:{len(wanted)}:{codec}".encode("utf-8"))
+        if previous is not None and previous.manifest.get("digest") == digest.hexdigest():
+            return None
+
+        version = f"{time.strftime('%Y%m%dT%H%M%S')}-{digest.hexdigest()[:8]}"
+        tmp = os.path.join(directory, f".tmp-{uuid.uuid4().hex}")
+        os.makedirs(tmp)
+        files = {}
+
+        contents = [e["content"].encode("utf-8") for e in merged]
+        with open(os.path.join(tmp, "chunks.bin"), "wb") as f:
+            for content in contents:
+                f.write(content)
+        files["chunks.bin"] = os.path.getsize(os.path.join(tmp, "chunks.bin"))
+        _save_npy(os.path.join(tmp, "chunk_starts.npy"), np.cumsum([0] + [len(c) for c in contents], dtype=np.int64), files)
+        with open(os.path.join(tmp, "metadata.jsonl"), "w", encoding="utf-8") as f:
+            for entry in merged:
+                f.write(json.dumps({k: v for k, v in entry.items() if k != "content"}) + "\n")
+        files["metadata.jsonl"] = os.path.getsize(os.path.join(tmp, "metadata.jsonl"))
+
+        dims = None
+        if wanted:
+            if codec == "int8":
+                quantized = _int8_rows(wanted, added, previous.vectors if stored else None, stored)
+                _save_npy(os.path.join(tmp, "vectors.npy"), quantized.codes, files)
+                _save_npy(os.path.join(tmp, "vector_lo.npy"), quantized.lo, files)
+                _save_npy(os.path.join(tmp, "vector_scale.npy"), quantized.scale, files)
+                dims = quantized.shape[1]
+            else:
+                matrix = np.vstack([added[k] if k in added else previous.vectors[stored[k]] for k in wanted]).astype(np.float32)
+                _save_npy(os.path.join(tmp, "vectors.npy"), matrix, files)
+                dims = matrix.shape[1]
+            _save_npy(os.path.join(tmp, "vector_keys.npy"), np.array(wanted, dtype="S16"), files)
+
+        segment = _build_segment((e["content"] for e in merged), 0)
+        with open(os.path.join(tmp, "terms.txt"), "w", encoding="utf-8", newline="") as f:
+            f.write(segment["terms"])
+        files["terms.txt"] = os.path.getsize(os.path.join(tmp, "terms.txt"))
+        for name in ("term_starts", "postings", "posting_starts"):
+            _save_npy(os.path.join(tmp, f"{name}.npy"), segment[name], files)
+
+        manifest = {
+            "format": FORMAT_VERSION,
+            "version": version,
+            "created_at": time.time(),
+            "digest": digest.hexdigest(),
+            "chunks": len(merged),
+            "vectors": len(wanted),
+            "dims": int(dims) if dims else None,
+            "vector_codec": codec,
+            "vector_scale": "row" if codec == "int8" else None,
+            "embedding_model": model,
+            "terms": len(segment["term_starts"]),
+            "files": files,
+        }
+        with open(os.path.join(tmp, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+        os.replace(tmp, os.path.join(directory, version))
+        with open(os.path.join(directory, f"{_CURRENT}.tmp"), "w", encoding="utf-8") as f:
+            f.write(version)
+        os.replace(os.path.join(directory, f"{_CURRENT}.tmp"), os.path.join(directory, _CURRENT))
+        _prune(directory, keep=version)
+
+    # The vectors now live in the snapshot: serve them from there, not the heap
+    cache.seed(load_snapshot(directory, version))
+    print(f"💾 Knowledge base snapshot {version}: {len(merged)} chunks, {len(wanted)} vectors.")
+    return version
+
+
+def _prune(directory, keep):
+    versions = sorted(name for name in os.listdir(directory)
+                      if not name.startswith(".") and name != _CURRENT and os.path.isdir(os.path.join(directory, name)))
+    for name in versions[:-KEEP_VERSIONS]:
+        if name != keep:
+            # Other processes may still have it mapped; on Windows that makes this fail, harmlessly
+            shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+
+def reindex(snapshot, index_name=None):
+    """
+    Re-indexes a snapshot into Elasticsearch (e.g. a fresh cluster): every vector
+    comes from the snapshot, so no embedding calls are made for chunks it covers.
+    int8 snapshots (vector compression on) are re-embedded, so ES gets full-precision vectors.
+    """
+    from langchain_core.documents import Document
+    from ingest import index_documents
+    from partitions import index_for
+
+    EMBEDDING_CACHE.seed(snapshot)
+    if isinstance(snapshot.vectors, QuantizedVectors):
+        print("ℹ️ Snapshot vectors are int8 codes; re-embedding the chunks for full-precision ES vectors.")
+    by_index = {}
+    for entry in snapshot.entries:
+        metadata = {k: v for k, v in entry.items() if k != "content"}
+        target = index_name or index_for(entry.get("tenant"))
+        by_index.setdefault(target, []).append(Document(page_content=entry["content"], metadata=metadata))
+    for target, docs in by_index.items():
+        index_documents(docs, target)
+    return {target: len(docs) for target, docs in by_index.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or re-index the knowledge base snapshot.")
+    parser.add_argument("--dir", default=None, help="Snapshot directory (default: JURISLENS_SNAPSHOT_DIR or kb_snapshots).")
+    parser.add_argument("--version", help="Snapshot version (default: current).")
+    parser.add_argument("--reindex", action="store_true", help="Index the snapshot into Elasticsearch.")
+    parser.add_argument("--index", help="Target index for --reindex (default: each chunk's tenant index).")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    snapshot = load_snapshot(args.dir, args.version)
+    if snapshot is None:
+        print(f"ℹ️ No knowledge base snapshot in {args.dir or snapshot_dir()}.")
+        return 1
+    manifest = snapshot.manifest
+    vectors = f"{manifest['vectors']} vectors ({manifest['embedding_model']}, {manifest['dims']}d)" if manifest["vectors"] else "no vectors"
+    print(f"📦 {snapshot.path}: {manifest['chunks']} chunks, {vectors}, {manifest['terms']} terms, "
+          f"{sum(manifest['files'].values()) / 1024 ** 2:.1f} MB, loaded in {time.perf_counter() - start:.2f}s")
+    if args.reindex:
+        if not os.getenv("ELASTIC_CLOUD_ID"):
+            print("⚠️ ELASTIC_CLOUD_ID is not set; nothing to re-index into.")
+            return 1
+        print(f"✅ Re-indexed: {reindex(snapshot, args.index)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,417 @@
+"""
+Ledger change-stream consumer: tails the core banking ledger's transaction
+events and keeps rolling per-client / per-jurisdiction exposure in memory, so
+a risk check reads local state instead of querying the ledger.
+
+The stream stand-in is an append-only JSONL file (JURISLENS_LEDGER_STREAM,
+default "ledger_events.jsonl"; "" disables the consumer), one event per line:
+
+    {"event_id": "...", "ts": 1760870000.0, "client": "ACME-001", "jurisdiction": "Zylaria", "amount": 2500.0}
+
+Reversals are events with a negative amount. Byte offsets into the file play
+the role of Kafka offsets: the state is snapshotted together with its offset
+(JURISLENS_LEDGER_STATE), and a restarted consumer loads the snapshot and only
+replays the events after it.
+
+    python ledger_stream.py --demo                             # the demo's prior Zylaria transfer
+    python ledger_stream.py --publish ACME-001 Zylaria 1200    # append one event
+    python ledger_stream.py                                    # catch up, print exposure and lag
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import atexit
+import bisect
+import hashlib
+import argparse
+import threading
+from collections import deque
+
+from partitions import normalise_jurisdiction
+from tracing import percentile
+
+LEDGER_STREAM = "ledger_events.jsonl"
+LEDGER_STATE = "ledger_state.json"
+WINDOW_SECONDS = float(os.getenv("JURISLENS_LEDGER_WINDOW", "86400"))  # the rolling "daily" aggregate
+
+POLL_INTERVAL = 0.2
+READ_CHUNK = 1 << 20  # bytes read (and applied under one lock) at a time
+SNAPSHOT_EVERY = 10000  # events applied since the last snapshot
+SNAPSHOT_INTERVAL = 30.0  # seconds
+MAX_LAG_SAMPLES = 1000
+
+_STATE_FORMAT = 1
+_HEAD_BYTES = 256  # fingerprint of the stream file, to notice it was replaced
+
+
+def stream_path():
+    # Read on every call, like kb_snapshot.snapshot_dir(), so benchmarks can redirect it
+    return os.getenv("JURISLENS_LEDGER_STREAM", LEDGER_STREAM) or None
+
+
+def state_path():
+    return os.getenv("JURISLENS_LEDGER_STATE", LEDGER_STATE) or None
+
+
+def normalise_client(client):
+    return " ".join(str(client).split()).upper() if client and str(client).strip() else None
+
+
+def publish(event, path=None):
+    """
+    Appends one event to the stream (the producer side, for demos and load tests).
+    """
+    event = {"event_id": uuid.uuid4().hex, "ts": time.time(), **event}
+    with open(path or stream_path(), "a", encoding="utf-8") as f:
+        f.write(json.dumps(event) + "\n")
+    return event
+
+
+class RollingExposure:
+    """
+    Sum of amounts inside a sliding time window: events are kept in time order
+    and expire from the front, so every update and read is amortised O(1).
+    """
+
+    __slots__ = ("events", "total")
+
+    def __init__(self):
+        self.events = deque()
+        self.total = 0.0
+
+    @classmethod
+    def from_events(cls, events):
+        window = cls()
+        window.events = deque(events)
+        window.total = sum(amount for _, amount in events)
+        return window
+
+    def add(self, ts, amount):
+        if self.events and ts < self.events[-1][0]:
+            # Late event: keep the window sorted so expiry stays a pop from the front
+            items = list(self.events)
+            bisect.insort(items, (ts, amount))
+            self.events = deque(items)
+        else:
+            self.events.append((ts, amount))
+        self.total += amount
+
+    def expire(self, cutoff):
+        events = self.events
+        while events and events[0][0] <= cutoff:
+            self.total -= events.popleft()[1]
+        if not events:
+            self.total = 0.0  # No float drift once the window is empty
+        return self.total
+
+
+class LedgerConsumer:
+    """
+    Tails a JSONL event stream into in-memory rolling exposure windows.
+
+    recover() restores the last snapshot and replays the stream from its offset;
+    start() then keeps polling in a background thread. exposure() only reads
+    local state and never waits on the ledger.
+    """
+
+    def __init__(self, stream_path, state_path=None, window=WINDOW_SECONDS, clock=time.time):
+        self.stream_path = stream_path
+        self.state_path = state_path
+        self.window = window
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._reset()
+        self.recovered_from = None
+        self.recovery_seconds = None
+        self._lags = deque(maxlen=MAX_LAG_SAMPLES)
+
+    def _reset(self):
+        self._by_client = {}        # (client, jurisdiction) -> RollingExposure
+        self._by_jurisdiction = {}  # jurisdiction -> RollingExposure (all clients)
+        self.offset = 0
+        self.events = 0
+        self.skipped = 0
+        self.last_event_ts = None
+        self.last_applied_at = None
+        self._since_snapshot = 0
+        self._last_snapshot = time.monotonic()
+
+    # --- Reads ---
+    def exposure(self, jurisdiction, client=None):
+        """
+        Amount sent to `jurisdiction` inside the rolling window, by `client`
+        or, without one, by all clients together.
+        """
+        jurisdiction = normalise_jurisdiction(jurisdiction)
+        client = normalise_client(client)
+        with self._lock:
+            window = self._by_client.get((client, jurisdiction)) if client else self._by_jurisdiction.get(jurisdiction)
+            return window.expire(self.clock() - self.window) if window else 0.0
+
+    def clients_exposed(self, jurisdiction):
+        """
+        {client: exposure} for every client with transfers to `jurisdiction` inside the window.
+        """
+        jurisdiction = normalise_jurisdiction(jurisdiction)
+        cutoff = self.clock() - self.window
+        with self._lock:
+            exposures = {client: window.expire(cutoff) for (client, j), window in self._by_client.items() if j == jurisdiction}
+        return {client: total for client, total in exposures.items() if total}
+
+    def top_exposures(self, n=10):
+        """
+        [(jurisdiction, exposure)] across all clients, largest first.
+        """
+        with self._lock:
+            jurisdictions = list(self._by_jurisdiction)
+        return sorted(((j, self.exposure(j)) for j in jurisdictions), key=lambda item: item[1], reverse=True)[:n]
+
+    def metrics(self):
+        """
+        Consumer position and lag: bytes not yet consumed, age of the newest
+        applied event, and event-time -> applied-time lag of live events.
+        """
+        try:
+            behind = max(0, os.path.getsize(self.stream_path) - self.offset)
+        except OSError:
+            behind = None
+        with self._lock:
+            lags = list(self._lags)
+            return {
+                "events": self.events,
+                "offset": self.offset,
+                "behind_bytes": behind,
+                "last_event_age_s": round(self.clock() - self.last_event_ts, 3) if self.last_event_ts else None,
+                "lag_p50_ms": round(percentile(lags, 50), 1) if lags else None,
+                "lag_p95_ms": round(percentile(lags, 95), 1) if lags else None,
+                "windows": len(self._by_client),
+                "skipped": self.skipped,
+                "recovered_from": self.recovered_from,
+                "recovery_seconds": self.recovery_seconds,
+            }
+
+    # --- Consuming ---
+    def _apply(self, event, live):
+        jurisdiction = normalise_jurisdiction(event.get("jurisdiction"))
+        if not jurisdiction:
+            raise ValueError("event has no jurisdiction")
+        amount = float(event["amount"])
+        ts = float(event.get("ts") or self.clock())
+        client = normalise_client(event.get("client"))
+        cutoff = self.clock() - self.window
+        if ts > cutoff:
+            for table, key in ((self._by_client, (client, jurisdiction)), (self._by_jurisdiction, jurisdiction)):
+                window = table.get(key)
+                if window is None:
+                    window = table[key] = RollingExposure()
+                window.add(ts, amount)
+                window.expire(cutoff)
+        self.events += 1
+        self._since_snapshot += 1
+        self.last_event_ts = max(ts, self.last_event_ts or ts)
+        if live:
+            self._lags.append(max(0.0, (self.clock() - ts) * 1000.0))
+
+    def poll(self, live=True):
+        """
+        Applies every complete event appended since the last poll. Returns how many.
+        """
+        try:
+            size = os.path.getsize(self.stream_path)
+        except OSError:
+            return 0
+        if size < self.offset:
+            # Truncated or rotated: what we hold no longer matches the stream
+            print(f"⚠️ Ledger stream {self.stream_path} shrank; rebuilding exposure from the start.")
+            with self._lock:
+                self._reset()
+        applied = 0
+        with open(self.stream_path, "rb") as f:
+            while self.offset < size:
+                f.seek(self.offset)
+                data = f.read(min(READ_CHUNK, size - self.offset))
+                end = data.rfind(b"\n")
+                if end == -1:
+                    if len(data) == READ_CHUNK:
+                        raise ValueError(f"Ledger event at offset {self.offset} is longer than {READ_CHUNK} bytes")
+                    break  # A partially written last line; picked up on the next poll
+                with self._lock:
+                    for line in data[:end + 1].splitlines():
+                        if not line.strip():
+                            continue
+                        try:
+                            self._apply(json.loads(line), live)
+                            applied += 1
+                        except (ValueError, KeyError, TypeError) as e:
+                            self.skipped += 1
+                            if self.skipped <= 10:
+                                print(f"⚠️ Skipping bad ledger event: {e}")
+                    self.offset += end + 1
+                    self.last_applied_at = self.clock()
+        return applied
+
+    # --- Snapshot + replay ---
+    def _stream_head(self):
+        try:
+            with open(self.stream_path, "rb") as f:
+                return hashlib.sha1(f.read(_HEAD_BYTES)).hexdigest()
+        except OSError:
+            return None
+
+    def save_snapshot(self):
+        if not self.state_path:
+            return False
+        with self._lock:
+            cutoff = self.clock() - self.window
+            windows = []
+            # Windows that emptied out are dropped here rather than on every read
+            for (client, jurisdiction), window in list(self._by_client.items()):
+                window.expire(cutoff)
+                if not window.events:
+                    del self._by_client[(client, jurisdiction)]
+                    continue
+                windows.append([client, jurisdiction, list(window.events)])
+            for jurisdiction, window in list(self._by_jurisdiction.items()):
+                window.expire(cutoff)
+                if not window.events:
+                    del self._by_jurisdiction[jurisdiction]
+            state = {
+                "format": _STATE_FORMAT,
+                "offset": self.offset,
+                "events": self.events,
+                "last_event_ts": self.last_event_ts,
+                "stream_head": self._stream_head(),
+                "saved_at": time.time(),
+                "windows": windows,
+            }
+            self._since_snapshot = 0
+            self._last_snapshot = time.monotonic()
+        tmp = f"{self.state_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.state_path)
+        return True
+
+    def _load_snapshot(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return False
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable ledger snapshot {self.state_path}: {e}")
+            return False
+        if state.get("format") != _STATE_FORMAT or state.get("stream_head") != self._stream_head():
+            return False  # Different stream (or format): replay from the start instead
+        try:
+            if os.path.getsize(self.stream_path) < state["offset"]:
+                return False
+        except OSError:
+            return False
+        with self._lock:
+            self._reset()
+            merged = {}
+            for client, jurisdiction, events in state["windows"]:
+                events = [tuple(event) for event in events]  # Saved in time order
+                self._by_client[(client, jurisdiction)] = RollingExposure.from_events(events)
+                merged.setdefault(jurisdiction, []).extend(events)
+            for jurisdiction, events in merged.items():
+                events.sort()
+                self._by_jurisdiction[jurisdiction] = RollingExposure.from_events(events)
+            self.offset = state["offset"]
+            self.events = state["events"]
+            self.last_event_ts = state["last_event_ts"]
+        return True
+
+    def recover(self):
+        """
+        Snapshot + replay: restore the saved windows, then apply everything after their offset.
+        """
+        start = time.perf_counter()
+        self.recovered_from = "snapshot" if self._load_snapshot() else "replay"
+        replayed = self.poll(live=False)
+        self.recovery_seconds = round(time.perf_counter() - start, 3)
+        print(f"📒 Ledger consumer recovered from {self.recovered_from} "
+              f"({self.events} events, {replayed} replayed) in {self.recovery_seconds}s")
+        return replayed
+
+    def _run(self):
+        while not self._stop.wait(POLL_INTERVAL):
+            try:
+                self.poll()
+                if self._since_snapshot >= SNAPSHOT_EVERY or (
+                        self._since_snapshot and time.monotonic() - self._last_snapshot >= SNAPSHOT_INTERVAL):
+                    self.save_snapshot()
+            except Exception as e:
+                print(f"⚠️ Ledger consumer poll failed: {e}")
+
+    def start(self):
+        if self.recover() or self._since_snapshot:
+            self.save_snapshot()  # Checkpoint the recovered position before tailing
+        self._thread = threading.Thread(target=self._run, name="jurislens-ledger-consumer", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+        return self
+
+    def stop(self):
+        if self._thread is not None and not self._stop.is_set():
+            self._stop.set()
+            self._thread.join(timeout=5)
+            self.save_snapshot()
+
+
+_consumer = None
+_consumer_lock = threading.Lock()
+
+
+def get_ledger_consumer():
+    """
+    Process-wide consumer, recovered and started on first use. None when no
+    stream is configured or the stream file doesn't exist.
+    """
+    global _consumer
+    path = stream_path()
+    if not path or not os.path.exists(path):
+        return None
+    with _consumer_lock:
+        if _consumer is None or _consumer.stream_path != path:
+            if _consumer is not None:
+                _consumer.stop()
+            _consumer = LedgerConsumer(path, state_path()).start()
+    return _consumer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Publish to or inspect the ledger event stream.")
+    parser.add_argument("--stream", default=None, help="Stream file (default: JURISLENS_LEDGER_STREAM or ledger_events.jsonl).")
+    parser.add_argument("--demo", action="store_true", help="Append the demo client's prior $2,500 transfer to Zylaria.")
+    parser.add_argument("--publish", nargs=3, metavar=("CLIENT", "JURISDICTION", "AMOUNT"), help="Append one transfer event.")
+    args = parser.parse_args(argv)
+    path = args.stream or stream_path() or LEDGER_STREAM
+
+    if args.demo:
+        print(publish({"client": "DEMO-CLIENT", "jurisdiction": "Zylaria", "amount": 2500.0}, path))
+        return 0
+    if args.publish:
+        client, jurisdiction, amount = args.publish
+        print(publish({"client": client, "jurisdiction": jurisdiction, "amount": float(amount)}, path))
+        return 0
+
+    if not os.path.exists(path):
+        print(f"ℹ️ No ledger stream at {path}. Publish events with --demo or --publish.")
+        return 1
+    consumer = LedgerConsumer(path, state_path())
+    consumer.recover()
+    consumer.save_snapshot()
+    print(json.dumps(consumer.metrics(), indent=2))
+    for jurisdiction, total in consumer.top_exposures():
+        print(f"   {jurisdiction}: ${total:,.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
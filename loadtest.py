@@ -0,0 +1,296 @@
+"""
+JurisLens load test: how many concurrent analysts one process can serve.
+
+Drives N simulated sessions at once through the same code path as app.py:
+one shared agent (setup_agent_v3, as get_agent caches it), the three tools
+with their ledger/sanctions waits, and document ingestion. Each session runs
+on its own thread with its own session state, as Streamlit sessions do.
+OpenAI and Elasticsearch are the deterministic stand-ins in local_backends.py,
+with configurable latency.
+
+For each concurrency level it reports throughput, turn latency percentiles,
+slowdown and CPU use. Slowdown is each turn's latency over the same question
+answered alone. It also reports memory per session and the saturation point:
+the first level where adding sessions stops adding throughput or p95
+slowdown exceeds 2x.
+
+    python loadtest.py                                    # 1..64 sessions, 5 turns each
+    python loadtest.py --sessions 1,8,32,64 --turns 10 --llm-latency 0.8
+    python loadtest.py --planner-latency 0.1              # tiered model routing (model_routing.py)
+    python loadtest.py --output loadtest.json
+"""
+import io
+import sys
+import json
+import time
+import random
+import argparse
+import tracemalloc
+from contextlib import redirect_stdout
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.documents import Document
+
+from benchmarks.common import FILLER, build_corpus, load_golden
+from context_packing import pack_history
+from local_backends import LocalSessionState, ScriptedChatModel, ThreadSessionState, use_local_backends
+from partitions import DEFAULT_TENANT
+from tracing import TRACER, Tracer, TracingCallbackHandler, percentile
+
+SESSION_LEVELS = "1,2,4,8,16,32,64"
+# Saturated: the next level adds under this share of the throughput its extra sessions would ideally add
+# (doubling sessions: under +10%), or turns take this many times longer than alone (p95)
+SATURATION_GAIN = 0.10
+SATURATION_SLOWDOWN = 2.0
+
+
+class SimulatedSession:
+    """
+    One analyst: asks golden-set questions in a seeded order and now and then uploads a document.
+    """
+
+    def __init__(self, number, seed_entries, questions):
+        self.number = number
+        self.rng = random.Random(number)
+        self.questions = questions
+        # New sessions start from the shared knowledge base, like kb_snapshot.Snapshot.seed_session
+        self.state = LocalSessionState(kb_text=list(seed_entries), messages=[], tenant=DEFAULT_TENANT)
+        self.uploads = 0
+
+    def ask(self, agent, tracer):
+        question = self.rng.choice(self.questions)
+        self.state.messages.append({"role": "user", "content": question})
+        answer = agent.run(
+            input=question,
+            chat_history=pack_history(self.state.messages[:-1]),
+            callbacks=[TracingCallbackHandler(tracer)],
+        )
+        self.state.messages.append({"role": "assistant", "content": answer})
+        return question
+
+    def upload(self):
+        from ingest import _split_and_index
+
+        self.uploads += 1
+        lines = [f"Section {9000 + self.number}.{self.uploads}: Uploaded Client Policy"]
+        for rule in range(4):
+            words = " ".join(self.rng.choice(FILLER) for _ in range(20))
+            lines.append(f"Rule {9000 + self.number}.{self.uploads}.{rule + 1}: {words.capitalize()}.")
+        source = f"upload_{self.number}_{self.uploads}.pdf"
+        _split_and_index([Document(page_content="\n".join(lines), metadata={"source": source, "page": 0})])
+
+
+def calibrate(agent, seed_entries, questions, session_state):
+    """
+    Latency of every question answered by a lone session: the yardstick for slowdown under load.
+    """
+    session = SimulatedSession(-1, seed_entries, questions)
+    session_state.bind(session.state)
+    alone = {}
+    for question in questions:
+        session.rng = random.Random(0)
+        session.questions = [question]
+        t0 = time.perf_counter()
+        session.ask(agent, Tracer(export_path=None))
+        alone[question] = (time.perf_counter() - t0) * 1000.0
+    return alone
+
+
+def run_level(sessions, agent, seed_entries, questions, session_state, alone_ms, turns=5, ingest_every=0, think_time=0.0):
+    """
+    Runs `sessions` concurrent sessions for `turns` turns each. Returns throughput,
+    latency percentiles and slowdown (agent turns; uploads separately), errors and CPU use.
+    """
+    tracer = Tracer(export_path=None)
+    ask_ms, slowdown, upload_ms, errors = [], [], [], []
+    simulated = [SimulatedSession(n, seed_entries, questions) for n in range(sessions)]
+
+    def run_session(session):
+        session_state.bind(session.state)
+        for turn in range(turns):
+            if think_time:
+                time.sleep(session.rng.uniform(0, 2 * think_time))
+            uploading = ingest_every and (turn + 1) % ingest_every == 0
+            t0 = time.perf_counter()
+            try:
+                question = session.upload() if uploading else session.ask(agent, tracer)
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+                continue
+            elapsed = (time.perf_counter() - t0) * 1000.0
+            if uploading:
+                upload_ms.append(elapsed)
+            else:
+                ask_ms.append(elapsed)
+                slowdown.append(elapsed / alone_ms[question])
+
+    cpu, start = time.process_time(), time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions, thread_name_prefix="jurislens-loadtest") as pool:
+        list(pool.map(run_session, simulated))
+    wall, cpu = time.perf_counter() - start, time.process_time() - cpu
+
+    completed = len(ask_ms) + len(upload_ms)
+    return {
+        "sessions": sessions,
+        "turns": completed,
+        "errors": len(errors),
+        "seconds": round(wall, 2),
+        "turns_per_sec": round(completed / wall, 2) if wall else 0.0,
+        "p50_ms": round(percentile(ask_ms, 50), 1),
+        "p95_ms": round(percentile(ask_ms, 95), 1),
+        "p99_ms": round(percentile(ask_ms, 99), 1),
+        "slowdown_p95": round(percentile(slowdown, 95), 2),
+        "upload_p95_ms": round(percentile(upload_ms, 95), 1),
+        # Share of one core kept busy; pinned near 100% means the GIL is the ceiling
+        "cpu_pct": round(100.0 * cpu / wall, 1) if wall else 0.0,
+        "stages": tracer.stage_stats(),
+        "first_errors": errors[:3],
+    }
+
+
+def session_memory_mb(agent, seed_entries, questions, session_state, sessions=4):
+    """
+    Python heap held per live session after one turn (session state, history,
+    per-session indexes), net of process-wide caches warmed up beforehand.
+    """
+    warmup = SimulatedSession(-1, seed_entries, questions)
+    session_state.bind(warmup.state)
+    warmup.ask(agent, Tracer(export_path=None))
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        alive = []
+        for n in range(sessions):
+            session = SimulatedSession(n, seed_entries, questions)
+            session_state.bind(session.state)
+            session.ask(agent, Tracer(export_path=None))
+            alive.append(session)
+        used = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    return round(used / sessions / (1024 * 1024), 3)
+
+
+def find_saturation(levels):
+    """
+    First level where more sessions stop buying throughput, turns slow down past
+    SATURATION_SLOWDOWN or fail.
+    """
+    for previous, level in zip(levels, levels[1:]):
+        gain = level["turns_per_sec"] / previous["turns_per_sec"] - 1 if previous["turns_per_sec"] else 0.0
+        reasons = []
+        if gain < SATURATION_GAIN * (level["sessions"] / previous["sessions"] - 1):
+            reasons.append(f"throughput +{gain * 100:.0f}%")
+        if level["slowdown_p95"] > SATURATION_SLOWDOWN:
+            reasons.append(f"p95 slowdown {level['slowdown_p95']}x")
+        if level["errors"]:
+            reasons.append(f"{level['errors']} errors")
+        if reasons:
+            return {"saturated_at": level["sessions"], "max_sessions": previous["sessions"],
+                    "peak_turns_per_sec": max(l["turns_per_sec"] for l in levels), "reason": ", ".join(reasons)}
+    return {"saturated_at": None, "max_sessions": levels[-1]["sessions"],
+            "peak_turns_per_sec": max(l["turns_per_sec"] for l in levels), "reason": "not reached; add higher --sessions levels"}
+
+
+def run_loadtest(levels, turns=5, ingest_every=4, think_time=0.0, scale=50, llm_latency=0.5, planner_latency=0.0,
+                 embed_latency=0.05, search_latency=0.02, verbose=False):
+    from agent import setup_agent_v3
+
+    questions = [q["question"] for q in load_golden()]
+    session_state = ThreadSessionState()
+    if planner_latency:
+        from model_routing import TieredChatModel
+        llm = TieredChatModel(planner=ScriptedChatModel(latency=planner_latency, model_name="scripted-small"),
+                              synthesizer=ScriptedChatModel(latency=llm_latency, model_name="scripted-large"))
+    else:
+        llm = ScriptedChatModel(latency=llm_latency)
+
+    results = {"config": {"levels": levels, "turns": turns, "ingest_every": ingest_every, "think_time": think_time,
+                          "scale": scale, "llm_latency": llm_latency, "planner_latency": planner_latency,
+                          "embed_latency": embed_latency, "search_latency": search_latency}}
+    # Tool/ingest progress prints from dozens of threads would bury the report
+    output = sys.stdout if verbose else io.StringIO()
+    export_path, TRACER.export_path = TRACER.export_path, None
+    try:
+        with use_local_backends(embed_latency=embed_latency, search_latency=search_latency, session_state=session_state), \
+                redirect_stdout(output):
+            # One shared agent per process, as app.get_agent caches it
+            agent = setup_agent_v3("sk-local-loadtest", llm=llm)
+            agent.verbose = False
+
+            # The knowledge base every session starts from (already in "Elasticsearch")
+            from ingest import _split_and_index
+            session_state.bind(LocalSessionState())
+            _split_and_index(build_corpus(scale))
+            seed_entries = list(session_state.kb_text)
+
+            results["memory_per_session_mb"] = session_memory_mb(agent, seed_entries, questions, session_state)
+            alone_ms = calibrate(agent, seed_entries, questions, session_state)
+            results["levels"] = []
+            for sessions in levels:
+                level = run_level(sessions, agent, seed_entries, questions, session_state, alone_ms,
+                                  turns=turns, ingest_every=ingest_every, think_time=think_time)
+                results["levels"].append(level)
+                if verbose:
+                    print_level(level)
+    finally:
+        TRACER.export_path = export_path
+    results["saturation"] = find_saturation(results["levels"])
+    return results
+
+
+def print_level(level):
+    print(f"{level['sessions']:>8}  {level['turns_per_sec']:>9}  {level['p50_ms']:>9}  {level['p95_ms']:>9}  "
+          f"{level['p99_ms']:>9}  {level['slowdown_p95']:>8}x  {level['upload_p95_ms']:>10}  {level['cpu_pct']:>6}  {level['errors']:>6}")
+
+
+def print_report(results):
+    config = results["config"]
+    print("\n🏋️ JurisLens Load Test")
+    print("-----------------------------------")
+    print(f"LLM {config['llm_latency']}s" + (f" (planner {config['planner_latency']}s)" if config["planner_latency"] else "")
+          + f", embed {config['embed_latency']}s, kNN {config['search_latency']}s, "
+          f"{config['turns']} turns/session, upload every {config['ingest_every'] or '-'} turns")
+    print(f"{'sessions':>8}  {'turns/s':>9}  {'p50 ms':>9}  {'p95 ms':>9}  {'p99 ms':>9}  {'slowdown':>9}  {'upload p95':>10}  {'cpu %':>6}  {'errors':>6}")
+    for level in results["levels"]:
+        print_level(level)
+        for error in level["first_errors"]:
+            print(f"{'':>10}⚠️ {error}")
+    print(f"\n🧠 Memory per session: {results['memory_per_session_mb']} MB")
+    saturation = results["saturation"]
+    if saturation["saturated_at"]:
+        print(f"📈 Saturation: at {saturation['saturated_at']} sessions ({saturation['reason']}); "
+              f"up to {saturation['max_sessions']} sessions, peak {saturation['peak_turns_per_sec']} turns/s")
+    else:
+        print(f"📈 Saturation {saturation['reason']} (peak {saturation['peak_turns_per_sec']} turns/s)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for JurisLens (offline stand-ins).")
+    parser.add_argument("--sessions", default=SESSION_LEVELS, help="Comma-separated concurrency levels to sweep.")
+    parser.add_argument("--turns", type=int, default=5, help="Turns per session at every level.")
+    parser.add_argument("--ingest-every", type=int, default=4, help="Every Nth turn uploads a document (0 = never).")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Mean pause between a session's turns (s).")
+    parser.add_argument("--scale", type=int, default=50, help="Synthetic documents in the shared knowledge base.")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Simulated (large) LLM latency per call (s).")
+    parser.add_argument("--planner-latency", type=float, default=0.0, help="Route tool selection to a planner model this fast (s).")
+    parser.add_argument("--embed-latency", type=float, default=0.05, help="Simulated embedding latency (s).")
+    parser.add_argument("--search-latency", type=float, default=0.02, help="Simulated ES kNN latency (s).")
+    parser.add_argument("--verbose", action="store_true", help="Show tool output and each level as it finishes.")
+    parser.add_argument("--output", help="Also write the full results as JSON to this path.")
+    args = parser.parse_args(argv)
+
+    levels = sorted({int(n) for n in args.sessions.split(",") if n.strip()})
+    results = run_loadtest(levels, turns=args.turns, ingest_every=args.ingest_every, think_time=args.think_time,
+                           scale=args.scale, llm_latency=args.llm_latency, planner_latency=args.planner_latency,
+                           embed_latency=args.embed_latency, search_latency=args.search_latency, verbose=args.verbose)
+    print_report(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
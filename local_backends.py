@@ -0,0 +1,335 @@
+"""
+Deterministic local stand-ins for OpenAI, Elasticsearch and the Streamlit
+session, so the ingestion / retrieval / agent code paths can run offline
+(benchmarks, load tests) without network calls or API keys.
+"""
+import os
+import re
+import json
+import math
+import time
+import hashlib
+import threading
+from contextlib import contextmanager
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, FunctionMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from context_packing import count_tokens
+
+_WORD_RE = re.compile(r"[a-z0-9][a-z0-9.\-$]*")
+
+
+class LocalSessionState(dict):
+    """
+    Dict with attribute access, standing in for st.session_state outside `streamlit run`.
+    """
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        self[name] = value
+
+    def __delattr__(self, name):
+        del self[name]
+
+
+class ThreadSessionState:
+    """
+    st.session_state stand-in for many concurrent sessions in one process: each
+    thread sees its own LocalSessionState, as each Streamlit session's script
+    thread does. bind() attaches a thread to a given session.
+    """
+
+    def __init__(self):
+        object.__setattr__(self, "_local", threading.local())
+
+    def bind(self, state):
+        self._local.state = state
+
+    def current(self):
+        local = object.__getattribute__(self, "_local")
+        if not hasattr(local, "state"):
+            local.state = LocalSessionState()
+        return local.state
+
+    def __getattr__(self, name):
+        return getattr(self.current(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self.current(), name, value)
+
+    def __delattr__(self, name):
+        delattr(self.current(), name)
+
+    def __getitem__(self, key):
+        return self.current()[key]
+
+    def __setitem__(self, key, value):
+        self.current()[key] = value
+
+    def __delitem__(self, key):
+        del self.current()[key]
+
+    def __contains__(self, key):
+        return key in self.current()
+
+    def __iter__(self):
+        return iter(self.current())
+
+    def __len__(self):
+        return len(self.current())
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Bag-of-words feature hashing into a fixed-size unit vector.
+    Deterministic and offline, but still ranks passages that share terms with the query higher.
+    """
+
+    def __init__(self, dims=256, latency=0.0):
+        self.dims = dims
+        self.latency = latency
+        self.calls = 0
+
+    def _embed(self, text):
+        vector = [0.0] * self.dims
+        for word in _WORD_RE.findall(text.lower()):
+            digest = hashlib.md5(word.encode("utf-8")).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dims
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self._embed(text)
+
+
+class InMemoryElasticsearchStore:
+    """
+    Brute-force cosine kNN with the subset of the ElasticsearchStore API JurisLens uses.
+    Indices are shared at class level, like documents persisted in a real cluster.
+    """
+
+    indices = {}
+    search_latency = 0.0
+
+    def __init__(self, embedding=None, index_name="jurislens_docs", es_cloud_id=None, es_api_key=None, strategy=None, **kwargs):
+        self.embedding = embedding
+        self.index_name = index_name
+        self.indices.setdefault(index_name, [])
+
+    @staticmethod
+    def ApproxRetrievalStrategy(**kwargs):
+        return {"type": "approx", **kwargs}
+
+    @classmethod
+    def from_documents(cls, documents, embedding=None, index_name="jurislens_docs", **kwargs):
+        store = cls(embedding=embedding, index_name=index_name, **kwargs)
+        store.add_documents(documents)
+        return store
+
+    @classmethod
+    def reset(cls):
+        cls.indices = {}
+
+    def add_documents(self, documents):
+        documents = list(documents)
+        vectors = self.embedding.embed_documents([d.page_content for d in documents])
+        self.indices[self.index_name].extend(zip(vectors, documents))
+        return [str(i) for i in range(len(documents))]
+
+    def similarity_search_by_vector_with_relevance_scores(self, embedding, k=4, filter=None, **kwargs):
+        if self.search_latency:
+            time.sleep(self.search_latency)
+        scored = []
+        for vector, doc in self.indices.get(self.index_name, []):
+            # knn.filter is a pre-filter: excluded documents are never scored
+            if filter and not all(_filter_matches(clause, doc.metadata) for clause in filter):
+                continue
+            cosine = sum(a * b for a, b in zip(embedding, vector))
+            # Same normalisation ES applies to cosine similarity
+            scored.append(((1.0 + cosine) / 2.0, doc))
+        scored.sort(key=lambda x: x[0], reverse=True)
+        return [(doc, score) for score, doc in scored[:k]]
+
+    def similarity_search_with_score(self, query, k=4, **kwargs):
+        return self.similarity_search_by_vector_with_relevance_scores(self.embedding.embed_query(query), k=k, **kwargs)
+
+    def similarity_search(self, query, k=4, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, **kwargs)]
+
+
+def _metadata_value(metadata, field):
+    # "metadata.tenant.keyword" -> metadata["tenant"]
+    field = field[len("metadata."):] if field.startswith("metadata.") else field
+    return metadata.get(field[:-len(".keyword")] if field.endswith(".keyword") else field)
+
+
+def _filter_matches(clause, metadata):
+    """
+    Evaluates the ES query DSL subset partitions.es_filter() emits: term, terms, range, exists, bool.
+    """
+    kind, body = next(iter(clause.items()))
+    if kind == "term":
+        field, value = next(iter(body.items()))
+        return _metadata_value(metadata, field) == (value["value"] if isinstance(value, dict) else value)
+    if kind == "terms":
+        field, values = next(iter(body.items()))
+        return _metadata_value(metadata, field) in values
+    if kind == "exists":
+        return _metadata_value(metadata, body["field"]) is not None
+    if kind == "range":
+        field, bounds = next(iter(body.items()))
+        value = _metadata_value(metadata, field)
+        if value is None:
+            return False
+        checks = {"lte": lambda b: value <= b, "lt": lambda b: value < b, "gte": lambda b: value >= b, "gt": lambda b: value > b}
+        return all(checks[op](bound) for op, bound in bounds.items() if op in checks)
+    if kind == "bool":
+        as_list = lambda v: v if isinstance(v, list) else [v]
+        if not all(_filter_matches(c, metadata) for c in as_list(body.get("must", [])) + as_list(body.get("filter", []))):
+            return False
+        if any(_filter_matches(c, metadata) for c in as_list(body.get("must_not", []))):
+            return False
+        should = as_list(body.get("should", []))
+        if should:
+            needed = body.get("minimum_should_match", 1)
+            return sum(1 for c in should if _filter_matches(c, metadata)) >= needed
+        return True
+    raise ValueError(f"Unsupported filter clause in local stand-in: {kind}")
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Rule-based chat model that speaks the OpenAI function-calling protocol:
+    picks one tool from the question, then answers by quoting the tool output.
+    Reports token usage like ChatOpenAI so tracing/benchmarks can count it.
+    """
+
+    latency: float = 0.0
+    model_name: str = "scripted-local"
+    # Every Nth tool call drops a required argument (a sloppy small model); 0 = never
+    bad_args_every: int = 0
+    tool_calls_made: int = 0
+
+    @property
+    def _llm_type(self):
+        return "jurislens-scripted"
+
+    def _choose_call(self, question, function_names):
+        amount = re.search(r"\$\s?([\d,]+(?:\.\d+)?)", question)
+        onboard = re.search(r"onboard ([A-Z][\w'-]*(?: [A-Z][\w'-]*)*)", question)
+        if onboard and "check_sanctions_tool" in function_names:
+            return "check_sanctions_tool", {"name": onboard.group(1)}
+        if amount and "calculate_risk_tool" in function_names:
+            destination = re.search(r"\bto ([A-Z][\w-]*(?: [A-Z][\w-]*)*)", question)
+            return "calculate_risk_tool", {
+                "amount": float(amount.group(1).replace(",", "")),
+                "jurisdiction": destination.group(1) if destination else "Unknown",
+            }
+        if "search_regulations_tool" in function_names:
+            return "search_regulations_tool", {"query": question}
+        return None, None
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+
+        function_names = [f.get("name") for f in kwargs.get("functions") or []]
+        question = next((m.content for m in reversed(messages) if isinstance(m, HumanMessage)), "")
+        last = messages[-1] if messages else None
+
+        name, args = (None, None)
+        if not isinstance(last, FunctionMessage):
+            name, args = self._choose_call(question, function_names)
+            if name:
+                self.tool_calls_made += 1
+                if self.bad_args_every and self.tool_calls_made % self.bad_args_every == 0:
+                    args = dict(list(args.items())[1:])
+
+        if name:
+            message = AIMessage(content="", additional_kwargs={"function_call": {"name": name, "arguments": json.dumps(args)}})
+            completion = name + json.dumps(args)
+        else:
+            evidence = last.content if isinstance(last, FunctionMessage) else "No tool output."
+            message = AIMessage(content=f"Based on the retrieved evidence:\n\n{evidence}")
+            completion = message.content
+
+        prompt_tokens = sum(count_tokens(str(m.content)) for m in messages)
+        completion_tokens = count_tokens(completion)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        return ChatResult(
+            generations=[ChatGeneration(message=message)],
+            llm_output={"token_usage": usage, "model_name": self.model_name},
+        )
+
+    def _combine_llm_outputs(self, llm_outputs):
+        usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        for output in llm_outputs:
+            for key, value in ((output or {}).get("token_usage") or {}).items():
+                usage[key] = usage.get(key, 0) + value
+        return {"token_usage": usage, "model_name": self.model_name}
+
+
+@contextmanager
+def use_local_backends(embed_latency=0.0, search_latency=0.0, dims=256, session_state=None):
+    """
+    Points ingest.py and the regulation search tool at the in-memory stand-ins
+    and gives them a plain-dict session state (or `session_state`, e.g. a
+    ThreadSessionState for concurrent sessions). Restores everything on exit.
+    """
+    import streamlit as st
+    import ingest
+    import tools.regulation_search as regulation_search
+
+    embeddings = HashingEmbeddings(dims=dims, latency=embed_latency)
+    InMemoryElasticsearchStore.reset()
+    InMemoryElasticsearchStore.search_latency = search_latency
+
+    patches = [
+        (ingest, "ElasticsearchStore", InMemoryElasticsearchStore),
+        (ingest, "OpenAIEmbeddings", lambda *a, **kw: embeddings),
+        (regulation_search, "ElasticsearchStore", InMemoryElasticsearchStore),
+        (regulation_search, "OpenAIEmbeddings", lambda *a, **kw: embeddings),
+        (st, "session_state", session_state if session_state is not None else LocalSessionState()),
+    ]
+    saved_attrs = [(module, name, getattr(module, name, None)) for module, name, _ in patches]
+    saved_env = {key: os.environ.get(key) for key in ("ELASTIC_CLOUD_ID", "ELASTIC_API_KEY", "JURISLENS_SNAPSHOT_DIR", "JURISLENS_LEDGER_STREAM")}
+
+    for module, name, value in patches:
+        setattr(module, name, value)
+    os.environ["ELASTIC_CLOUD_ID"] = "local-stand-in"
+    os.environ["ELASTIC_API_KEY"] = "local-stand-in"
+    os.environ["JURISLENS_SNAPSHOT_DIR"] = ""  # Don't mix stand-in chunks into the real KB snapshot
+    os.environ["JURISLENS_LEDGER_STREAM"] = ""  # Risk checks use the simulated ledger query
+    try:
+        yield embeddings
+    finally:
+        for module, name, value in saved_attrs:
+            setattr(module, name, value)
+        for key, value in saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
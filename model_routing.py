@@ -0,0 +1,170 @@
+"""
+Tiered model routing for the agent: a fast, cheap planner model picks the
+tools and answers when it can; the large model is only called when the
+planner's tool call doesn't validate or its answer is cut off.
+
+    JURISLENS_MODEL_ROUTING=tiered|single   (single = every step on the synthesis model)
+    JURISLENS_PLANNER_MODEL=gpt-4o-mini
+    JURISLENS_SYNTHESIS_MODEL=gpt-4-turbo
+"""
+import os
+import json
+
+from langchain_core.callbacks import CallbackManager
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.outputs import ChatResult
+
+ROUTING = os.getenv("JURISLENS_MODEL_ROUTING", "tiered").lower()
+PLANNER_MODEL = os.getenv("JURISLENS_PLANNER_MODEL", "gpt-4o-mini")
+SYNTHESIS_MODEL = os.getenv("JURISLENS_SYNTHESIS_MODEL", "gpt-4-turbo")
+# A tool call is a few dozen tokens; an answer cut off at this length is escalated
+PLANNER_MAX_TOKENS = int(os.getenv("JURISLENS_PLANNER_MAX_TOKENS", "256"))
+
+_JSON_TYPES = {
+    "string": str,
+    "number": (int, float),
+    "integer": int,
+    "boolean": bool,
+    "array": list,
+    "object": dict,
+}
+
+
+def validate_function_call(function_call, functions):
+    """
+    Checks a {"name", "arguments"} function call against the offered function
+    schemas. Returns None if it's valid, else a short reason.
+    """
+    schemas = {f.get("name"): f.get("parameters") or {} for f in functions or []}
+    name = function_call.get("name")
+    if name not in schemas:
+        return f"unknown function {name!r}"
+    try:
+        arguments = json.loads(function_call.get("arguments") or "{}")
+    except ValueError:
+        return "arguments are not valid JSON"
+    if not isinstance(arguments, dict):
+        return "arguments are not an object"
+
+    properties = schemas[name].get("properties", {})
+    required = schemas[name].get("required", [])
+    missing = [key for key in required if key not in arguments]
+    if missing:
+        return f"missing {', '.join(missing)}"
+    for key, value in arguments.items():
+        if key not in properties:
+            return f"unexpected argument {key!r}"
+        if value is None and key not in required:
+            continue
+        expected = _JSON_TYPES.get(properties[key].get("type"))
+        # bool is an int in Python, but not a number in JSON
+        if expected and (not isinstance(value, expected) or (isinstance(value, bool) and expected is not bool)):
+            return f"{key} should be {properties[key]['type']}"
+        if "enum" in properties[key] and value not in properties[key]["enum"]:
+            return f"{key} is not one of {properties[key]['enum']}"
+    return None
+
+
+def _model_name(llm):
+    return getattr(llm, "model_name", None) or getattr(llm, "model", None) or llm._llm_type
+
+
+# Counts summed across tiers; OpenAI usage also carries *_tokens_details dicts (or None)
+_TOKEN_COUNTS = ("prompt_tokens", "completion_tokens", "total_tokens")
+
+
+def _child_callbacks(run_manager):
+    """
+    Callbacks for a tier call, nested under the routed call (an LLM run manager has no get_child()).
+    """
+    if run_manager is None:
+        return None
+    manager = CallbackManager(handlers=[], parent_run_id=run_manager.run_id)
+    manager.set_handlers(run_manager.inheritable_handlers)
+    manager.add_tags(run_manager.inheritable_tags)
+    manager.add_metadata(run_manager.inheritable_metadata)
+    return manager
+
+
+def _usage(result):
+    usage = (result.llm_output or {}).get("token_usage") or {}
+    return {key: usage[key] for key in _TOKEN_COUNTS if isinstance(usage.get(key), (int, float))}
+
+
+class TieredChatModel(BaseChatModel):
+    """
+    Chat model that routes each agent step between two models:
+
+    - planner first: if it calls a tool and the arguments validate, that's the step;
+    - tool call fails validation -> the same step is re-run on the synthesizer (escalation);
+    - planner answers instead of calling a tool -> that's the answer, unless it was
+      cut off at PLANNER_MAX_TOKENS, in which case the synthesizer re-runs the step.
+
+    Steps offered no functions (the agent's forced final pass) go straight to the synthesizer.
+    llm_output carries the summed token usage plus per-model usage under "routing".
+    """
+
+    planner: BaseChatModel
+    synthesizer: BaseChatModel
+
+    @property
+    def _llm_type(self):
+        return "jurislens-tiered"
+
+    @property
+    def _identifying_params(self):
+        return {"planner": _model_name(self.planner), "synthesizer": _model_name(self.synthesizer)}
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        functions = kwargs.get("functions")
+        calls = []
+
+        def call(llm):
+            # Public path, so each tier's own callbacks (tracing, cost) see the call under ours
+            result = llm.generate([messages], stop=stop, callbacks=_child_callbacks(run_manager), **kwargs)
+            calls.append((_model_name(llm), _usage(result)))
+            return ChatResult(generations=result.generations[0], llm_output=result.llm_output)
+
+        route, reason = "synthesis", None
+        if functions:
+            planned = call(self.planner)
+            generation = planned.generations[0]
+            function_call = generation.message.additional_kwargs.get("function_call")
+            if function_call:
+                reason = validate_function_call(function_call, functions)
+            elif (generation.generation_info or {}).get("finish_reason") == "length":
+                reason = "answer truncated"
+            if reason is None:
+                return self._result(planned, "planner", calls)
+            route = "escalated"
+            print(f"⚠️ Planner step rejected ({reason}); escalating to {_model_name(self.synthesizer)}")
+        return self._result(call(self.synthesizer), route, calls, reason)
+
+    def _result(self, result, route, calls, reason=None):
+        usage = {}
+        by_model = {}
+        for model, model_usage in calls:
+            for key, value in model_usage.items():
+                usage[key] = usage.get(key, 0) + value
+            by_model[model] = by_model.get(model, 0) + model_usage.get("total_tokens", 0)
+        routing = {"route": route, "models": [model for model, _ in calls], "tokens_by_model": by_model}
+        if reason:
+            routing["escalation_reason"] = reason
+        return ChatResult(
+            generations=result.generations,
+            llm_output={"token_usage": usage, "model_name": calls[-1][0], "routing": routing},
+        )
+
+
+def build_agent_llm(openai_api_key, routing=None):
+    """
+    The agent's chat model per JURISLENS_MODEL_ROUTING: tiered planner/synthesizer, or one model for every step.
+    """
+    from langchain_openai import ChatOpenAI
+
+    synthesizer = ChatOpenAI(temperature=0, model=SYNTHESIS_MODEL, openai_api_key=openai_api_key)
+    if (routing or ROUTING) != "tiered":
+        return synthesizer
+    planner = ChatOpenAI(temperature=0, model=PLANNER_MODEL, openai_api_key=openai_api_key,
+                         max_tokens=PLANNER_MAX_TOKENS)
+    return TieredChatModel(planner=planner, synthesizer=synthesizer)
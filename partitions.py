@@ -0,0 +1,95 @@
+"""
+Tenant / jurisdiction / effective-date partitioning of the knowledge base.
+
+Every chunk is stamped at ingest with metadata["tenant"] (business unit) and,
+when known, metadata["jurisdiction"] and metadata["effective_date"] (ISO date).
+Searches pre-filter on the same fields, in the ES kNN query (knn.filter, so
+only the partition's vectors are scanned) and in the local backup alike.
+
+Large tenants listed in JURISLENS_DEDICATED_TENANTS get their own index
+("jurislens_docs_<tenant>"); everyone else shares DEFAULT_INDEX.
+"""
+import os
+import re
+import datetime
+
+DEFAULT_INDEX = "jurislens_docs"
+DEFAULT_TENANT = os.getenv("JURISLENS_DEFAULT_TENANT", "default")
+# Business units offered in the sidebar (comma-separated)
+TENANTS = [t.strip() for t in os.getenv("JURISLENS_TENANTS", DEFAULT_TENANT).split(",") if t.strip()]
+DEDICATED_TENANTS = {t.strip() for t in os.getenv("JURISLENS_DEDICATED_TENANTS", "").split(",") if t.strip()}
+
+PARTITION_FIELDS = ("tenant", "jurisdiction", "effective_date")
+
+
+def normalise_jurisdiction(jurisdiction):
+    return " ".join(jurisdiction.split()).upper() if jurisdiction and jurisdiction.strip() else None
+
+
+def index_for(tenant=None):
+    """
+    Index holding `tenant`'s documents: its own for dedicated tenants, else the shared one.
+    """
+    tenant = tenant or DEFAULT_TENANT
+    if tenant in DEDICATED_TENANTS:
+        return f"{DEFAULT_INDEX}_{re.sub(r'[^a-z0-9_-]+', '_', tenant.lower())}"
+    return DEFAULT_INDEX
+
+
+def partition_metadata(tenant=None, jurisdiction=None, effective_date=None):
+    """
+    Metadata to stamp on every chunk of one ingestion. effective_date: date or "YYYY-MM-DD".
+    """
+    metadata = {"tenant": tenant or DEFAULT_TENANT}
+    if normalise_jurisdiction(jurisdiction):
+        metadata["jurisdiction"] = normalise_jurisdiction(jurisdiction)
+    if effective_date:
+        if isinstance(effective_date, str):
+            effective_date = datetime.date.fromisoformat(effective_date)  # Raises ValueError on bad input
+        metadata["effective_date"] = effective_date.isoformat()
+    return metadata
+
+
+def _missing(field):
+    return {"bool": {"must_not": {"exists": {"field": field}}}}
+
+
+def _either(*clauses):
+    return {"bool": {"should": list(clauses), "minimum_should_match": 1}}
+
+
+def es_filter(tenant=None, jurisdiction=None, as_of=None):
+    """
+    Elasticsearch filter clauses for ElasticsearchStore(..., filter=...), which the
+    approx strategy puts in knn.filter (a pre-filter, not a post-filter).
+
+    - tenant: exact match; documents indexed before tenants existed count as the default tenant.
+    - jurisdiction: that jurisdiction's rules plus those with no jurisdiction (global standards).
+    - as_of: only rules already in effect on that date (undated ones always are).
+    """
+    tenant = tenant or DEFAULT_TENANT
+    # Dynamic mapping gives string metadata a ".keyword" sub-field for exact matches
+    tenant_term = {"term": {"metadata.tenant.keyword": tenant}}
+    clauses = [_either(tenant_term, _missing("metadata.tenant")) if tenant == DEFAULT_TENANT else tenant_term]
+    jurisdiction = normalise_jurisdiction(jurisdiction)
+    if jurisdiction:
+        clauses.append(_either({"term": {"metadata.jurisdiction.keyword": jurisdiction}}, _missing("metadata.jurisdiction")))
+    if as_of:
+        clauses.append(_either({"range": {"metadata.effective_date": {"lte": str(as_of)}}}, _missing("metadata.effective_date")))
+    return clauses
+
+
+def matches(metadata, tenant=None, jurisdiction=None, as_of=None):
+    """
+    Same semantics as es_filter(), for the local backup (kb_text entries) or Document metadata.
+    """
+    tenant = tenant or DEFAULT_TENANT
+    if metadata.get("tenant", DEFAULT_TENANT) != tenant:
+        return False
+    jurisdiction = normalise_jurisdiction(jurisdiction)
+    if jurisdiction and metadata.get("jurisdiction") not in (None, jurisdiction):
+        return False
+    effective = metadata.get("effective_date")
+    if as_of and effective and effective > str(as_of):
+        return False
+    return True
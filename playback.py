@@ -0,0 +1,140 @@
+"""
+Preloaded, gapless clip playback for the recording tools (director.py, director_gui.py).
+
+Clips are decoded into memory as pygame Sound buffers up front, in cue order
+on a background thread, so the first cue is ready almost at once and playing
+a cue never touches the disk. Cues alternate between reserved channels, and
+the end of a clip arrives as a channel end event instead of by polling
+get_busy(). SDL only pumps events on the thread that initialised it, so
+wait() and finished() must be called from the thread that created the player.
+"""
+import os
+import time
+import threading
+
+AUDIO_DIR = "voiceovers"
+# Frames per mixer buffer: smaller = less delay between play() and sound (pygame's default is larger)
+MIXER_BUFFER = 512
+CUE_CHANNELS = 2
+
+
+def list_clips(audio_dir=AUDIO_DIR):
+    """
+    [(name, path, duration)] in cue order: from the voiceover manifest
+    (generate_voiceover.py) when there is one, else every MP3 sorted by name
+    (duration None until decoded).
+    """
+    from generate_voiceover import load_manifest
+
+    clips = []
+    for name, clip in load_manifest(audio_dir).get("clips", {}).items():
+        path = os.path.join(audio_dir, clip["file"])
+        if os.path.exists(path):
+            clips.append((name, path, clip.get("duration")))
+    if clips:
+        return clips
+    if not os.path.isdir(audio_dir):
+        return []
+    return [(os.path.splitext(f)[0], os.path.join(audio_dir, f), None)
+            for f in sorted(os.listdir(audio_dir)) if f.endswith(".mp3")]
+
+
+class ClipPlayer:
+    """
+    play(i) starts cue i from its in-memory buffer; wait() blocks until it ends,
+    finished() checks without blocking (for GUI event loops).
+    """
+
+    def __init__(self, clips, preload=True):
+        import pygame
+
+        # The event queue needs SDL's video subsystem, but never a window
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        pygame.mixer.pre_init(buffer=MIXER_BUFFER)
+        pygame.init()
+        pygame.mixer.set_reserved(CUE_CHANNELS)  # Nothing else gets to play on these
+        self._pygame = pygame
+        self.clips = list(clips)
+        self.channels = [pygame.mixer.Channel(i) for i in range(CUE_CHANNELS)]
+        self.end_events = [pygame.USEREVENT + 1 + i for i in range(CUE_CHANNELS)]
+        for channel, event_type in zip(self.channels, self.end_events):
+            channel.set_endevent(event_type)
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed(self.end_events)
+
+        self._sounds = [None] * len(self.clips)
+        self._decode_lock = threading.Lock()
+        self.playing = None
+        self.load_seconds = None
+        if preload:
+            threading.Thread(target=self._preload, name="clip-preload", daemon=True).start()
+
+    def _preload(self):
+        start = time.perf_counter()
+        for index in range(len(self.clips)):
+            self.sound(index)
+        self.load_seconds = time.perf_counter() - start
+
+    def sound(self, index):
+        """
+        Decoded buffer of cue `index`, decoding it now if the preload hasn't reached it yet.
+        """
+        with self._decode_lock:
+            if self._sounds[index] is None:
+                self._sounds[index] = self._pygame.mixer.Sound(self.clips[index][1])
+            return self._sounds[index]
+
+    def prefetch(self, index):
+        if 0 <= index < len(self.clips) and self._sounds[index] is None:
+            threading.Thread(target=self.sound, args=(index,), daemon=True).start()
+
+    def play(self, index):
+        """
+        Starts cue `index` and returns its duration in seconds.
+        """
+        sound = self.sound(index)
+        slot = index % CUE_CHANNELS
+        channel = self.channels[slot]
+        channel.stop()
+        # Drop the end event of whatever was just cut off on this channel
+        self._pygame.event.clear(self.end_events[slot])
+        channel.play(sound)
+        self.playing = index
+        self.prefetch(index + 1)
+        return sound.get_length()
+
+    def wait(self, timeout=None):
+        """
+        Blocks until the playing cue's end event arrives. False on timeout.
+        """
+        if self.playing is None:
+            return True
+        event_type = self.end_events[self.playing % CUE_CHANNELS]
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if deadline is None:
+                event = self._pygame.event.wait()
+            else:
+                remaining = int((deadline - time.monotonic()) * 1000)
+                if remaining <= 0:
+                    return False
+                event = self._pygame.event.wait(remaining)
+            if event.type == event_type:
+                self.playing = None
+                return True
+
+    def finished(self):
+        """
+        True once the playing cue's end event has arrived. Never blocks, so a GUI
+        can poll it from its own main loop (e.g. Tk's after()).
+        """
+        if self.playing is None:
+            return True
+        if self._pygame.event.get(eventtype=self.end_events[self.playing % CUE_CHANNELS]):
+            self.playing = None
+            return True
+        return False
+
+    def close(self):
+        self._pygame.mixer.quit()
+        self._pygame.quit()
@@ -0,0 +1,239 @@
+"""
+Multi-pattern sanctions screening: one Aho-Corasick automaton over every
+normalised list name and alias, built once per process, that finds all of
+them in a single left-to-right pass over any text.
+
+Names are matched on word tokens (upper-cased, accents folded, punctuation
+dropped), so "Ivan Drago", "IVAN  DRAGO" and "Drago, Ivan" (a listed alias)
+all hit, but "Ivanova" doesn't.
+
+    python sanctions_screening.py memo.txt clients.csv ...   # screen files of any size
+"""
+import os
+import re
+import sys
+import json
+import time
+import threading
+import unicodedata
+from itertools import compress, count
+
+# Optional JSON list in the same shape as SANCTIONS_LIST (e.g. converted OFAC SDN / EU / UN exports)
+SANCTIONS_LIST_FILE = os.getenv("JURISLENS_SANCTIONS_LIST")
+# Characters per block when screening files; the automaton state carries across blocks
+SCAN_BLOCK_CHARS = 8 * 1024 * 1024
+
+SANCTIONS_LIST = {
+    "IVAN DRAGO": {"list": "OFAC SDN", "id": "RU-8821", "reason": "Connection to prohibited energy sector",
+                   "aliases": ["DRAGO, IVAN"]},
+    "VICTOR KRUM": {"list": "EU Watchlist", "id": "BG-9910", "reason": "High-risk politically exposed person",
+                    "aliases": ["VIKTOR KRUM"]},
+    "LE CHIFFRE": {"list": "Interpol Red", "id": "FR-007", "reason": "Terrorist financing", "aliases": []},
+    "GOLIATH BANK": {"list": "Internal Blacklist", "id": "INT-001", "reason": "Conflict of interest", "aliases": []},
+}
+
+# Answers cite their sources ("[Source: policy.pdf (Page 2) | ...]") and text may name files;
+# those name documents, not parties, and "_" tokenises like a space
+_CITATION_RE = re.compile(r"\[Source:[^\]]*\]")
+_FILE_NAME_RE = re.compile(r"[\w./\\-]+\.(?:pdf|html?|txt|md|csv|json|docx?)\b", re.IGNORECASE)
+
+# Tokenising is a bytes.translate + split (both C loops): ASCII letters upper-cased,
+# other ASCII to spaces, UTF-8 bytes of non-ASCII letters kept as part of the token
+_BYTE_TABLE = bytes(
+    c - 32 if 97 <= c <= 122 else c if (48 <= c <= 57 or 65 <= c <= 90 or c >= 128) else 32
+    for c in range(256)
+)
+# Non-ASCII text only: accented Latin letters -> base letter, Unicode punctuation/spaces -> space
+_FOLD = {}
+for _cp in range(0x80, 0x3100):
+    _char = chr(_cp)
+    if unicodedata.category(_char)[0] in "PZSC":
+        _FOLD[_cp] = " "
+    elif _cp < 0x250:
+        _base = "".join(c for c in unicodedata.normalize("NFKD", _char) if not unicodedata.combining(c))
+        if len(_base) == 1 and _base != _char:
+            _FOLD[_cp] = _base
+
+
+def tokens(text):
+    """
+    Normalised word tokens of `text`, as bytes.
+    """
+    if not text.isascii():
+        text = text.translate(_FOLD).upper()
+    return text.encode("utf-8").translate(_BYTE_TABLE).split()
+
+
+def normalise_name(name):
+    return b" ".join(tokens(name)).decode("utf-8")
+
+
+def load_sanctions_list(path=None):
+    path = path or SANCTIONS_LIST_FILE
+    if not path:
+        return SANCTIONS_LIST
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class SanctionsMatcher:
+    """
+    Aho-Corasick automaton over name tokens. State 0 is the root; goto[s] maps
+    a token to the next state, fail[s] is the longest proper suffix state, and
+    out[s] lists (entity, alias, token count) for every name ending at s.
+    """
+
+    def __init__(self, entities):
+        self.entities = entities
+        self.names = {}
+        self.goto, self.fail, self.out = [{}], [0], [[]]
+        for entity, record in entities.items():
+            for alias in [entity, *record.get("aliases", [])]:
+                name = tokens(alias)
+                if name:
+                    self._insert(name, entity, alias)
+                    self.names[b" ".join(name)] = entity
+        # Any token outside this set sends the automaton back to the root
+        self.vocabulary = {token for state in self.goto for token in state}
+        self._link()
+
+    def _insert(self, name, entity, alias):
+        state = 0
+        for token in name:
+            if token not in self.goto[state]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+                self.goto[state][token] = len(self.goto) - 1
+            state = self.goto[state][token]
+        self.out[state].append((entity, alias, len(name)))
+
+    def _link(self):
+        queue = list(self.goto[0].values())
+        for state in queue:  # Breadth-first, so fail targets are always linked first
+            for token, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and token not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(token, 0)
+                self.fail[child] = target if target != child else 0
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+
+    def lookup(self, name):
+        """
+        Listed entity for an exact name or alias (normalised), else None.
+        """
+        return self.names.get(b" ".join(tokens(name)))
+
+    def scan(self, text, state=0, position=0):
+        """
+        Returns (hits, state, token count). Hits are {"entity", "alias", "position"},
+        position being the token index (+ `position`) where the name starts. Pass
+        `state` back in to continue a scan across consecutive blocks of one stream.
+        """
+        words = tokens(text)
+        hits = []
+        if self.vocabulary.isdisjoint(words):
+            return hits, 0 if words else state, len(words)
+        goto, fail, out = self.goto, self.fail, self.out
+        previous = -1  # Index 0 continues whatever the previous block left in `state`
+        # Only tokens that occur in some name can advance the automaton; a gap means
+        # some other token came in between, which resets it
+        for i in compress(count(), map(self.vocabulary.__contains__, words)):
+            if i != previous + 1:
+                state = 0
+            previous = i
+            token = words[i]
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            for entity, alias, length in out[state]:
+                hits.append({"entity": entity, "alias": alias, "position": position + i - length + 1})
+        if previous != len(words) - 1:
+            state = 0
+        return hits, state, len(words)
+
+    def entities_in(self, text):
+        """
+        Sorted listed entities mentioned anywhere in `text`.
+        """
+        return sorted({hit["entity"] for hit in self.scan(text)[0]})
+
+    def scan_stream(self, stream, block_chars=SCAN_BLOCK_CHARS):
+        """
+        Screens a text stream of any size in blocks cut at whitespace, in one pass.
+        """
+        hits, state, position, carry = [], 0, 0, ""
+        while True:
+            block = stream.read(block_chars)
+            text = carry + block
+            if not block:
+                hits.extend(self.scan(text, state, position)[0])
+                return hits
+            cut = max(text.rfind(" "), text.rfind("\n")) + 1 or len(text)
+            found, state, scanned = self.scan(text[:cut], state, position)
+            hits.extend(found)
+            position += scanned
+            carry = text[cut:]
+
+
+_matcher = None
+_matcher_lock = threading.Lock()
+
+
+def get_matcher():
+    """
+    The process-wide matcher over the configured sanctions list, built on first use.
+    """
+    global _matcher
+    with _matcher_lock:
+        if _matcher is None:
+            _matcher = SanctionsMatcher(load_sanctions_list())
+        return _matcher
+
+
+def _screened_hits(text, sources):
+    # Entities a document's own name names are its owner (a bank's own policy
+    # heading names the bank), not a party it mentions
+    matcher = get_matcher()
+    own = {entity for source in sources for entity in matcher.entities_in(source)}
+    return [entity for entity in matcher.entities_in(_FILE_NAME_RE.sub(" ", _CITATION_RE.sub(" ", text)))
+            if entity not in own]
+
+
+def document_hits(text, source=None):
+    """
+    Listed entities a document chunk mentions, leaving out file names and whoever the
+    document's own name (`source`) names.
+    """
+    return _screened_hits(text, [source] if source else [])
+
+
+def answer_hits(text):
+    """
+    Listed entities an agent answer mentions, leaving out its source citations and file
+    names, and whoever the cited documents' names name.
+    """
+    return _screened_hits(text, _CITATION_RE.findall(text) + _FILE_NAME_RE.findall(text))
+
+
+def describe(entities):
+    """
+    "Ivan Drago (OFAC SDN RU-8821), ..." for a list of listed entity names.
+    """
+    listed = get_matcher().entities
+    return ", ".join(f"{entity.title()} ({listed[entity]['list']} {listed[entity]['id']})" for entity in entities)
+
+
+if __name__ == "__main__":
+    matcher = get_matcher()
+    for path in sys.argv[1:]:
+        start = time.perf_counter()
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            found = matcher.scan_stream(f)
+        seconds = time.perf_counter() - start
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        print(f"🕵️‍♀️ {path}: {len(found)} hits in {size_mb:.1f} MB ({seconds:.2f}s, {size_mb / seconds if seconds else 0:.0f} MB/s)")
+        for hit in found[:50]:
+            print(f"   🚨 {hit['entity']} as '{hit['alias']}' at word {hit['position']}")
@@ -0,0 +1,24 @@
+import crawler
+from benchmarks.crawl import FixtureSite
+from local_backends import InMemoryElasticsearchStore, use_local_backends
+from partitions import index_for, partition_metadata
+
+
+def test_recrawl_for_another_tenant_on_the_shared_index(tmp_path, monkeypatch):
+    from ingest import crawl_and_index
+
+    monkeypatch.setattr(crawler, "VALIDATOR_CACHE", str(tmp_path / "crawl_cache.json"))
+    retail, treasury = partition_metadata("retail"), partition_metadata("treasury")
+    assert index_for("retail") == index_for("treasury")
+
+    with FixtureSite(pages=3, latency=0) as site, use_local_backends():
+        first = crawl_and_index(site.seed, partition=retail)
+        assert first
+        # Same tenant again: every page answers 304, nothing to re-index
+        assert crawl_and_index(site.seed, partition=retail) == []
+        # Another tenant on the same index must get its own copy of every chunk
+        other = crawl_and_index(site.seed, partition=treasury)
+        assert len(other) == len(first)
+        assert {entry["tenant"] for entry in other} == {"treasury"}
+        indexed = InMemoryElasticsearchStore.indices[index_for("treasury")]
+        assert len(indexed) == 2 * len(first)
@@ -0,0 +1,105 @@
+import json
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from model_routing import TieredChatModel
+
+FUNCTIONS = [{
+    "name": "check_sanctions_tool",
+    "parameters": {"type": "object", "properties": {"name": {"type": "string"}}, "required": ["name"]},
+}]
+
+
+class CannedChatModel(BaseChatModel):
+    """Replies with one fixed message and OpenAI-shaped usage (details fields included)."""
+
+    model_name: str
+    reply: dict
+    finish_reason: str = "stop"
+    calls: int = 0
+
+    @property
+    def _llm_type(self):
+        return "canned"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        usage = {
+            "prompt_tokens": 100,
+            "completion_tokens": 10,
+            "total_tokens": 110,
+            "completion_tokens_details": None,
+            "prompt_tokens_details": {"cached_tokens": 0},
+        }
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(**self.reply),
+                                        generation_info={"finish_reason": self.finish_reason})],
+            llm_output={"token_usage": usage, "model_name": self.model_name},
+        )
+
+    def _combine_llm_outputs(self, llm_outputs):
+        # Like ChatOpenAI for a single prompt: the usage dict passes through as is
+        return {"token_usage": llm_outputs[0]["token_usage"], "model_name": self.model_name}
+
+
+class LLMOutputs(BaseCallbackHandler):
+    def __init__(self):
+        self.outputs = []
+
+    def on_llm_end(self, response, **kwargs):
+        self.outputs.append(response.llm_output or {})
+
+    @property
+    def models(self):
+        return [output.get("model_name") for output in self.outputs]
+
+
+def tool_call(arguments):
+    return {"content": "", "additional_kwargs": {"function_call": {"name": "check_sanctions_tool",
+                                                                  "arguments": json.dumps(arguments)}}}
+
+
+def route(planner_reply, **planner):
+    planner = CannedChatModel(model_name="small", reply=planner_reply, **planner)
+    synthesizer = CannedChatModel(model_name="large", reply={"content": "Synthesized answer."})
+    ends = LLMOutputs()
+    result = TieredChatModel(planner=planner, synthesizer=synthesizer).generate(
+        [[HumanMessage(content="Can we onboard Ivan Drago?")]], functions=FUNCTIONS, callbacks=[ends])
+    # The routed call ends last; its llm_output (routing, summed usage) reaches callbacks like the agent's
+    return result.generations[0][0].message.content, ends.outputs[-1], planner, synthesizer, ends
+
+
+def test_valid_tool_call_stays_on_the_planner():
+    answer, output, planner, synthesizer, ends = route(tool_call({"name": "Ivan Drago"}))
+    assert (planner.calls, synthesizer.calls) == (1, 0)
+    assert output["routing"]["route"] == "planner"
+    assert output["token_usage"] == {"prompt_tokens": 100, "completion_tokens": 10, "total_tokens": 110}
+    # The tier call reaches the callbacks, then the routed call
+    assert ends.models == ["small", "small"]
+
+
+def test_planner_answer_is_returned_directly():
+    answer, output, planner, synthesizer, _ = route({"content": "Ivan Drago is on the OFAC list."})
+    assert (planner.calls, synthesizer.calls) == (1, 0)
+    assert answer == "Ivan Drago is on the OFAC list."
+    assert output["routing"]["route"] == "planner"
+
+
+def test_truncated_planner_answer_escalates():
+    answer, output, planner, synthesizer, _ = route({"content": "Ivan Drago is"}, finish_reason="length")
+    assert (planner.calls, synthesizer.calls) == (1, 1)
+    assert answer == "Synthesized answer."
+    assert output["routing"]["escalation_reason"] == "answer truncated"
+
+
+def test_invalid_tool_call_escalates_and_sums_usage():
+    answer, output, planner, synthesizer, ends = route(tool_call({}))
+    assert (planner.calls, synthesizer.calls) == (1, 1)
+    routing = output["routing"]
+    assert routing["route"] == "escalated"
+    assert routing["tokens_by_model"] == {"small": 110, "large": 110}
+    assert output["token_usage"] == {"prompt_tokens": 200, "completion_tokens": 20, "total_tokens": 220}
+    assert ends.models == ["small", "large", "large"]
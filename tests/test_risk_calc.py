@@ -0,0 +1,44 @@
+import time
+
+import pytest
+
+import ledger_stream
+from ledger_stream import publish
+from tools.risk_calc import calculate_risk_tool
+
+
+@pytest.fixture
+def stream(tmp_path, monkeypatch):
+    path = str(tmp_path / "ledger_events.jsonl")
+    monkeypatch.setenv("JURISLENS_LEDGER_STREAM", path)
+    monkeypatch.setenv("JURISLENS_LEDGER_STATE", "")
+    yield path
+    if ledger_stream._consumer is not None:
+        ledger_stream._consumer.stop()
+        ledger_stream._consumer = None
+
+
+def test_demo_question_reads_the_stream_without_a_client(stream):
+    # python ledger_stream.py --demo
+    publish({"client": "DEMO-CLIENT", "jurisdiction": "Zylaria", "amount": 2500.0}, stream)
+    start = time.perf_counter()
+    result = calculate_risk_tool.invoke({"amount": 4000, "jurisdiction": "Zylaria"})
+    assert time.perf_counter() - start < 0.5  # No simulated ledger query
+    assert result.startswith("Risk Level: HIGH")
+    assert "Prior Today: $2,500.00" in result
+
+
+def test_no_transfers_in_the_stream_means_no_prior_exposure(stream):
+    publish({"client": "DEMO-CLIENT", "jurisdiction": "Atlantis", "amount": 2500.0}, stream)
+    result = calculate_risk_tool.invoke({"amount": 4000, "jurisdiction": "Zylaria"})
+    assert result.startswith("Risk Level: LOW")
+    assert "$4,000.00" in result
+
+
+def test_several_clients_need_a_client_id(stream):
+    publish({"client": "ACME-001", "jurisdiction": "Zylaria", "amount": 3000.0}, stream)
+    publish({"client": "BETA-002", "jurisdiction": "Zylaria", "amount": 3000.0}, stream)
+    assert calculate_risk_tool.invoke({"amount": 1000, "jurisdiction": "Zylaria"}).startswith("Risk Level: UNKNOWN")
+    # Per client, never the $6,000 total across both
+    assert calculate_risk_tool.invoke({"amount": 1000, "jurisdiction": "Zylaria", "client": "acme-001"}).startswith(
+        "Risk Level: LOW")
@@ -0,0 +1,30 @@
+from langchain_core.documents import Document
+
+from ingest import tag_sanctions_hits
+from sanctions_screening import answer_hits
+from tools.sanctions import check_sanctions_tool
+
+POLICY_HEADING = "GOLIATH BANK - CONFIDENTIAL INTERNAL POLICY (2025)\nTransfers to Zylaria are capped at $5,000."
+
+
+def test_goliath_bank_is_listed():
+    assert "MATCH FOUND" in check_sanctions_tool.invoke({"name": "Goliath Bank"})
+
+
+def test_chunk_is_not_flagged_for_its_own_document_name():
+    docs = [
+        Document(page_content=POLICY_HEADING, metadata={"source": "goliath_bank_internal_policy.pdf"}),
+        # app.py uploads and jobs.py spools keep the file name after a prefix
+        Document(page_content=POLICY_HEADING, metadata={"source": "/tmp/tmpk2x9_goliath_bank_internal_policy.pdf"}),
+        Document(page_content="Wire via Goliath Bank, see goliath_bank_internal_policy.pdf.",
+                 metadata={"source": "counterparty_memo.pdf"}),
+    ]
+    tag_sanctions_hits(docs)
+    assert [d.metadata["sanctions_hits"] for d in docs] == [[], [], ["GOLIATH BANK"]]
+
+
+def test_answer_citations_are_not_screened():
+    cited = "Goliath Bank caps Zylaria at $5,000. [Source: goliath_bank_internal_policy.pdf (Page 1)]"
+    assert answer_hits(cited) == []
+    assert answer_hits("Goliath Bank caps Zylaria at $5,000. [Source: zylaria_circular.pdf (Page 2)]") == ["GOLIATH BANK"]
+    assert answer_hits("Ivan Drago banks with Goliath Bank. [Source: goliath_bank_internal_policy.pdf]") == ["IVAN DRAGO"]
@@ -0,0 +1,25 @@
+from tracing import percentile
+
+
+def test_percentile_single_sample():
+    assert percentile([7.0], 50) == 7.0
+    assert percentile([7.0], 99) == 7.0
+    assert percentile([7.0], 0) == 7.0
+
+
+def test_percentile_two_samples():
+    assert percentile([2.0, 1.0], 50) == 1.0
+    assert percentile([2.0, 1.0], 51) == 2.0
+    assert percentile([2.0, 1.0], 100) == 2.0
+
+
+def test_percentile_six_samples():
+    samples = [60, 10, 50, 20, 40, 30]
+    assert percentile(samples, 50) == 30
+    assert percentile(samples, 90) == 60
+    assert percentile(samples, 25) == 20
+    assert percentile(samples, 0) == 10
+
+
+def test_percentile_empty():
+    assert percentile([], 95) == 0.0
@@ -1,75 +1,151 @@
 
 import os
+import datetime
+from typing import Optional
 from langchain_elasticsearch import ElasticsearchStore
 from langchain_openai import OpenAIEmbeddings
 from langchain.prompts import PromptTemplate
 from langchain.chains import RetrievalQA
 from langchain_openai import ChatOpenAI
 from langchain_core.tools import tool
+from tracing import TRACER, TracingEmbeddings
+from context_packing import pack_passages
+from chunker import chunk_id
+from partitions import es_filter, index_for, matches
+from vector_compression import embedding_kwargs, es_strategy
+from kb_snapshot import session_keyword_index
+from citation_index import lookup_enabled, query_identifiers, rank_cited, session_citation_index
+
+# Retrieve a few more candidates than we return; pack_passages() trims to the token budget
+SEARCH_CANDIDATES = 5
+
+def _sections(passage):
+    # Section/rule ids from the structure-aware chunker, so the agent can cite them directly
+    ids = passage.get("section_ids") or []
+    return f" [Sections: {', '.join(ids)}]" if ids else ""
+
+def _tags(passage):
+    # Listed entities found in the chunk at ingest (sanctions_screening.py)
+    hits = passage.get("sanctions_hits") or []
+    return _sections(passage) + (f" [🚨 Sanctioned entities mentioned: {', '.join(hits)}]" if hits else "")
 
 @tool
-def search_regulations_tool(query: str) -> str:
+def search_regulations_tool(query: str, jurisdiction: Optional[str] = None) -> str:
     """
     Useful for finding specific laws, statutes, and compliance regulations from the knowledge base.
     
     Args:
         query: The search query or question to find relevant regulations for.
+        jurisdiction: Optional country/jurisdiction the question is about (e.g. "Zylaria"). Limits the search to that jurisdiction's rules plus global ones.
     """
     # Access session state for local backup
     import streamlit as st
     
+    # Partition: the analyst's business unit (never chosen by the LLM) and rules in force today
+    tenant = st.session_state.get("tenant")
+    as_of = datetime.date.today().isoformat()
+    
+    # 0. Exact citation lookup: "Rule 5.1" / "Section 1010.610" / "page 3" resolve straight
+    #    to the chunks that carry them, with no embedding call or kNN search. Ids found in
+    #    several documents the question doesn't choose between fall through to the search.
+    identifiers = query_identifiers(query) if lookup_enabled() else []
+    if identifiers and st.session_state.get("kb_text"):
+        with TRACER.span("citation_lookup", "retrieval.citation", identifiers=",".join(identifiers)) as span:
+            kb = st.session_state.kb_text
+            rows = session_citation_index(st.session_state).lookup(identifiers)
+            cited = [kb[row] for row in rows if matches(kb[row], tenant, jurisdiction, as_of)]
+            # Best matches for the question first; [] if several documents carry the id
+            cited = rank_cited(cited, query, identifiers)[:SEARCH_CANDIDATES]
+            span.set(**{"retrieval.chunk_ids": ",".join(
+                item.get("chunk_id") or chunk_id(item["source"], item["content"]) for item in cited
+            )})
+        if cited:
+            passages = [
+                {"source": item["source"], "content": item["content"], "score": 1.0, "section_ids": item.get("section_ids", []),
+                 "sanctions_hits": item.get("sanctions_hits", [])}
+                for item in cited
+            ]
+            with TRACER.span("pack_context", "retrieval.pack", candidates=len(passages)):
+                return pack_passages(
+                    passages, header=lambda p: f"[Source: {p['source']} | Relevance: 1.00 (Exact Citation Match)]{_tags(p)}"
+                )
+
     # 1. Try Local Search if Elastic is missing OR as a fallback
     local_results = []
     top_local = []  # Initialize to avoid UnboundLocalError
     if "kb_text" in st.session_state and st.session_state.kb_text:
-        query_terms = query.lower().split()
-        for item in st.session_state.kb_text:
-            content = item["content"].lower()
-            # Simple keyword matching: count hits
-            hits = sum(1 for term in query_terms if term in content and len(term) > 3)
-            if hits > 0:
+        with TRACER.span("local_keyword_search", "retrieval.local", chunks=len(st.session_state.kb_text)) as span:
+            query_terms = [term for term in query.lower().split() if len(term) > 3]
+            # Simple keyword matching: count hits, looked up in the inverted index instead of scanning every chunk
+            kb = st.session_state.kb_text
+            hits_by_row = session_keyword_index(st.session_state).hits(query_terms)
+            for row in sorted(hits_by_row):
+                item = kb[row]
+                if not matches(item, tenant, jurisdiction, as_of):
+                    continue
                 # Mock score: Normalized to 0-1 range roughly
-                score = min(0.99, hits / 10.0) 
+                score = min(0.99, hits_by_row[row] / 10.0)
                 local_results.append((score, item))
-        
-        # Sort by relevance
-        local_results.sort(key=lambda x: x[0], reverse=True)
-        # Take top 3
-        top_local = local_results[:3]
+            
+            # Sort by relevance
+            local_results.sort(key=lambda x: x[0], reverse=True)
+            # Take top candidates
+            top_local = local_results[:SEARCH_CANDIDATES]
+            span.set(**{"retrieval.chunk_ids": ",".join(
+                item.get("chunk_id") or chunk_id(item["source"], item["content"]) for _, item in top_local
+            )})
 
     # 2. Try Elastic Search
     elastic_results = None
     if os.getenv("ELASTIC_CLOUD_ID"):
         try:
             # Initialize Store
-            embeddings = OpenAIEmbeddings()
+            embeddings = TracingEmbeddings(OpenAIEmbeddings(**embedding_kwargs()))
             vector_store = ElasticsearchStore(
                 embedding=embeddings,
                 es_cloud_id=os.getenv("ELASTIC_CLOUD_ID"),
                 es_api_key=os.getenv("ELASTIC_API_KEY"),
-                index_name="jurislens_docs"
+                index_name=index_for(tenant),
+                strategy=es_strategy()  # Same as at ingest, so knn queries get the rescore settings
             )
-            # Use similarity search WITH SCORE
-            docs_and_scores = vector_store.similarity_search_with_score(query, k=3)
+            # Embed first, then kNN by vector, so both steps are timed separately
+            query_vector = embeddings.embed_query(query)
+            with TRACER.span("es_knn_search", "retrieval.es_knn", k=SEARCH_CANDIDATES, index=index_for(tenant)) as span:
+                # Pre-filtered kNN: only this tenant's / jurisdiction's vectors are candidates
+                docs_and_scores = vector_store.similarity_search_by_vector_with_relevance_scores(
+                    query_vector, k=SEARCH_CANDIDATES, filter=es_filter(tenant, jurisdiction, as_of)
+                )
+                span.set(**{"retrieval.chunk_ids": ",".join(
+                    doc.metadata.get("chunk_id") or chunk_id(doc.metadata.get("source", "Unknown"), doc.page_content)
+                    for doc, _ in docs_and_scores
+                )})
             
             if docs_and_scores:
-                formatted_docs = []
+                passages = []
                 for doc, score in docs_and_scores:
                     source = doc.metadata.get('source', 'Unknown')
                     page_meta = doc.metadata.get('page', None)
                     
-                    citation_part = f"[Source: {source}]"
                     if page_meta is not None:
                         try:
                             # Only add page if it's a valid integer (PDFs usually have 0-indexed pages)
                             p_num = int(page_meta) + 1
-                            citation_part = f"[Source: {source} (Page {p_num})]"
+                            source = f"{source} (Page {p_num})"
                         except:
                             pass
                     
                     # Elastic scores
-                    formatted_docs.append(f"{citation_part} [Relevance: {score:.4f}]\n{doc.page_content}")
-                elastic_results = "\n\n".join(formatted_docs)
+                    passages.append({
+                        "source": source,
+                        "content": doc.page_content,
+                        "score": score,
+                        "section_ids": doc.metadata.get("section_ids") or [],
+                        "sanctions_hits": doc.metadata.get("sanctions_hits") or []
+                    })
+                with TRACER.span("pack_context", "retrieval.pack", candidates=len(passages)):
+                    elastic_results = pack_passages(
+                        passages, header=lambda p: f"[Source: {p['source']}] [Relevance: {p['score']:.4f}]{_tags(p)}"
+                    )
                 
         except Exception as e:
             print(f"Elastic Search Failed: {e}")
@@ -79,6 +155,14 @@ def search_regulations_tool(query: str) -> str:
         return elastic_results
     
     if top_local:
-        return "\n\n".join([f"[Source: {item['source']} | Relevance: {score:.2f} (Local Keyword Match)]\n{item['content']}" for score, item in top_local])
+        passages = [
+            {"source": item["source"], "content": item["content"], "score": score, "section_ids": item.get("section_ids", []),
+             "sanctions_hits": item.get("sanctions_hits", [])}
+            for score, item in top_local
+        ]
+        with TRACER.span("pack_context", "retrieval.pack", candidates=len(passages)):
+            return pack_passages(
+                passages, header=lambda p: f"[Source: {p['source']} | Relevance: {p['score']:.2f} (Local Keyword Match)]{_tags(p)}"
+            )
 
     return "No relevant regulations found in Knowledge Base (Elastic + Local Backup). Please ingest documents first."
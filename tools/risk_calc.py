@@ -1,7 +1,10 @@
+from typing import Optional
 from langchain_core.tools import tool
+from tracing import TRACER
+from ledger_stream import get_ledger_consumer, normalise_client
 
 @tool
-def calculate_risk_tool(amount: float, jurisdiction: str) -> str:
+def calculate_risk_tool(amount: float, jurisdiction: str, client: Optional[str] = None) -> str:
     """
     Checks the transaction against the Live Ledger and calculates compliance risk.
     Use this to validate if a specific transaction is safe given the client's history.
@@ -9,18 +12,41 @@ def calculate_risk_tool(amount: float, jurisdiction: str) -> str:
     Args:
         amount: The transaction amount.
         jurisdiction: The receiving country (e.g. "Zylaria").
+        client: Optional client / account id, if the user gave one. Without it, the
+            client with transfers to this jurisdiction today is used (asks if several).
     """
     import time
     
-    # 1. Simulate API Latency
-    print(f"🔌 Connecting to Core Banking Ledger... Looking up daily aggregates for {jurisdiction}...")
-    time.sleep(1.0)
-    
-    # 2. Simulate "Live State" that Grok doesn't know
-    # Pretend the client already sent money today
-    prior_transfers = 0
-    if "ZYLARIA" in jurisdiction.upper():
-        prior_transfers = 2500.00
+    if jurisdiction.upper() in ["NORTH KOREA", "IRAN", "SYRIA", "RUSSIA"]:
+         return "Risk Level: CRITICAL. Sanctioned Jurisdiction. Blocked immediately."
+
+    # 1. Live state: rolling exposure kept up to date by the ledger change-stream consumer.
+    # The limit is per client, and the stream's jurisdiction total spans every client,
+    # so without a client id we look for the one client with transfers there today.
+    consumer = get_ledger_consumer()
+    if consumer is not None:
+        with TRACER.span("ledger_lookup", "tool.ledger", jurisdiction=jurisdiction, source="stream") as span:
+            if not normalise_client(client):
+                exposed = consumer.clients_exposed(jurisdiction)
+                if len(exposed) > 1:
+                    return (f"Risk Level: UNKNOWN. {len(exposed)} clients have transfers to {jurisdiction} today "
+                            f"({', '.join(sorted(exposed)[:5])}). Ask which client this is and check again with its id.")
+                client = next(iter(exposed), None)
+            prior_transfers = consumer.exposure(jurisdiction, client) if client else 0.0
+            span.set(**{"ledger.last_event_age_s": consumer.metrics()["last_event_age_s"]})
+        if client:
+            print(f"🔎 Ledger stream: {jurisdiction} exposure for client {client}")
+    else:
+        # No event stream here: simulate the synchronous ledger query
+        print(f"🔌 Connecting to Core Banking Ledger... Looking up daily aggregates for {jurisdiction}...")
+        with TRACER.span("ledger_lookup", "tool.ledger", jurisdiction=jurisdiction, source="query"):
+            time.sleep(1.0)
+        # Simulate "Live State" that Grok doesn't know
+        # Pretend the client already sent money today
+        prior_transfers = 0
+        if "ZYLARIA" in jurisdiction.upper():
+            prior_transfers = 2500.00
+    if prior_transfers:
         print(f"⚠️ Found prior transaction today: ${prior_transfers:,.2f}")
     
     total_exposure = amount + prior_transfers
@@ -30,9 +56,6 @@ def calculate_risk_tool(amount: float, jurisdiction: str) -> str:
     risk_level = "LOW"
     msg = ""
     
-    if jurisdiction.upper() in ["NORTH KOREA", "IRAN", "SYRIA", "RUSSIA"]:
-         return "Risk Level: CRITICAL. Sanctioned Jurisdiction. Blocked immediately."
-
     if total_exposure > limit:
         risk_level = "HIGH"
         msg = (f"TRANSGRESSION: Daily Aggregate Limit Exceeded.\n"
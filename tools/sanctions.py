@@ -1,4 +1,6 @@
 from langchain_core.tools import tool
+from tracing import TRACER
+from sanctions_screening import get_matcher
 
 @tool
 def check_sanctions_tool(name: str) -> str:
@@ -11,20 +13,16 @@ def check_sanctions_tool(name: str) -> str:
     """
     import time
     print(f"🕵️‍♀️ Scanning Global Sanctions Index for: '{name}'...")
-    time.sleep(1.2) # Simulate search latency
+    with TRACER.span("sanctions_lookup", "tool.sanctions_index"):
+        time.sleep(1.2) # Simulate search latency
     
-    # Fake Database of Sanctioned Entities
-    sanctioned_db = {
-        "IVAN DRAGO": {"list": "OFAC SDN", "id": "RU-8821", "reason": "Connection to prohibited energy sector"},
-        "VICTOR KRUM": {"list": "EU Watchlist", "id": "BG-9910", "reason": "High-risk politically exposed person"},
-        "LE CHIFFRE": {"list": "Interpol Red", "id": "FR-007", "reason": "Terrorist financing"},
-        "GOLIATH BANK": {"list": "Internal Blacklist", "id": "INT-001", "reason": "Conflict of interest"}
-    }
+    # Names and aliases from the shared sanctions list (sanctions_screening.py), matched normalised;
+    # a listed name inside a longer one ("Ivan Drago Holdings") counts too
+    matcher = get_matcher()
+    entity = matcher.lookup(name) or next(iter(matcher.entities_in(name)), None)
     
-    name_upper = name.upper().strip()
-    
-    if name_upper in sanctioned_db:
-        record = sanctioned_db[name_upper]
+    if entity:
+        record = matcher.entities[entity]
         return (f"🚨 MATCH FOUND: '{name}' is a Sanctioned Entity.\n"
                 f"Source: {record['list']}\n"
                 f"ID: {record['id']}\n"
@@ -0,0 +1,310 @@
+import os
+import json
+import math
+import time
+import uuid
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.embeddings import Embeddings
+
+# Where finished spans are appended (one OTLP/JSON export request per line,
+# the same layout the OpenTelemetry collector "file" exporter writes).
+TRACE_FILE = os.getenv("JURISLENS_TRACE_FILE", os.path.join("traces", "jurislens_traces.jsonl"))
+SERVICE_NAME = "jurislens"
+
+# Keep a bounded window of samples per stage for the in-app p50/p95 panel
+MAX_SAMPLES_PER_STAGE = 1000
+
+_current_span = contextvars.ContextVar("jurislens_current_span", default=None)
+# List that Tracer.collect() gathers finished spans into, if one is active
+_collected_spans = contextvars.ContextVar("jurislens_collected_spans", default=None)
+
+
+def percentile(values, pct):
+    """
+    Nearest-rank percentile of a list of numbers (pct in 0-100).
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = math.ceil(pct / 100.0 * len(ordered)) - 1
+    rank = max(0, min(len(ordered) - 1, rank))
+    return ordered[rank]
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Span:
+    def __init__(self, name, stage, parent=None, attributes=None):
+        self.name = name
+        self.stage = stage
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = dict(attributes or {})
+        self.status = "OK"
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.duration_ms = None
+        self._t0 = time.perf_counter()
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def end(self, status="OK"):
+        if self.end_ns is None:
+            self.duration_ms = (time.perf_counter() - self._t0) * 1000.0
+            self.end_ns = self.start_ns + int(self.duration_ms * 1_000_000)
+            self.status = status
+
+    def to_otlp(self):
+        attributes = {"jurislens.stage": self.stage, **self.attributes}
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in attributes.items() if v is not None],
+            "status": {"code": 2 if self.status == "ERROR" else 1},
+        }
+
+
+class Tracer:
+    """
+    Process-wide span recorder. Keeps per-stage latency samples in memory
+    and appends every finished span to TRACE_FILE.
+    """
+
+    def __init__(self, export_path=TRACE_FILE, max_samples=MAX_SAMPLES_PER_STAGE):
+        self.export_path = export_path
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._durations = {}
+        self._tokens = {}
+
+    def start_span(self, name, stage, parent=None, **attributes):
+        if parent is None:
+            parent = _current_span.get()
+        return Span(name, stage, parent=parent, attributes=attributes)
+
+    def end_span(self, span, status="OK", **attributes):
+        span.set(**attributes)
+        span.end(status)
+        self.record(span.stage, span.duration_ms, span.attributes.get("llm.usage.total_tokens", 0))
+        collected = _collected_spans.get()
+        if collected is not None:
+            collected.append(span)
+        self._export(span)
+
+    @contextmanager
+    def collect(self):
+        """
+        Yields a list that fills with every span finished inside the block
+        (e.g. one agent run), for per-request summaries such as feedback.py.
+        """
+        spans = []
+        token = _collected_spans.set(spans)
+        try:
+            yield spans
+        finally:
+            _collected_spans.reset(token)
+
+    @contextmanager
+    def span(self, name, stage, **attributes):
+        """
+        Times the enclosed block as a child of the currently active span.
+        """
+        span = self.start_span(name, stage, **attributes)
+        token = _current_span.set(span)
+        status = "OK"
+        try:
+            yield span
+        except Exception as e:
+            status = "ERROR"
+            span.set(error=str(e))
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end_span(span, status)
+
+    def record(self, stage, duration_ms, tokens=0):
+        with self._lock:
+            samples = self._durations.setdefault(stage, deque(maxlen=self.max_samples))
+            samples.append(duration_ms)
+            if tokens:
+                self._tokens[stage] = self._tokens.get(stage, 0) + int(tokens)
+
+    def stage_stats(self):
+        """
+        Returns {stage: {"count", "p50_ms", "p95_ms", "tokens"}} for this process.
+        """
+        with self._lock:
+            snapshot = {stage: list(samples) for stage, samples in self._durations.items()}
+            tokens = dict(self._tokens)
+        return {
+            stage: {
+                "count": len(samples),
+                "p50_ms": round(percentile(samples, 50), 1),
+                "p95_ms": round(percentile(samples, 95), 1),
+                "tokens": tokens.get(stage, 0),
+            }
+            for stage, samples in sorted(snapshot.items())
+        }
+
+    def reset(self):
+        with self._lock:
+            self._durations.clear()
+            self._tokens.clear()
+
+    def _export(self, span):
+        if not self.export_path:
+            return
+        line = json.dumps({
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+                "scopeSpans": [{"scope": {"name": "jurislens.tracing"}, "spans": [span.to_otlp()]}],
+            }]
+        })
+        try:
+            directory = os.path.dirname(self.export_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with self._lock:
+                with open(self.export_path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+        except OSError as e:
+            print(f"⚠️ Trace export failed: {e}")
+
+
+TRACER = Tracer()
+
+
+class TracingEmbeddings(Embeddings):
+    """
+    Wraps an Embeddings object so every embedding call shows up as its own span.
+    """
+
+    def __init__(self, embeddings, tracer=None):
+        self._embeddings = embeddings
+        self._tracer = tracer or TRACER
+
+    def embed_query(self, text):
+        with self._tracer.span("embed_query", "retrieval.embed", chars=len(text)):
+            return self._embeddings.embed_query(text)
+
+    def embed_documents(self, texts):
+        with self._tracer.span("embed_documents", "ingest.embed", documents=len(texts)):
+            return self._embeddings.embed_documents(texts)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._embeddings, name)
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """
+    Turns LangChain callback events into spans: one root span per agent run,
+    with child spans for every LLM call (with token usage) and tool call.
+    Tool sub-steps opened via TRACER.span() nest under the running tool.
+    """
+
+    def __init__(self, tracer=None):
+        self.tracer = tracer or TRACER
+        self._spans = {}
+
+    def _start(self, run_id, parent_run_id, name, stage, **attributes):
+        parent = self._spans[parent_run_id][0] if parent_run_id in self._spans else _current_span.get()
+        span = self.tracer.start_span(name, stage, parent=parent, **attributes)
+        self._spans[run_id] = (span, parent)
+        _current_span.set(span)
+
+    def _end(self, run_id, status="OK", **attributes):
+        entry = self._spans.pop(run_id, None)
+        if entry is None:
+            return
+        span, parent = entry
+        _current_span.set(parent)
+        self.tracer.end_span(span, status, **attributes)
+
+    # --- Agent (root chain only; nested chains are folded into it) ---
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        if parent_run_id is None:
+            self._start(run_id, None, "agent_run", "agent")
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, "ERROR", error=str(error))
+
+    # --- LLM calls ---
+    def _llm_stage(self, parent_run_id):
+        # Tier calls of a routed model (model_routing.py) nest under its own llm span,
+        # which already carries their summed usage, so they get their own stage
+        parent = self._spans.get(parent_run_id)
+        return "llm.tier" if parent and parent[0].stage == "llm" else "llm"
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, "llm_call", self._llm_stage(parent_run_id),
+                    **{"llm.model": _model_name(serialized, kwargs)})
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, "llm_call", self._llm_stage(parent_run_id),
+                    **{"llm.model": _model_name(serialized, kwargs)})
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        llm_output = getattr(response, "llm_output", None) or {}
+        usage = llm_output.get("token_usage") or {}
+        # Tiered routing (model_routing.py): which tier answered, and why
+        routing = llm_output.get("routing") or {}
+        routed = {"llm.route": routing["route"], "llm.response_model": llm_output.get("model_name")} if routing else {}
+        self._end(
+            run_id,
+            **{
+                "llm.usage.prompt_tokens": usage.get("prompt_tokens", 0),
+                "llm.usage.completion_tokens": usage.get("completion_tokens", 0),
+                "llm.usage.total_tokens": usage.get("total_tokens", 0),
+            },
+            **routed
+        )
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, "ERROR", error=str(error))
+
+    # --- Tool calls ---
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        tool_name = serialized.get("name", "tool")
+        self._start(run_id, parent_run_id, tool_name, f"tool.{tool_name}", input_chars=len(str(input_str)),
+                    **{"tool.input": str(input_str)[:200]})
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id, output_chars=len(str(output)))
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, "ERROR", error=str(error))
+
+
+def _model_name(serialized, kwargs):
+    params = kwargs.get("invocation_params") or {}
+    return (
+        params.get("model")
+        or params.get("model_name")
+        or ((serialized or {}).get("kwargs") or {}).get("model_name")
+        or "unknown"
+    )
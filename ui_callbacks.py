@@ -0,0 +1,34 @@
+from langchain_core.callbacks import BaseCallbackHandler
+
+# Custom Handler for user-friendly "Scanning" visuals
+class FriendlyCallbackHandler(BaseCallbackHandler):
+    def __init__(self, status_placeholder, progress_bar):
+        self.status = status_placeholder
+        self.progress = progress_bar
+        self.step = 30 # Start at 30%
+        
+    def on_tool_start(self, serialized, input_str, **kwargs):
+        tool_name = serialized.get("name")
+        self.step += 10
+        if self.step > 90: self.step = 90
+        self.progress.progress(self.step)
+        
+        if tool_name == "search_regulations_tool":
+            self.status.info("🔍 **Scanning Knowledge Base...**")
+        elif tool_name == "calculate_risk_tool":
+            self.status.warning("🧮 **Calculating Compliance Risk...**")
+        elif tool_name == "check_sanctions_tool":
+            self.status.error("🕵️‍♀️ **Scanning Sanctions Databases...**")
+            
+    def on_tool_end(self, output, **kwargs):
+        self.step += 10
+        if self.step > 95: self.step = 95
+        self.progress.progress(self.step)
+        
+        output_str = str(output)
+        if "Daily Aggregate Limit Exceeded" in output_str:
+             self.status.error("❌ **LEDGER CHECK FAILED:** Daily Limit Exceeded!")
+        elif "simulated" in output_str.lower() or "source" in output_str.lower():
+             self.status.success("✅ **Relevant Documents Found.** Analysis in progress...")
+        else:
+             self.status.info("🤔 **Analyzing Findings...**")
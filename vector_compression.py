@@ -0,0 +1,406 @@
+"""
+Vector compression for the Elasticsearch mapping and the local vector index.
+
+    JURISLENS_VECTOR_COMPRESSION  none | int8 | int4 | bbq | pq   (default none)
+    JURISLENS_VECTOR_RESCORE      oversample factor for re-scoring the compressed
+                                  top hits against full-precision vectors (0 = off)
+    JURISLENS_EMBED_MODEL / JURISLENS_EMBED_DIMS
+                                  ask OpenAI for shorter embeddings (text-embedding-3-*
+                                  models only), i.e. dimensionality reduction at the source
+
+Elasticsearch gets the matching dense_vector index_options (int8_hnsw needs ES 8.12+,
+int4_hnsw 8.15+, bbq_hnsw and rescore_vector 8.18+); it has no product quantization,
+so "pq" maps to int8_hnsw there. Rescoring only applies to the quantized index types.
+
+Locally, the knowledge base snapshot (kb_snapshot.py) stores its embeddings as int8
+codes whenever compression is on (snapshot_codec); those are never sent to ES. VectorIndex below mirrors every
+option, plus PCA reduction, for `benchmark.py --mode vectors` to measure recall.
+"""
+import os
+
+import numpy as np
+
+COMPRESSION = os.getenv("JURISLENS_VECTOR_COMPRESSION", "none").lower()
+RESCORE_OVERSAMPLE = float(os.getenv("JURISLENS_VECTOR_RESCORE", "0"))
+EMBED_MODEL = os.getenv("JURISLENS_EMBED_MODEL")
+EMBED_DIMS = int(os.getenv("JURISLENS_EMBED_DIMS", "0")) or None
+
+COMPRESSIONS = ("none", "int8", "int4", "bbq", "pq")
+ES_INDEX_TYPES = {"none": "hnsw", "int8": "int8_hnsw", "int4": "int4_hnsw", "bbq": "bbq_hnsw", "pq": "int8_hnsw"}
+
+# Scalar quantization clips to this central quantile range, like ES's confidence_interval
+CLIP_QUANTILE = 0.001
+PQ_CENTROIDS = 256
+PQ_ITERATIONS = 12
+PQ_TRAIN_SAMPLE = 20000  # k-means runs on at most this many vectors
+SEARCH_BLOCK = 65536  # vectors decoded per block, bounds the temporary float32 buffer
+
+
+def embedding_kwargs():
+    """
+    Extra OpenAIEmbeddings(...) arguments for the configured model / reduced dimensions.
+    """
+    kwargs = {}
+    if EMBED_MODEL:
+        kwargs["model"] = EMBED_MODEL
+    if EMBED_DIMS:
+        kwargs["dimensions"] = EMBED_DIMS
+    return kwargs
+
+
+def es_strategy(compression=None, rescore=None):
+    """
+    Retrieval strategy for ElasticsearchStore: the stock approx (HNSW) strategy when
+    compression is off, else a dense_vector strategy with quantized index_options.
+    """
+    compression = (compression or COMPRESSION).lower()
+    rescore = RESCORE_OVERSAMPLE if rescore is None else rescore
+    if compression == "none":
+        if rescore:
+            # knn.rescore_vector is only accepted for quantized index types
+            print("⚠️ JURISLENS_VECTOR_RESCORE has no effect without JURISLENS_VECTOR_COMPRESSION; ignoring it.")
+        from langchain_elasticsearch import ElasticsearchStore
+        return ElasticsearchStore.ApproxRetrievalStrategy()
+    if compression not in ES_INDEX_TYPES:
+        raise ValueError(f"Unknown vector compression '{compression}' (expected one of {', '.join(COMPRESSIONS)})")
+    if compression == "pq":
+        print("⚠️ Elasticsearch has no product quantization; using int8_hnsw for the index.")
+    return _compressed_dense_vector_strategy(ES_INDEX_TYPES[compression], rescore)
+
+
+def _compressed_dense_vector_strategy(index_type, rescore):
+    from elasticsearch.helpers.vectorstore import DenseVectorStrategy
+
+    class CompressedDenseVectorStrategy(DenseVectorStrategy):
+        def es_mappings_settings(self, *, text_field, vector_field, num_dimensions):
+            mappings, settings = super().es_mappings_settings(
+                text_field=text_field, vector_field=vector_field, num_dimensions=num_dimensions
+            )
+            mappings["properties"][vector_field]["index_options"] = {"type": index_type}
+            return mappings, settings
+
+        def es_query(self, **kwargs):
+            body = super().es_query(**kwargs)
+            if rescore:
+                # Quantized HNSW finds candidates, the float vectors on disk re-rank them
+                body["knn"]["rescore_vector"] = {"oversample": rescore}
+            return body
+
+    return CompressedDenseVectorStrategy()
+
+
+def _normalise(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class PCAReducer:
+    """
+    Projects vectors onto their top principal components (fit once on the first batch).
+    The projection isn't re-centred, so dot products of projected vectors still
+    approximate the original cosines.
+    """
+
+    def __init__(self, dims):
+        self.dims = dims
+        self.mean = None
+        self.components = None
+
+    def fit(self, vectors):
+        self.mean = vectors.mean(axis=0)
+        _, _, vt = np.linalg.svd(vectors - self.mean, full_matrices=False)
+        self.components = vt[: self.dims].T.astype(np.float32)
+        return self
+
+    def transform(self, vectors):
+        return vectors @ self.components
+
+
+class ScalarQuantizer:
+    """
+    Per-dimension min/max scalar quantization to `bits` (8 or 4; 4-bit codes are packed two per byte).
+    clip=0 keeps the exact range instead of clipping the outer quantiles.
+    """
+
+    def __init__(self, bits=8, clip=CLIP_QUANTILE):
+        self.bits = bits
+        self.clip = clip
+        self.levels = 2 ** bits - 1
+
+    def fit(self, vectors):
+        self.lo = np.quantile(vectors, self.clip, axis=0).astype(np.float32)
+        hi = np.quantile(vectors, 1 - self.clip, axis=0).astype(np.float32)
+        self.scale = np.maximum(hi - self.lo, 1e-12) / self.levels
+        return self
+
+    def encode(self, vectors):
+        codes = np.clip(np.rint((vectors - self.lo) / self.scale), 0, self.levels).astype(np.uint8)
+        if self.bits == 4:
+            if codes.shape[1] % 2:
+                codes = np.pad(codes, ((0, 0), (0, 1)))
+            codes = (codes[:, 0::2] << 4) | codes[:, 1::2]
+        return codes
+
+    def decode(self, codes):
+        if self.bits == 4:
+            unpacked = np.empty((codes.shape[0], codes.shape[1] * 2), dtype=np.uint8)
+            unpacked[:, 0::2] = codes >> 4
+            unpacked[:, 1::2] = codes & 0x0F
+            codes = unpacked[:, : len(self.lo)]
+        return codes.astype(np.float32) * self.scale + self.lo
+
+    def scores(self, codes, query):
+        if self.bits == 8:
+            # (codes * scale + lo) @ q without materialising the decoded matrix
+            return codes.astype(np.float32) @ (query * self.scale) + float(self.lo @ query)
+        return self.decode(codes) @ query
+
+
+class BinaryQuantizer:
+    """
+    One bit per dimension (sign around the corpus mean), like ES bbq; pair it with rescoring.
+    """
+
+    def fit(self, vectors):
+        self.center = vectors.mean(axis=0).astype(np.float32)
+        self.dims = vectors.shape[1]
+        return self
+
+    def encode(self, vectors):
+        return np.packbits(vectors > self.center, axis=1)
+
+    def scores(self, codes, query):
+        signs = np.unpackbits(codes, axis=1, count=self.dims).astype(np.float32) * 2.0 - 1.0
+        centred = query - self.center
+        # Scaled into [-1, 1] so un-rescored scores are at least comparable to cosines
+        return signs @ centred / (np.sqrt(self.dims) * max(1e-12, float(np.linalg.norm(centred))))
+
+
+class ProductQuantizer:
+    """
+    Splits vectors into `subvectors` chunks and stores each as the id of its nearest of
+    256 k-means centroids (one byte per chunk). Scored with per-query lookup tables.
+    """
+
+    def __init__(self, subvectors, centroids=PQ_CENTROIDS, iterations=PQ_ITERATIONS, seed=7):
+        self.subvectors = subvectors
+        self.centroids = centroids
+        self.iterations = iterations
+        self.seed = seed
+
+    def fit(self, vectors):
+        rng = np.random.default_rng(self.seed)
+        if len(vectors) > PQ_TRAIN_SAMPLE:
+            vectors = vectors[rng.choice(len(vectors), PQ_TRAIN_SAMPLE, replace=False)]
+        n, dims = vectors.shape
+        if dims % self.subvectors:
+            raise ValueError(f"{dims} dimensions don't split into {self.subvectors} PQ subvectors")
+        self.sub_dims = dims // self.subvectors
+        k = min(self.centroids, n)
+        self.codebooks = np.empty((self.subvectors, k, self.sub_dims), dtype=np.float32)
+        for m in range(self.subvectors):
+            part = vectors[:, m * self.sub_dims:(m + 1) * self.sub_dims]
+            centers = part[rng.choice(n, k, replace=False)].copy()
+            for _ in range(self.iterations):
+                assign = self._nearest(part, centers)
+                onehot = np.zeros((len(part), k), dtype=np.float32)
+                onehot[np.arange(len(part)), assign] = 1.0
+                sums = onehot.T @ part
+                counts = onehot.sum(axis=0)
+                filled = counts > 0  # Empty clusters keep their previous centroid
+                centers[filled] = sums[filled] / counts[filled, None]
+            self.codebooks[m] = centers
+        return self
+
+    @staticmethod
+    def _nearest(part, centers):
+        # |x|^2 is the same for every centroid, so it doesn't change the argmin
+        return ((centers ** 2).sum(1) - 2 * part @ centers.T).argmin(axis=1)
+
+    def encode(self, vectors):
+        codes = np.empty((vectors.shape[0], self.subvectors), dtype=np.uint8)
+        for m in range(self.subvectors):
+            part = vectors[:, m * self.sub_dims:(m + 1) * self.sub_dims]
+            codes[:, m] = self._nearest(part, self.codebooks[m])
+        return codes
+
+    def scores(self, codes, query):
+        tables = np.einsum("mkd,md->mk", self.codebooks, query.reshape(self.subvectors, self.sub_dims))
+        return tables[np.arange(self.subvectors), codes].sum(axis=1)
+
+
+def make_quantizer(compression, dims, pq_subvectors=None):
+    if compression == "int8":
+        return ScalarQuantizer(8)
+    if compression == "int4":
+        return ScalarQuantizer(4)
+    if compression == "bbq":
+        return BinaryQuantizer()
+    if compression == "pq":
+        # ~8 dimensions per byte by default (1536 dims -> 192 bytes)
+        return ProductQuantizer(pq_subvectors or max(1, dims // 8))
+    if compression == "none":
+        return None
+    raise ValueError(f"Unknown vector compression '{compression}' (expected one of {', '.join(COMPRESSIONS)})")
+
+
+def snapshot_codec(compression=None, rescore=None):
+    """
+    How kb_snapshot stores embeddings: "int8" codes (a quarter of the size) when
+    compression is on, else "float32". Only float32 snapshots are served back as
+    embeddings (embedding cache, --reindex); int8 ones are re-embedded instead, so ES
+    never indexes decoded vectors. With rescoring on they stay float32, since ES
+    rescores against what it was sent and reusing them saves the embedding calls.
+    """
+    compression = (compression or COMPRESSION).lower()
+    rescore = RESCORE_OVERSAMPLE if rescore is None else rescore
+    return "int8" if compression != "none" and not rescore else "float32"
+
+
+class QuantizedVectors:
+    """
+    Read-only matrix of int8 codes (e.g. memory-mapped from a snapshot); rows are
+    decoded to float32 when accessed. Every row has its own offset and step, so
+    rows can be copied into another matrix without decoding and re-encoding them.
+    per_row=False reads codes with one offset and step per dimension instead.
+    """
+
+    def __init__(self, codes, lo, scale, per_row=True):
+        self.codes = codes
+        self.lo = np.asarray(lo, dtype=np.float32)
+        self.scale = np.asarray(scale, dtype=np.float32)
+        self.per_row = per_row
+
+    @classmethod
+    def encode(cls, vectors):
+        lo = vectors.min(axis=1)
+        scale = np.maximum(vectors.max(axis=1) - lo, 1e-12) / 255
+        codes = np.clip(np.rint((vectors - lo[:, None]) / scale[:, None]), 0, 255).astype(np.uint8)
+        return cls(codes, lo, scale)
+
+    @property
+    def shape(self):
+        return self.codes.shape
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, rows):
+        codes = self.codes[rows].astype(np.float32)
+        if not self.per_row:
+            return codes * self.scale + self.lo
+        return codes * np.expand_dims(self.scale[rows], -1) + np.expand_dims(self.lo[rows], -1)
+
+    def __iter__(self):
+        for start in range(0, len(self.codes), SEARCH_BLOCK):
+            yield from self[start:start + SEARCH_BLOCK]
+
+
+class VectorIndex:
+    """
+    Brute-force cosine index over (optionally reduced and) compressed vectors.
+
+    Quantization parameters are fitted on the vectors present at the first search
+    (or build()); later additions are encoded with them. With rescore > 0, the
+    full-precision vectors are kept too, and the top k * rescore compressed hits
+    are re-ranked exactly. Like ES, which keeps the float vectors on disk, pass
+    full_path to hold them in a memory-mapped .npy file instead of RAM.
+    Scores use ES's cosine normalisation, (1 + cos) / 2.
+    """
+
+    def __init__(self, compression=None, reduce_dims=None, rescore=None, pq_subvectors=None, full_path=None):
+        self.compression = (compression or COMPRESSION).lower()
+        self.reduce_dims = reduce_dims
+        self.rescore = RESCORE_OVERSAMPLE if rescore is None else rescore
+        self.pq_subvectors = pq_subvectors
+        self.reducer = None
+        self.quantizer = None
+        self.codes = None
+        self.full = None
+        self.full_path = full_path
+        self._pending = []
+
+    def __len__(self):
+        built = 0 if self.codes is None else len(self.codes)
+        return built + sum(len(v) for v in self._pending)
+
+    def add(self, vectors):
+        vectors = _normalise(np.asarray(vectors, dtype=np.float32))
+        if len(vectors):
+            self._pending.append(vectors)
+
+    def build(self):
+        if not self._pending:
+            return
+        batch = np.vstack(self._pending)
+        self._pending = []
+        if self.codes is None:
+            if self.reduce_dims and self.reduce_dims < batch.shape[1]:
+                self.reducer = PCAReducer(self.reduce_dims).fit(batch)
+            self.quantizer = make_quantizer(self.compression, self._stored(batch).shape[1], self.pq_subvectors)
+            if self.quantizer is not None:
+                self.quantizer.fit(self._stored(batch))
+        codes = self._encode(batch)
+        self.codes = codes if self.codes is None else np.vstack([self.codes, codes])
+        if self.rescore:
+            self.full = batch if self.full is None else np.vstack([self.full, batch])
+            if self.full_path:
+                np.save(self.full_path, self.full)
+                self.full = np.load(self.full_path, mmap_mode="r")
+
+    def _stored(self, vectors):
+        return self.reducer.transform(vectors).astype(np.float32) if self.reducer else vectors
+
+    def _encode(self, vectors):
+        stored = self._stored(vectors)
+        return self.quantizer.encode(stored) if self.quantizer else stored
+
+    def _approx_scores(self, query, rows):
+        stored_query = self._stored(query[None, :])[0]
+        scores = np.empty(len(rows), dtype=np.float32)
+        for start in range(0, len(rows), SEARCH_BLOCK):
+            block = self.codes[rows[start:start + SEARCH_BLOCK]]
+            scores[start:start + SEARCH_BLOCK] = self.quantizer.scores(block, stored_query) if self.quantizer else block @ stored_query
+        return scores
+
+    def search(self, query, k=4, mask=None):
+        """
+        Returns [(row, score)] best first. mask: optional boolean array of allowed rows (pre-filter).
+        """
+        self.build()
+        if self.codes is None:
+            return []
+        query = _normalise(np.asarray(query, dtype=np.float32)[None, :])[0]
+        rows = np.arange(len(self.codes)) if mask is None else np.flatnonzero(mask)
+        if not len(rows):
+            return []
+        scores = self._approx_scores(query, rows)
+
+        exact = self.full is not None and (self.quantizer is not None or self.reducer is not None)
+        wanted = min(len(rows), max(k, int(k * self.rescore)) if exact else k)
+        top = np.argpartition(-scores, wanted - 1)[:wanted]
+        rows, scores = rows[top], scores[top]
+        if exact:
+            scores = self.full[rows] @ query
+        order = np.argsort(-scores)[:k]
+        return [(int(rows[i]), float((1.0 + min(1.0, max(-1.0, scores[i]))) / 2.0)) for i in order]
+
+    def memory_bytes(self):
+        """
+        {"codes", "full", "model"} bytes (model = PCA matrix / codebooks / scales).
+        "full" is 0 when the full-precision vectors are memory-mapped rather than in RAM.
+        """
+        self.build()
+        model = 0
+        if self.reducer is not None:
+            model += self.reducer.components.nbytes + self.reducer.mean.nbytes
+        for attr in ("lo", "scale", "center", "codebooks"):
+            value = getattr(self.quantizer, attr, None)
+            if value is not None:
+                model += value.nbytes
+        return {
+            "codes": 0 if self.codes is None else int(self.codes.nbytes),
+            "full": 0 if self.full is None or isinstance(self.full, np.memmap) else int(self.full.nbytes),
+            "model": int(model),
+        }